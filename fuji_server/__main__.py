@@ -13,7 +13,16 @@ from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 
 from fuji_server.app import create_app
+from fuji_server.harvester.local_repository_harvester import LocalRepositoryHarvester
+from fuji_server.helper.catalogue_listing_cache import CatalogueListingCache
+from fuji_server.helper.endpoint_capability_cache import EndpointCapabilityCache
+from fuji_server.helper.jsonld_context_loader import JsonLdContextLoader
+from fuji_server.helper.negotiation_planner import NegotiationPlanner
+from fuji_server.helper.parsed_content_cache import ParsedContentCache
 from fuji_server.helper.preprocessor import Preprocessor
+from fuji_server.helper.reference_data_refresher import ReferenceDataRefresher
+from fuji_server.helper.repository_helper import RepositoryHelper
+from fuji_server.helper.tika_client import LocalTikaBackend, TikaClient, TikaServerBackend
 
 
 def main():
@@ -28,8 +37,6 @@ def main():
     DATACITE_API_REPO = config['EXTERNAL']['datacite_api_repo']
     RE3DATA_API = config['EXTERNAL']['re3data_api']
     METADATACATALOG_API = config['EXTERNAL']['metadata_catalog']"""
-    LOV_API = config["EXTERNAL"]["lov_api"]
-    LOD_CLOUDNET = config["EXTERNAL"]["lod_cloudnet"]
     # BIOPORTAL_REST = config['EXTERNAL']['bioportal_rest']
     # BIOPORTAL_APIKEY = config['EXTERNAL']['bioportal_apikey']
     data_files_limit = int(config["SERVICE"]["data_files_limit"])
@@ -41,14 +48,51 @@ def main():
     # logger.info('Total metrics defined: {}'.format(preproc.get_total_metrics()))
 
     isDebug = config.getboolean("SERVICE", "debug_mode")
-    preproc.retrieve_licenses(isDebug)
-    preproc.retrieve_datacite_re3repos()
+    # reference data is loaded from the local files, outdated data is refreshed in the background
+    preproc.load_licenses()
+    preproc.load_datacite_re3repos()
+    RepositoryHelper.load_re3data_profiles()
+    if not isDebug:
+        ReferenceDataRefresher.from_config(config).start()
 
     preproc.retrieve_metadata_standards()
     # preproc.retrieve_linkedvocabs(lov_api=LOV_API, lodcloud_api=LOD_CLOUDNET, bioportal_api=BIOPORTAL_REST, bioportal_key=BIOPORTAL_APIKEY, isDebugMode=False)
-    preproc.retrieve_linkedvocabs(lov_api=LOV_API, lodcloud_api=LOD_CLOUDNET, isDebugMode=isDebug)
+    # linked vocabs are read from the registry files in data/linked_vocabs
+    preproc.retrieve_linked_vocab_index()
     preproc.set_remote_log_info(config["SERVICE"].get("remote_log_host"), config["SERVICE"].get("remote_log_path"))
     preproc.set_max_content_size(config["SERVICE"]["max_content_size"])
+    JsonLdContextLoader.set_allow_remote_contexts(
+        config["SERVICE"].getboolean("allow_remote_jsonld_contexts", fallback=True)
+    )
+    JsonLdContextLoader.set_max_cached_contexts(
+        config["SERVICE"].get("jsonld_context_cache_size", JsonLdContextLoader.max_cached_contexts)
+    )
+    NegotiationPlanner.set_host_memory_ttl(config["SERVICE"].get("conneg_host_memory_ttl", 0))
+    if config["SERVICE"].get("data_content_cache"):
+        ParsedContentCache.set_db_path(os.path.join(ROOT_DIR, config["SERVICE"]["data_content_cache"]))
+    ParsedContentCache.set_max_size(config["SERVICE"].get("data_content_cache_size", ParsedContentCache.max_size))
+    if config["SERVICE"].get("endpoint_capability_cache"):
+        EndpointCapabilityCache.set_db_path(os.path.join(ROOT_DIR, config["SERVICE"]["endpoint_capability_cache"]))
+    EndpointCapabilityCache.set_ttl(
+        config["SERVICE"].get("endpoint_capability_ttl"), config["SERVICE"].get("endpoint_capability_negative_ttl")
+    )
+    if config["SERVICE"].get("catalogue_listing_cache"):
+        CatalogueListingCache.set_db_path(os.path.join(ROOT_DIR, config["SERVICE"]["catalogue_listing_cache"]))
+    CatalogueListingCache.set_ttl(
+        config["SERVICE"].get("catalogue_listing_ttl"), config["SERVICE"].get("catalogue_listing_negative_ttl")
+    )
+    tika_max_in_flight = int(config["SERVICE"].get("tika_max_in_flight", TikaClient.max_in_flight))
+    if config["SERVICE"].get("tika_backend", "server") == "local":
+        tika_backend = LocalTikaBackend()
+    else:
+        tika_backend = TikaServerBackend(config["SERVICE"].get("tika_server_endpoint"), pool_size=tika_max_in_flight)
+    TikaClient.configure(
+        backend=tika_backend,
+        max_in_flight=tika_max_in_flight,
+        deadline=config["SERVICE"].get("tika_deadline", TikaClient.deadline),
+    )
+    LocalRepositoryHarvester.set_repository_root(config["SERVICE"].get("local_repository_root"))
+    LocalRepositoryHarvester.set_clone_repositories(config["SERVICE"].getboolean("clone_repositories", fallback=False))
 
     logger.info(f"Total SPDX licenses : {preproc.get_total_licenses()}")
     logger.info(f"Total re3repositories found from datacite api : {len(preproc.getRE3repositories())}")
@@ -3,8 +3,6 @@
 # SPDX-License-Identifier: MIT
 
 import hashlib
-import io
-import json
 import logging
 import logging.handlers
 import re
@@ -50,8 +48,11 @@ from fuji_server.evaluators.fair_evaluator_unique_persistent_identifier_software
 from fuji_server.evaluators.fair_evaluator_version_identifier import FAIREvaluatorVersionIdentifier
 from fuji_server.harvester.data_harvester import DataHarvester
 from fuji_server.harvester.github_harvester import GithubHarvester
+from fuji_server.harvester.local_repository_harvester import LocalRepositoryHarvester
 from fuji_server.harvester.metadata_harvester import MetadataHarvester
 from fuji_server.helper.linked_vocab_helper import LinkedVocabHelper
+from fuji_server.helper.log_message_collector import LogMessageCollector, get_assessment_logger
+from fuji_server.helper.metadata_cleaner import MetadataCleaner
 from fuji_server.helper.metadata_collector import MetadataOfferingMethods
 from fuji_server.helper.metadata_mapper import Mapper
 from fuji_server.helper.metric_helper import MetricHelper
@@ -132,7 +133,8 @@ class FAIRCheck:
         self.pid_scheme = None
         self.id_scheme = None
         self.checked_pages = []
-        self.logger = logging.getLogger(self.test_id)
+        # set to debug in testing environment
+        self.logger = get_assessment_logger(self.test_id, logging.INFO if test_debug else logging.NOTSET)
         self.metadata_sources = []
         self.isDebug = test_debug
         self.isLandingPageAccessible = None
@@ -154,7 +156,7 @@ class FAIRCheck:
         self.use_datacite = use_datacite
         self.use_github = use_github
         self.repeat_pid_check = False
-        self.logger_message_stream = io.StringIO()
+        self.log_message_collector = None
         logging.addLevelName(self.LOG_SUCCESS, "SUCCESS")
         logging.addLevelName(self.LOG_FAILURE, "FAILURE")
 
@@ -163,12 +165,9 @@ class FAIRCheck:
         self.remoteLogHost = None
         self.weblogger = None
         if self.isDebug:
-            self.logStreamHandler = logging.StreamHandler(self.logger_message_stream)
-            formatter = logging.Formatter("%(message)s|%(levelname)s")
-            self.logStreamHandler.setFormatter(formatter)
+            self.log_message_collector = LogMessageCollector()
             self.logger.propagate = False
-            self.logger.setLevel(logging.INFO)  # set to debug in testing environment
-            self.logger.addHandler(self.logStreamHandler)
+            self.logger.addHandler(self.log_message_collector)
 
             if Preprocessor.remote_log_host:
                 self.weblogger = logging.handlers.HTTPHandler(
@@ -285,78 +284,13 @@ class FAIRCheck:
             else:
                 self.auth_token_type = "Basic"
 
+    def add_preharvested_metadata(self, metadata_xml, metadata_url):
+        # metadata which has already been harvested, e.g. a record of an OAI-PMH ListRecords response
+        self.metadata_harvester.preharvested_metadata.append((metadata_url, metadata_xml))
+
     def clean_metadata(self):
-        # replace nasty "None" strings by real  None
-        try:
-            nonerepdict = json.dumps(self.metadata_merged).replace('"None"', "null")
-            self.metadata_merged = json.loads(nonerepdict)
-        except Exception as e:
-            print("Nasty None replace error: ", e)
-            pass
-        data_objects = self.metadata_merged.get("object_content_identifier")
-        if data_objects == {"url": None} or data_objects == [None]:
-            data_objects = self.metadata_merged["object_content_identifier"] = None
-        if data_objects is not None:
-            if not isinstance(data_objects, list):
-                self.metadata_merged["object_content_identifier"] = [data_objects]
-        # duplicate handling
-        if self.metadata_merged.get("object_content_identifier"):
-            fdci = {}
-            for dci in self.metadata_merged.get("object_content_identifier"):
-                dcurl = dci.get("url")
-                if dcurl not in fdci:
-                    fdci[dcurl] = dci
-                else:
-                    # complete size and type
-                    if not fdci[dcurl].get("type") and dci.get("type"):
-                        fdci[dcurl]["type"] = dci.get("type")
-                    elif dci.get("type") and fdci[dcurl].get("type"):
-                        if "/" in dci.get("type") and "/" not in fdci[dcurl].get("type"):
-                            fdci[dcurl]["type"] = dci.get("type")
-                    if not fdci[dcurl].get("size") and dci.get("size"):
-                        fdci[dcurl]["size"] = dci.get("size")
-            self.metadata_merged["object_content_identifier"] = [di for di in fdci.values()]
-
-            # if "object_content_identifier" in self.metadata_merged:
-            # if self.metadata_merged.get("object_content_identifier"):
-            oi = 0
-            for c in self.metadata_merged["object_content_identifier"]:
-                if (
-                    not c.get("size")
-                    and self.metadata_merged.get("object_size")
-                    and len(self.metadata_merged["object_content_identifier"]) == 1
-                ):
-                    # c["size"] = self.metadata_merged.get("object_size")
-                    self.metadata_merged["object_content_identifier"][oi]["size"] = self.metadata_merged.get(
-                        "object_size"
-                    )
-                # clean mime types in case these are in URI form:
-                if c.get("type"):
-                    if isinstance(c["type"], list):
-                        c["type"] = c["type"][0]
-                        self.metadata_merged["object_content_identifier"][oi]["type"] = c["type"][0]
-                    mime_parts = str(c.get("type")).split("/")
-                    if len(mime_parts) > 2:
-                        if mime_parts[-2] in [
-                            "application",
-                            "audio",
-                            "font",
-                            "example",
-                            "image",
-                            "message",
-                            "model",
-                            "multipart",
-                            "text",
-                            "video",
-                        ]:
-                            self.metadata_merged["object_content_identifier"][oi]["type"] = (
-                                str(mime_parts[-2]) + "/" + str(mime_parts[-1])
-                            )
-                oi += 1
-        # clean empty entries
-        for mk, mv in list(self.metadata_merged.items()):
-            if mv == "" or mv is None:
-                del self.metadata_merged[mk]
+        # replace nasty "None" strings by real None, remove empty entries and duplicate data links in one pass
+        self.metadata_merged = MetadataCleaner.clean_merged_metadata(self.metadata_merged)
 
     def harvest_all_metadata(self):
         # ========= clean merged metadata, delete all entries which are None or ''
@@ -390,12 +324,23 @@ class FAIRCheck:
     def harvest_all_data(self):
         if self.metadata_merged.get("object_content_identifier"):
             data_links = self.metadata_merged.get("object_content_identifier")  # [: self.FILES_LIMIT]
-            data_harvester = DataHarvester(data_links, self.logger, self.landing_url, metrics=self.METRICS.keys())
+            data_harvester = DataHarvester(
+                data_links,
+                self.logger,
+                self.landing_url,
+                metrics=self.METRICS.keys(),
+                extract_text=bool(self.metadata_merged.get("measured_variable")),
+            )
             data_harvester.retrieve_all_data()
             self.content_identifier = data_harvester.data
 
     def harvest_github(self):
-        if self.use_github:
+        if LocalRepositoryHarvester.accepts(self.id, clone=self.use_github):
+            # local directories and cloned repositories are harvested without the GitHub API
+            local_harvester = LocalRepositoryHarvester(self.id, self.logger)
+            local_harvester.harvest()
+            self.github_data = local_harvester.data
+        elif self.use_github:
             github_harvester = GithubHarvester(self.id, self.logger)
             github_harvester.harvest()
             self.github_data = github_harvester.data
@@ -578,25 +523,18 @@ class FAIRCheck:
 """
 
     def get_log_messages_dict(self):
-        logger_messages = {}
-        self.logger_message_stream.seek(0)
-        for log_message in self.logger_message_stream.readlines():
-            if log_message.startswith("FsF-") or log_message.startswith("FRSM-"):
-                m = log_message.split(":", 1)
-                metric = m[0].strip()
-                message_n_level = m[1].strip().split("|", 1)
-                if len(message_n_level) > 1:
-                    level = message_n_level[1]
-                else:
-                    level = "INFO"
-                message = message_n_level[0]
-                if metric not in logger_messages:
-                    logger_messages[metric] = []
-                if message not in logger_messages[metric]:
-                    logger_messages[metric].append(level.replace("\n", "") + ": " + message.strip())
-        self.logger_message_stream = io.StringIO
-
-        return logger_messages
+        if self.log_message_collector:
+            return self.log_message_collector.get_messages_dict()
+        return {}
+
+    def release_logger(self):
+        """Detach and close the handlers which have been attached to the assessment logger,
+        should be called once the assessment has been finished."""
+        for handler in (self.log_message_collector, self.weblogger):
+            if handler:
+                self.logger.removeHandler(handler)
+                handler.close()
+        self.log_message_collector = None
 
     def get_assessment_summary(self, results):
         status_dict = {"pass": 1, "fail": 0}
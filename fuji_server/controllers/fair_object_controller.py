@@ -48,8 +48,6 @@ async def assess_by_id(body):
         auth_token = body.get("auth_token")
         auth_token_type = body.get("auth_token_type")
         logger = Preprocessor.logger
-        # updating re3data
-        Preprocessor.retrieve_datacite_re3repos()
 
         logger.info("Assessment target: " + identifier)
         print("Assessment target: ", identifier, flush=True)
@@ -184,7 +182,7 @@ async def assess_by_id(body):
         if metadata_preserved_result:
             results.append(metadata_preserved_result)
         debug_messages = ft.get_log_messages_dict()
-        # ft.logger_message_stream.flush()
+        ft.release_logger()
         summary = ft.get_assessment_summary(results)
         for res_k, res_v in enumerate(results):
             if ft.isDebug:
@@ -197,8 +195,6 @@ async def assess_by_id(body):
             else:
                 results[res_k]["test_debug"] = ["INFO: Debugging disabled"]
                 debug_messages = {}
-        if len(ft.logger.handlers) > 1:
-            ft.logger.handlers = [ft.logger.handlers[-1]]
         # endtimestmp = datetime.datetime.now().replace(microsecond=0).isoformat()
         endtimestmp = (
             datetime.datetime.now().replace(microsecond=0).isoformat() + "Z"
@@ -44,6 +44,7 @@ def harvest_by_id(body=None):
             ft.retrieve_metadata_external_schemaorg_negotiated([ft.pid_url])
             ft.retrieve_metadata_external_rdf_negotiated([ft.pid_url])
             ft.retrieve_metadata_external_datacite()
+        ft.release_logger()
 
         harvest_result = []
         for metadata in ft.metadata_unmerged:
@@ -74,9 +74,7 @@ class FAIREvaluatorCommunityMetadata(FAIREvaluator):
                             nsstandards.append(sinfo.get("name"))
         if nsstandards:
             self.logger.info(
-                "{} : Found metadata standards that are given as namespaces -: {}".format(
-                    "FsF-R1.3-01M", str(set(nsstandards))
-                )
+                "%s : Found metadata standards that are given as namespaces -: %s", "FsF-R1.3-01M", set(nsstandards)
             )
 
     def retrieve_metadata_standards_from_sparql(self):
@@ -5,6 +5,7 @@
 import re
 
 from fuji_server.evaluators.fair_evaluator import FAIREvaluator
+from fuji_server.helper.variable_matcher import VariableMatcher
 from fuji_server.models.data_content_metadata import DataContentMetadata
 from fuji_server.models.data_content_metadata_output import DataContentMetadataOutput
 from fuji_server.models.data_content_metadata_output_inner import DataContentMetadataOutputInner
@@ -27,6 +28,7 @@ class FAIREvaluatorDataContentMetadata(FAIREvaluator):
         self.set_metric("FsF-R1-01MD")
         self.data_content_descriptors = []
         self.test_passed = []
+        self.variable_matcher = None
 
     def subtestDataContentInfoGiven(self):
         test_result = False
@@ -315,13 +317,19 @@ class FAIREvaluatorDataContentMetadata(FAIREvaluator):
                             self.metric_identifier
                             + " : Could not verify measured variables found in data object content, content parsing failed"
                         )
+                    # the matcher is built once per record and finds all variables in one pass over the content
+                    if self.variable_matcher is None:
+                        self.variable_matcher = VariableMatcher(self.fuji.metadata_merged["measured_variable"])
+                    found_variables = self.variable_matcher.find(
+                        test_data_object.get("test_data_content_text"), test_data_object.get("test_data_content_header")
+                    )
                     for variable in self.fuji.metadata_merged["measured_variable"]:
                         variable_match = False
                         variable_metadata_inner = DataContentMetadataOutputInner()
                         variable_metadata_inner.descriptor = "measured_variable"
                         variable_metadata_inner.descriptor_value = variable
                         if test_data_object.get("test_data_content_text"):
-                            if variable in test_data_object.get("test_data_content_text"):
+                            if str(variable) in found_variables:
                                 test_result = True
                                 variable_match = True
                                 self.logger.log(
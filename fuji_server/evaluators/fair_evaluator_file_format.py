@@ -51,11 +51,15 @@ class FAIREvaluatorFileFormat(FAIREvaluator):
                             mime_url_pair[c.get("type")] = c.get("url")
                 if unverified_content_urls:
                     self.logger.info(
-                        f"{self.metric_identifier} : Data content (inaccessible) identifier provided -: -: {list(set(unverified_content_urls))}"
+                        "%s : Data content (inaccessible) identifier provided -: -: %s",
+                        self.metric_identifier,
+                        list(set(unverified_content_urls)),
                     )
         elif len(self.fuji.content_identifier) > 0:
             verified_content_urls = [item.get("url") for item in self.fuji.content_identifier.values()]
-            self.logger.info(f"{self.metric_identifier} : Data content identifier provided -: {verified_content_urls}")
+            self.logger.info(
+                "%s : Data content identifier provided -: %s", self.metric_identifier, verified_content_urls
+            )
             # self.maturity = 1
             for file_index, data_file in enumerate(self.fuji.content_identifier.values()):
                 mime_type = data_file.get("claimed_type")
@@ -121,7 +121,9 @@ class FAIREvaluatorSemanticVocabulary(FAIREvaluator):
                 self.setEvaluationCriteriumScore(self.metric_identifier + "-2", test_score, "pass")
                 self.logger.log(
                     self.fuji.LOG_SUCCESS,
-                    f"{self.metric_identifier} : Namespace matches found -: {self.knownnamespaceuris}",
+                    "%s : Namespace matches found -: %s",
+                    self.metric_identifier,
+                    self.knownnamespaceuris,
                 )
                 for e in self.knownnamespaceuris:
                     self.outputs.append(SemanticVocabularyOutputInner(namespace=e, is_namespace_active=True))
@@ -9,16 +9,27 @@ import threading
 import urllib
 
 import idutils
-from tika import parser
 
 from fuji_server.helper.identifier_helper import IdentifierHelper
+from fuji_server.helper.mime_type_detector import MimeTypeDetector
+from fuji_server.helper.parsed_content_cache import ParsedContentCache
+from fuji_server.helper.tika_client import TikaClient
 
 
 class DataHarvester:
     LOG_SUCCESS = 25
     LOG_FAILURE = 35
 
-    def __init__(self, data_links, logger, landing_page=None, auth_token=None, auth_token_type="Basic", metrics=None):
+    def __init__(
+        self,
+        data_links,
+        logger,
+        landing_page=None,
+        auth_token=None,
+        auth_token_type="Basic",
+        metrics=None,
+        extract_text=True,
+    ):
         self.user_agent = "Mozilla/5.0 (Windows NT 10.0; Win64; x64; F-UJI)"
         self.logger = logger
         self.data_links = data_links
@@ -33,6 +44,8 @@ class DataHarvester:
         self.content_type = None
         self.delay_time = 3
         self.responses = {}
+        # full-text extraction is only needed to verify measured variables (FsF-R1-01MD)
+        self.extract_text = extract_text
 
     def expand_url(self, url):
         # replace local urls with full path from landing_page URI
@@ -239,11 +252,43 @@ class DataHarvester:
                     if fileinfo["content_size"] < fileinfo["header_content_size"]:
                         fileinfo["truncated"] = True
                 if fileinfo["content_size"] > 0:
-                    fileinfo.update(self.tika(file_buffer_object, urldict.get("url")))
+                    fileinfo.update(self.detect_content(file_buffer_object, urldict.get("url"), fileinfo))
 
             self.data[urldict.get("url")] = fileinfo
         return fileinfo
 
+    def detect_content(self, file_buffer_object, url, fileinfo):
+        # detect the content type locally, Tika is only used to extract the text of binary formats
+        content = file_buffer_object.getvalue()
+        content_types = MimeTypeDetector.detect(content, url)
+        if not content_types and fileinfo.get("header_content_type"):
+            content_types = [fileinfo.get("header_content_type")]
+        self.logger.info(f"FsF-R1-01MD : Detected content type of data object -: {url} {content_types}")
+        detected_info = {"tika_content_type": self.extend_mime_type_list(content_types), "test_data_content_text": ""}
+        if self.extract_text:
+            content_text = MimeTypeDetector.extract_text(content, content_types)
+            if content_text is not None:
+                detected_info["test_data_content_text"] = content_text
+                header = MimeTypeDetector.extract_header(content, content_types)
+                if header:
+                    detected_info["test_data_content_header"] = header
+                self.logger.info(f"FsF-R1-01MD : Succesfully parsed data file(s) -: {url}")
+            else:
+                # shared files (e.g. a README.pdf) are only parsed once
+                cache_key = ParsedContentCache.get_key(content)
+                tika_info = ParsedContentCache.get(cache_key)
+                if tika_info is not None:
+                    self.logger.info(f"FsF-R1-01MD : Using cached parse result of data object -: {url}")
+                else:
+                    tika_info = self.tika(file_buffer_object, url)
+                    if tika_info.get("tika_status") == 200:
+                        ParsedContentCache.put(cache_key, tika_info)
+                for tika_content_type in tika_info.pop("tika_content_type"):
+                    if tika_content_type not in detected_info["tika_content_type"]:
+                        detected_info["tika_content_type"].append(tika_content_type)
+                detected_info.update(tika_info)
+        return detected_info
+
     def tika(self, file_buffer_object, url):
         parsed_content = ""
         tika_content_types = ""
@@ -251,7 +296,7 @@ class DataHarvester:
         status = None
         try:
             if len(file_buffer_object.getvalue()) > 0:
-                parsedFile = parser.from_buffer(file_buffer_object.getvalue())
+                parsedFile = TikaClient.parse(file_buffer_object.getvalue())
                 fileinfo["tika_status"] = status = parsedFile.get("status")
                 tika_content_types = parsedFile.get("metadata").get("Content-Type")
                 parsed_content = parsedFile.get("content")
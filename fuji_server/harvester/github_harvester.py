@@ -2,16 +2,22 @@
 #
 # SPDX-License-Identifier: MIT
 
+import base64
+import json
 import os
 import re
 import time
+from concurrent.futures import ThreadPoolExecutor
 from configparser import ConfigParser
 from pathlib import Path
 
 from github import Auth, Github
-from github.GithubException import UnknownObjectException
+from github.GithubException import GithubException, RateLimitExceededException, UnknownObjectException
+from urllib3.util import Retry
 
 import yaml
+from fuji_server.helper.github_harvest_cache import GithubHarvestCache
+from fuji_server.helper.github_token_pool import GithubTokenPool
 
 
 class GithubHarvester:
@@ -23,51 +29,46 @@ class GithubHarvester:
         self.id = id
         self.host = host
         self.verbose = verbose
+        self.max_blob_workers = 8
         self.authenticate(config)
+        # harvest results are cached per commit, the path is relative to the fuji_server directory
+        if config.has_section("CACHE") and not GithubHarvestCache.configured:
+            cache_path = config["CACHE"].get("harvest_cache")
+            if cache_path:
+                cache_path = os.path.join(os.path.abspath(os.path.dirname(__file__)), "..", cache_path)
+            GithubHarvestCache.set_db_path(cache_path)
+            GithubHarvestCache.set_max_size(config["CACHE"].get("harvest_cache_size", GithubHarvestCache.max_size))
         self.data = {}  # dictionary with all info
+        self.timings = {}  # seconds spent per harvesting step
         fuji_server_dir = Path(__file__).parent.parent  # project_root
         software_file_path = fuji_server_dir / "data" / "software_file.yaml"
         with open(software_file_path) as f:
             self.files_map = yaml.safe_load(f)
 
     def authenticate(self, config):
-        """Runs every time a new harvesting request comes in, as the harvester is re-initialised every time. Picks a token (if available) and initialises the pyGithub handle.
+        """Runs every time a new harvesting request comes in, as the harvester is re-initialised every time. Picks a token (if available) from the process-wide token pool and initialises the pyGithub handle.
 
         Args:
             config (dict): parsed configuration dictionary
         """
-        token_file = config["ACCESS"]["token_file"]
-        token_to_use = None
-        if token_file != "":
-            with open(token_file) as f:
-                token_list = f.read().splitlines()
-            # find a token with enough remaining requests, or the one with most remaining if none available
-            fallback_max_token = None
-            fallback_max_rate_limit = 0
-            for token in token_list:
-                try:
-                    rate_limit = Github(auth=Auth.Token(token)).get_rate_limit()
-                    if rate_limit.core.remaining >= 1000 and rate_limit.search.remaining >= 2:
-                        token_to_use = token
-                        break
-                    elif rate_limit.core.remaining > fallback_max_rate_limit:
-                        fallback_max_rate_limit = rate_limit.core.remaining
-                        fallback_max_token = token
-                except:  # ignore expired or invalid tokens
-                    pass
-            if token_to_use is None:
-                token_to_use = fallback_max_token
-        else:
-            token = config["ACCESS"]["token"]
-            if token != "":
-                token_to_use = token
-        if token_to_use is not None:  # found a token, one way or another
+        GithubTokenPool.load(config["ACCESS"]["token_file"], config["ACCESS"]["token"])
+        self.set_handle(GithubTokenPool.acquire())
+
+    def set_handle(self, token):
+        """Initialises the pyGithub handle with the given token.
+
+        Args:
+            token (str): the access token, None for unauthenticated access
+        """
+        self.token = token
+        kwargs = {}
+        if token is not None:  # found a token, one way or another
             auth = Auth.Token(token)
             if self.verbose:
-                rate_limit = Github(auth=Auth.Token(token)).get_rate_limit()
-                print(
-                    f"Authenticate using GitHub token ending on '{token[-4:]}'.\n    Remaining core requests: {rate_limit.core.remaining}\n    Remaining search requests: {rate_limit.search.remaining}"
-                )
+                print(f"Authenticate using GitHub token ending on '{token[-4:]}'.")
+            if len(GithubTokenPool.tokens) > 1:
+                # do not wait for the rate limit reset, the harvest is continued with another token
+                kwargs["retry"] = Retry(total=10, status_forcelist=list(range(500, 600)))
         else:  # empty token, so no authentication possible (rate limit will be much lower)
             auth = None
             self.logger.warning(
@@ -75,12 +76,68 @@ class GithubHarvester:
             )  # TODO: would be better if it were a general warning!
         if self.host != "https://github.com":
             base_url = f"{self.host}/api/v3"
-            self.handle = Github(auth=auth, base_url=base_url)
+            self.handle = Github(auth=auth, base_url=base_url, **kwargs)
+        else:
+            self.handle = Github(auth=auth, **kwargs)
+
+    def rotate_token(self, exception):
+        """Switches to another token of the token pool after the current token has been rate limited (403/429) or
+        rejected (401).
+
+        Args:
+            exception (github.GithubException.GithubException): the exception raised by the failed request
+
+        Returns:
+            bool: True if the harvest can be repeated with another token
+        """
+        if self.token is None:
+            return False
+        if exception.status == 401:
+            GithubTokenPool.discard(self.token)
+        elif isinstance(exception, RateLimitExceededException) or exception.status == 429:
+            headers = {k.lower(): v for k, v in (exception.headers or {}).items()}
+            reset = None
+            if "retry-after" in headers:
+                reset = time.time() + float(headers["retry-after"])
+            elif "x-ratelimit-reset" in headers:
+                reset = float(headers["x-ratelimit-reset"])
+            GithubTokenPool.mark_exhausted(self.token, headers.get("x-ratelimit-resource", "core"), reset)
         else:
-            self.handle = Github(auth=auth)
+            return False
+        token = GithubTokenPool.acquire()
+        if token is None or token == self.token:
+            return False
+        self.logger.info(f"FRSM-09-A1 : GitHub token rejected or rate limited, switching token -: {exception.status}")
+        self.set_handle(token)
+        return True
+
+    def report_rate_limit(self, repo, resource="core"):
+        """Passes the rate limit state of the last response to the token pool, so the next harvest can pick a token
+        without requesting the rate limit.
+
+        Args:
+            repo (github.Repository.Repository): the repository, its requester holds the state of the last response
+            resource (str): the rate limit resource of the last request ('core' or 'search')
+        """
+        if self.token is None:
+            return
+        remaining, limit = repo.requester.rate_limiting
+        if limit >= 0:
+            GithubTokenPool.update(self.token, resource, remaining, repo.requester.rate_limiting_resettime)
 
     def harvest(self):
+        while True:
+            try:
+                return self.harvest_repository()
+            except GithubException as e:
+                if not self.rotate_token(e):
+                    raise
+                self.data = {}
+                self.timings = {}
+
+    def harvest_repository(self):
         tic = time.perf_counter()
+        step_tic = tic
         # check if it's a URL or repo ID
         # NOTE: this should probably be handled by IdentifierHelper, but I don't understand that module yet.
         if self.id.count("/") > 1:  # URL
@@ -98,26 +155,38 @@ class GithubHarvester:
                 "FRSM-09-A1 : Could not find repository on GitHub."
             )  # TODO: would be better if it were a general warning!
             return
+        # unchanged repositories are not harvested again
+        head_sha = self.get_head_sha(repo)
+        if head_sha is not None:
+            cached_data = GithubHarvestCache.get(self.host, self.repo_id, head_sha)
+            if cached_data is not None:
+                self.data = cached_data
+                self.report_rate_limit(repo)
+                self.logger.info(f"FRSM-09-A1 : Using cached harvest of unchanged repository -: {head_sha}")
+                self.timings["total"] = time.perf_counter() - tic
+                return
+        step_tic = self.record_timing("repository", step_tic)
 
         # harvesting
-        try:  # LICENSE in metadata
-            license_metadata = repo.get_license()
-            self.data["license_path"] = license_metadata.path
-            self.data["license"] = license_metadata.license.name
-        except UnknownObjectException:
-            pass
+        license_metadata = self.get_conditional(repo, "/license")
+        if license_metadata is not None:  # LICENSE in metadata
+            self.data["license_path"] = license_metadata.get("path")
+            self.data["license"] = (license_metadata.get("license") or {}).get("name")
+        step_tic = self.record_timing("license", step_tic)
 
         # identify source code (sample files in the main language used in the repo)
-        repo_languages = repo.get_languages()
+        repo_languages = self.get_conditional(repo, "/languages") or {}
         if repo_languages != {}:
             self.data["languages"] = repo_languages
         main_source_code_language = repo.language
+        step_tic = self.record_timing("languages", step_tic)
         if main_source_code_language is not None:
             self.data["main_language"] = main_source_code_language
             query = f' repo:{self.repo_id} language:"{main_source_code_language}"'  # needs the space in front as every query needs a string to match on
             source_code_files = self.handle.search_code(query)
             # extract code of up to n=5 files
             n = min(5, source_code_files.totalCount)
+            self.report_rate_limit(repo, "search")
             source_code_samples = []
             for i in range(n):
                 source_code_samples.append(
@@ -129,38 +198,130 @@ class GithubHarvester:
                 )
             if len(source_code_samples) > 0:
                 self.data["source_code_samples"] = source_code_samples
+            step_tic = self.record_timing("source_code_samples", step_tic)
+
+        self.retrieve_all(repo, head_sha)
+        self.report_rate_limit(repo)
+        if head_sha is not None:
+            GithubHarvestCache.put(self.host, self.repo_id, head_sha, self.data)
+        self.timings["total"] = time.perf_counter() - tic
+        self.logger.info(
+            "FRSM-09-A1 : GitHub harvesting timings (seconds) -: "
+            + ", ".join(f"{step}: {seconds:.3f}" for step, seconds in self.timings.items())
+        )
 
-        self.retrieve_all(repo)
+    def record_timing(self, step, step_tic):
         toc = time.perf_counter()
-        if self.verbose:
-            print(f"Harvesting took {toc - tic:.4f} seconds.")
+        self.timings[step] = self.timings.get(step, 0) + toc - step_tic
+        return toc
 
-    def retrieve_all(self, repo):
-        file_pattern = r"|".join([rf"(?P<{k}>{'|'.join(v['pattern'])})" for k, v in self.files_map.items()])
+    def get_head_sha(self, repo):
+        """Resolves the commit SHA of the default branch with a single request which only returns the SHA.
+
+        Args:
+            repo (github.Repository.Repository): the repository
+
+        Returns:
+            str: the commit SHA, None if it could not be resolved
+        """
+        try:
+            status, _, output = repo.requester.requestJson(
+                "GET", f"{repo.url}/commits/{repo.default_branch}", headers={"Accept": "application/vnd.github.sha"}
+            )
+        except Exception as e:
+            self.logger.warning(f"FRSM-09-A1 : Could not resolve HEAD commit of repository -: {e}")
+            return None
+        if status == 200 and re.fullmatch(r"[0-9a-f]{40}", output.strip()):
+            return output.strip()
+        return None
+
+    def get_conditional(self, repo, path):
+        """Requests repository metadata, using the ETag of a cached response for a conditional request. Conditional
+        requests which return 304 Not Modified do not count against the rate limit.
+
+        Args:
+            repo (github.Repository.Repository): the repository
+            path (str): the API path relative to the repository, e.g. '/license'
+
+        Returns:
+            dict: the response data, None if the resource does not exist
+        """
+        url = repo.url + path
+        cached_response = GithubHarvestCache.get_response(url)
+        headers = {"If-None-Match": cached_response[0]} if cached_response else None
+        status, response_headers, output = repo.requester.requestJson("GET", url, headers=headers)
+        if status == 304 and cached_response:
+            return cached_response[1]
+        if status == 404:
+            return None
+        if status != 200:
+            raise GithubException(status, output, response_headers)
+        data = json.loads(output)
+        etag = {k.lower(): v for k, v in response_headers.items()}.get("etag")
+        if etag:
+            GithubHarvestCache.put_response(url, etag, data)
+        return data
+
+    def list_files(self, repo, sha=None):
+        """Lists the paths and blob SHAs of all files in the default branch with a single recursive Git Trees API call.
+        Falls back to walking the directories via the contents API if the tree is too large to be listed at once.
+
+        Args:
+            repo (github.Repository.Repository): the repository
+            sha (str): the commit SHA to list, by default the default branch
+
+        Returns:
+            list: (path, blob sha) tuples of all files, files in the repository root first
+        """
+        tree = repo.get_git_tree(sha or repo.default_branch, recursive=True)
+        if not tree.truncated:
+            # the tree is in path order, the evaluators expect files closer to the root first (like the directory walk)
+            files = [(element.path, element.sha) for element in tree.tree if element.type == "blob"]
+            return sorted(files, key=lambda file: file[0].count("/"))
+        self.logger.info("FRSM-09-A1 : Repository tree is too large to be listed at once, walking its directories")
+        files = []
         repo_contents = repo.get_contents("")
         while repo_contents:
             content_file = repo_contents.pop(0)
             if content_file.type == "dir":
                 repo_contents.extend(repo.get_contents(content_file.path))
             else:
-                m = re.fullmatch(file_pattern, content_file.path)
-                if m is not None and any(m.groupdict().values()):
-                    for k, v in m.groupdict().items():
-                        if v is not None:
-                            if self.files_map[k]["parse"] == "full":
-                                file_entry = {
-                                    "name": content_file.name,
-                                    "path": content_file.path,
-                                    "content": content_file.decoded_content,
-                                }
-                            elif self.files_map[k]["parse"] == "file_name":
-                                file_entry = {"name": content_file.name, "path": content_file.path}
-                            else:
-                                self.logger.warning(
-                                    f"FRSM-09-A1 : Parsing strategy {self.files_map[k]['parse']} is currently not implemented. Choose one of 'full' or 'file_name' for files {k}. Defaulting to parsing strategy 'file_name'."
-                                )
-                                file_entry = {"name": content_file.name, "path": content_file.path}
-                            try:
-                                self.data[k].append(file_entry)
-                            except KeyError:
-                                self.data[k] = [file_entry]
+                files.append((content_file.path, content_file.sha))
+        return files
+
+    def get_blob_content(self, repo, sha):
+        blob = repo.get_git_blob(sha)
+        if blob.encoding == "base64":
+            return base64.b64decode(blob.content)
+        return blob.content.encode("utf-8")
+
+    def retrieve_all(self, repo, sha=None):
+        step_tic = time.perf_counter()
+        file_pattern = r"|".join([rf"(?P<{k}>{'|'.join(v['pattern'])})" for k, v in self.files_map.items()])
+        files = self.list_files(repo, sha)
+        step_tic = self.record_timing("tree", step_tic)
+        matched_files = []  # (files_map key, path, blob sha, parse content)
+        for path, sha in files:
+            m = re.fullmatch(file_pattern, path)
+            if m is not None and any(m.groupdict().values()):
+                for k, v in m.groupdict().items():
+                    if v is not None:
+                        if self.files_map[k]["parse"] not in ("full", "file_name"):
+                            self.logger.warning(
+                                f"FRSM-09-A1 : Parsing strategy {self.files_map[k]['parse']} is currently not implemented. Choose one of 'full' or 'file_name' for files {k}. Defaulting to parsing strategy 'file_name'."
+                            )
+                        matched_files.append((k, path, sha, self.files_map[k]["parse"] == "full"))
+        step_tic = self.record_timing("matching", step_tic)
+        # download the blobs of fully parsed files concurrently, each blob only once
+        blob_shas = list(dict.fromkeys(sha for _, _, sha, parse_content in matched_files if parse_content))
+        with ThreadPoolExecutor(max_workers=self.max_blob_workers) as executor:
+            blob_contents = dict(zip(blob_shas, executor.map(lambda sha: self.get_blob_content(repo, sha), blob_shas)))
+        for k, path, sha, parse_content in matched_files:
+            file_entry = {"name": path.rsplit("/", 1)[-1], "path": path}
+            if parse_content:
+                file_entry["content"] = blob_contents[sha]
+            try:
+                self.data[k].append(file_entry)
+            except KeyError:
+                self.data[k] = [file_entry]
+        self.record_timing("blobs", step_tic)
@@ -0,0 +1,271 @@
+# SPDX-FileCopyrightText: 2020 PANGAEA (https://www.pangaea.de/)
+#
+# SPDX-License-Identifier: MIT
+
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+from urllib.parse import unquote, urlparse
+
+import yaml
+from fuji_server.harvester.github_harvester import GithubHarvester
+from fuji_server.helper.preprocessor import Preprocessor
+
+
+class LocalRepositoryHarvester(GithubHarvester):
+    """Harvests a software repository from a local directory or a shallow git clone instead of the GitHub API.
+
+    The harvested data has the same structure as the data of the GithubHarvester, so the software evaluators work
+    unchanged. Local directories are only harvested below the configured repository root, repository URLs are only
+    cloned if cloning is enabled.
+    """
+
+    repository_root = None
+    clone_repositories = False
+    clone_timeout = 120
+    max_source_code_samples = 5
+    # SPDX license ids of the most common license texts, identified by a characteristic phrase (checked in order)
+    LICENSE_SIGNATURES = [
+        (r"apache license,? version 2\.0", "Apache-2.0"),
+        (r"gnu affero general public license version 3", "AGPL-3.0-only"),
+        (r"gnu lesser general public license version 3", "LGPL-3.0-only"),
+        (r"gnu lesser general public license version 2\.1", "LGPL-2.1-only"),
+        (r"gnu general public license version 3", "GPL-3.0-only"),
+        (r"gnu general public license version 2", "GPL-2.0-only"),
+        (r"mozilla public license,? version 2\.0", "MPL-2.0"),
+        (r"european union public licen[cs]e v\. ?1\.2", "EUPL-1.2"),
+        (r"this is free and unencumbered software released into the public domain", "Unlicense"),
+        (r"cc0 1\.0 universal", "CC0-1.0"),
+        (r"permission is hereby granted, free of charge, to any person obtaining a copy", "MIT"),
+        (r"permission to use, copy, modify, and(/or)? distribute this software for any purpose", "ISC"),
+        (r"redistribution and use in source and binary forms.*neither the name", "BSD-3-Clause"),
+        (r"redistribution and use in source and binary forms", "BSD-2-Clause"),
+    ]
+    LANGUAGE_EXTENSIONS = {
+        ".c": "C",
+        ".h": "C",
+        ".cc": "C++",
+        ".cpp": "C++",
+        ".cxx": "C++",
+        ".hpp": "C++",
+        ".cs": "C#",
+        ".f": "Fortran",
+        ".f90": "Fortran",
+        ".f95": "Fortran",
+        ".go": "Go",
+        ".java": "Java",
+        ".jl": "Julia",
+        ".js": "JavaScript",
+        ".mjs": "JavaScript",
+        ".kt": "Kotlin",
+        ".m": "MATLAB",
+        ".php": "PHP",
+        ".pl": "Perl",
+        ".py": "Python",
+        ".r": "R",
+        ".rb": "Ruby",
+        ".rs": "Rust",
+        ".scala": "Scala",
+        ".sh": "Shell",
+        ".ts": "TypeScript",
+    }
+
+    def __init__(self, id, logger, verbose=False):
+        self.logger = logger
+        self.id = id
+        self.verbose = verbose
+        self.max_blob_workers = 8
+        self.data = {}  # dictionary with all info
+        self.timings = {}  # seconds spent per harvesting step
+        fuji_server_dir = Path(__file__).parent.parent  # project_root
+        software_file_path = fuji_server_dir / "data" / "software_file.yaml"
+        with open(software_file_path) as f:
+            self.files_map = yaml.safe_load(f)
+
+    @classmethod
+    def set_repository_root(cls, repository_root):
+        cls.repository_root = os.path.realpath(repository_root) if repository_root else None
+
+    @classmethod
+    def set_clone_repositories(cls, clone_repositories):
+        cls.clone_repositories = bool(clone_repositories)
+
+    @classmethod
+    def get_local_path(cls, id):
+        """Returns the local directory of a repository identifier (path or file:// URL) if it is below the repository root.
+
+        Args:
+            id (str): the repository identifier
+
+        Returns:
+            str: the directory, None if the identifier is not an accessible local directory
+        """
+        if not cls.repository_root or not isinstance(id, str):
+            return None
+        path = unquote(urlparse(id).path) if id.startswith("file://") else id
+        if not os.path.isabs(path):
+            return None
+        path = os.path.realpath(path)
+        if os.path.commonpath([path, cls.repository_root]) != cls.repository_root or not os.path.isdir(path):
+            return None
+        return path
+
+    @classmethod
+    def is_clone_url(cls, id):
+        return cls.clone_repositories and isinstance(id, str) and re.match(r"(https?|ssh|git)://|git@", id) is not None
+
+    @classmethod
+    def accepts(cls, id, clone=True):
+        """Checks if a repository identifier is harvested locally.
+
+        Args:
+            id (str): the repository identifier
+            clone (bool): whether repository URLs may be cloned for this assessment
+
+        Returns:
+            bool: True for local directories below the repository root and, if cloning is enabled and allowed,
+                repository URLs
+        """
+        return cls.get_local_path(id) is not None or (clone and cls.is_clone_url(id))
+
+    def harvest(self):
+        tic = time.perf_counter()
+        clone_dir = None
+        repository_path = self.get_local_path(self.id)
+        try:
+            if repository_path is None:
+                if not self.is_clone_url(self.id):
+                    self.logger.warning("FRSM-09-A1 : Repository is neither a local directory nor a git URL to clone.")
+                    return
+                clone_dir = tempfile.mkdtemp(prefix="fuji-repository-")
+                repository_path = os.path.join(clone_dir, "repository")
+                try:
+                    subprocess.run(
+                        ["git", "clone", "--depth", "1", "--quiet", "--", self.id, repository_path],
+                        check=True,
+                        capture_output=True,
+                        timeout=self.clone_timeout,
+                        # fail instead of waiting for credentials of private or missing repositories
+                        env={**os.environ, "GIT_TERMINAL_PROMPT": "0"},
+                    )
+                except (OSError, subprocess.SubprocessError) as e:
+                    self.logger.warning(f"FRSM-09-A1 : Could not clone repository -: {e}")
+                    return
+                self.record_timing("clone", tic)
+            self.harvest_directory(repository_path)
+        finally:
+            if clone_dir is not None:
+                shutil.rmtree(clone_dir, ignore_errors=True)
+        self.timings["total"] = time.perf_counter() - tic
+        self.logger.info(
+            "FRSM-09-A1 : Local repository harvesting timings (seconds) -: "
+            + ", ".join(f"{step}: {seconds:.3f}" for step, seconds in self.timings.items())
+        )
+
+    def harvest_directory(self, repository_path):
+        self.retrieve_all(repository_path)
+        step_tic = time.perf_counter()
+        # the license in the repository root is used as repository license, like GitHub does
+        for license_file in self.data.get("license_file", []):
+            if "/" not in license_file["path"]:
+                license_name = self.get_license_name(license_file["content"])
+                if license_name is not None:
+                    self.data["license_path"] = license_file["path"]
+                    self.data["license"] = license_name
+                    break
+        step_tic = self.record_timing("license", step_tic)
+        self.retrieve_source_code_samples(repository_path)
+        self.record_timing("source_code_samples", step_tic)
+
+    def list_files(self, repository_path, sha=None):
+        """Lists the files of the repository, in git working trees only the files tracked by git.
+
+        Args:
+            repository_path (str): the repository directory
+            sha (str): unused, the files of the working tree are listed
+
+        Returns:
+            list: (path, path) tuples of all files, files in the repository root first; the path is used to read
+                the content
+        """
+        try:
+            output = subprocess.run(
+                ["git", "-C", repository_path, "ls-files", "-z"], check=True, capture_output=True, timeout=60
+            ).stdout
+            paths = [path for path in output.decode("utf-8", errors="replace").split("\0") if path]
+        except (OSError, subprocess.SubprocessError):
+            paths = []
+            for directory, directory_names, file_names in os.walk(repository_path):
+                directory_names[:] = sorted(name for name in directory_names if name != ".git")
+                relative_directory = os.path.relpath(directory, repository_path)
+                for file_name in sorted(file_names):
+                    paths.append(file_name if relative_directory == "." else f"{relative_directory}/{file_name}")
+        # like the GitHub harvester, files closer to the repository root first
+        paths.sort(key=lambda path: path.count("/"))
+        # symbolic links must not point outside of the repository
+        repository_path = os.path.realpath(repository_path)
+        self.repository_files = [
+            path
+            for path in paths
+            if os.path.isfile(os.path.join(repository_path, path))
+            and os.path.commonpath([os.path.realpath(os.path.join(repository_path, path)), repository_path])
+            == repository_path
+        ]
+        return [(path, path) for path in self.repository_files]
+
+    def get_blob_content(self, repository_path, path):
+        with open(os.path.join(repository_path, path), "rb") as f:
+            return f.read()
+
+    def get_license_name(self, content):
+        """Identifies the license of a license file by its SPDX-License-Identifier or a characteristic phrase.
+
+        Args:
+            content (bytes): the content of the license file
+
+        Returns:
+            str: the SPDX license name (the license id if the SPDX list is not available), None if not identified
+        """
+        text = content.decode("utf-8", errors="replace")
+        spdx_id = None
+        identifier = re.search(r"SPDX-License-Identifier:\s*([\w.+-]+)", text)
+        if identifier is not None:
+            spdx_id = identifier.group(1)
+        else:
+            normalized_text = " ".join(text.lower().split())
+            for signature, signature_id in self.LICENSE_SIGNATURES:
+                if re.search(signature, normalized_text):
+                    spdx_id = signature_id
+                    break
+        if spdx_id is None:
+            return None
+        all_licenses, _ = Preprocessor.get_licenses()
+        return next(
+            (license["name"] for license in all_licenses if license.get("licenseId", "").lower() == spdx_id.lower()),
+            spdx_id,
+        )
+
+    def retrieve_source_code_samples(self, repository_path):
+        # bytes per language like the GitHub languages API
+        languages = Counter()
+        language_files = {}
+        for path in self.repository_files:
+            language = self.LANGUAGE_EXTENSIONS.get(os.path.splitext(path)[1].lower())
+            if language is not None:
+                languages[language] += os.path.getsize(os.path.join(repository_path, path))
+                language_files.setdefault(language, []).append(path)
+        if not languages:
+            return
+        self.data["languages"] = dict(languages.most_common())
+        main_language = languages.most_common(1)[0][0]
+        self.data["main_language"] = main_language
+        sample_paths = language_files[main_language][: self.max_source_code_samples]
+        self.data["source_code_samples"] = [
+            {"path": path, "language": main_language, "content": self.get_blob_content(repository_path, path)}
+            for path in sample_paths
+        ]
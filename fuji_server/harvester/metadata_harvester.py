@@ -4,7 +4,6 @@
 
 import enum
 import hashlib
-import io
 import json
 import logging
 import mimetypes
@@ -13,15 +12,16 @@ import urllib
 from urllib.parse import urljoin, urlparse
 
 import extruct
-import lxml
 import rdflib
-from bs4 import BeautifulSoup
 from pyRdfa import pyRdfa
 from rapidfuzz import fuzz, process
 from tldextract import extract
 
 # from fuji_server.controllers.fair_check import ME
 from fuji_server.helper.identifier_helper import IdentifierHelper
+from fuji_server.helper.landing_page_document import LandingPageDocument
+from fuji_server.helper.log_message_collector import get_assessment_logger
+from fuji_server.helper.metadata_cleaner import MetadataCleaner
 from fuji_server.helper.metadata_collector import MetaDataCollector, MetadataOfferingMethods, MetadataSources
 from fuji_server.helper.metadata_collector_datacite import MetaDataCollectorDatacite
 from fuji_server.helper.metadata_collector_dublincore import MetaDataCollectorDublinCore
@@ -32,6 +32,7 @@ from fuji_server.helper.metadata_collector_ore_atom import MetaDataCollectorOreA
 from fuji_server.helper.metadata_collector_rdf import MetaDataCollectorRdf
 from fuji_server.helper.metadata_collector_xml import MetaDataCollectorXML
 from fuji_server.helper.metadata_mapper import Mapper
+from fuji_server.helper.negotiation_planner import NegotiationPlanner
 from fuji_server.helper.preprocessor import Preprocessor
 from fuji_server.helper.request_helper import AcceptTypes, RequestHelper
 
@@ -73,10 +74,11 @@ class MetadataHarvester:
         if logger:
             self.logger = logger
         else:
-            self.logger = logging.getLogger(self.test_id)
+            self.logger = get_assessment_logger(self.test_id)
         self.auth_token = auth_token
         self.auth_token_type = auth_token_type
         self.landing_html = None
+        self.landing_document = None
         self.landing_url = None
         self.landing_origin = None
         self.landing_domain = None
@@ -98,7 +100,11 @@ class MetadataHarvester:
         self.namespace_uri = []
         self.metadata_sources = []
         self.metadata_unmerged = []
+        # canonical keys of metadata_unmerged entries to quickly detect duplicates
+        self.metadata_unmerged_keys = set()
         self.pid_scheme = None
+        # metadata records which have already been harvested (e.g. by OAI-PMH ListRecords) as (url, xml) tuples
+        self.preharvested_metadata = []
         self.linked_namespace_uri = {}
         self.signposting_header_links = []
         self.use_datacite = use_datacite
@@ -139,12 +145,15 @@ class MetadataHarvester:
         except Exception as e:
             print("Add Metadata Source Error: ", str(e))
 
-    def merge_metadata(self, metadict, url, method, format, mimetype, schema="", namespaces=[]):
+    def merge_metadata(self, metadict, url, method, format, mimetype, schema="", namespaces=None):
         try:
             offering_method = None
-            if not isinstance(namespaces, list):
+            if namespaces is None:
+                namespaces = []
+            elif not isinstance(namespaces, list):
                 namespaces = [namespaces]
-            test_uris = namespaces
+            # copy to not modify the namespaces list of the collector
+            test_uris = namespaces = list(namespaces)
             if schema != "":
                 test_uris.insert(0, schema)
             metadata_standard = self.get_metadata_standard_by_uris(test_uris)
@@ -185,15 +194,11 @@ class MetadataHarvester:
                                     )
                             if isinstance(self.metadata_merged[r], list):
                                 if isinstance(metadict[r], list):
-                                    self.metadata_merged[r].extend(metadict[r])
+                                    merged_values = self.metadata_merged[r] + metadict[r]
                                 else:
-                                    self.metadata_merged[r].append(metadict[r])
+                                    merged_values = self.metadata_merged[r] + [metadict[r]]
                                 # make list unique
-                                unique_merged = []
-                                for e in self.metadata_merged[r]:
-                                    if e not in unique_merged:
-                                        unique_merged.append(e)
-                                self.metadata_merged[r] = unique_merged
+                                self.metadata_merged[r] = MetadataCleaner.unique_values(merged_values)
                             # overwrite old property value in case new one is longer but similar to the old one, otherwise keep the old one
                             elif isinstance(self.metadata_merged[r], str) and isinstance(metadict[r], str):
                                 if len(self.metadata_merged[r]) < len(metadict[r]):
@@ -248,23 +253,19 @@ class MetadataHarvester:
                     "metadata": metadict,
                     "namespaces": namespaces,
                 }
-                if mdict not in self.metadata_unmerged:
-                    self.metadata_unmerged.append(mdict)
+                try:
+                    mdict_key = MetadataCleaner.get_hashable_key(mdict)
+                    if mdict_key not in self.metadata_unmerged_keys:
+                        self.metadata_unmerged_keys.add(mdict_key)
+                        self.metadata_unmerged.append(mdict)
+                except TypeError:
+                    if mdict not in self.metadata_unmerged:
+                        self.metadata_unmerged.append(mdict)
         except Exception as e:
             print("Metadata Merge Error: " + str(e), format, mimetype, schema)
 
     def exclude_null(self, dt):
-        if isinstance(dt, dict):
-            return dict((k, self.exclude_null(v)) for k, v in dt.items() if v and self.exclude_null(v))
-        elif isinstance(dt, list):
-            try:
-                return list(set([self.exclude_null(v) for v in dt if v and self.exclude_null(v)]))
-            except Exception:
-                return [self.exclude_null(v) for v in dt if v and self.exclude_null(v)]
-        elif isinstance(dt, str):
-            return dt.strip()
-        else:
-            return dt
+        return MetadataCleaner.exclude_null(dt)
 
     def check_if_pid_resolves_to_landing_page(self, pid_url=None):
         if pid_url in self.pid_collector:
@@ -357,9 +358,7 @@ class MetadataHarvester:
         if isinstance(self.landing_html, str):
             if self.landing_html:
                 try:
-                    dom = lxml.html.fromstring(self.landing_html.encode("utf8"))
-                    links = dom.xpath("/*/head/link")
-                    for link in links:
+                    for link in self.get_landing_document().get_head_links():
                         source = MetadataOfferingMethods.TYPED_LINKS
                         href = link.attrib.get("href")
                         rel = link.attrib.get("rel")
@@ -597,16 +596,32 @@ class MetadataHarvester:
                 found_signposting_links.append(signposting_link_dict)
         return found_signposting_links
 
-    def raise_warning_if_javascript_page(self, response_content):
+    def get_landing_document(self, html=None):
+        """Return the parsed landing page which is shared by all extractors of embedded metadata.
+
+        Parameters
+        ----------
+        html : str | bytes, optional
+            The HTML of the landing page, default is the current landing page HTML. The HTML is only parsed
+            again in case it differs from the HTML of the current document.
+
+        Returns
+        -------
+        LandingPageDocument
+        """
+        if html is None:
+            html = self.landing_html
+        if self.landing_document is None or (
+            self.landing_document.html is not html and self.landing_document.source is not html
+        ):
+            self.landing_document = LandingPageDocument(html, self.logger)
+        return self.landing_document
+
+    def raise_warning_if_javascript_page(self, landing_document):
         # check if javascript generated content only:
         try:
-            soup = BeautifulSoup(response_content, features="html.parser")
-            script_content = soup.findAll("script")
-            for script in soup(["script", "style", "title", "noscript"]):
-                script.extract()
-
-            text_content = soup.get_text(strip=True)
-            if (len(str(script_content)) > len(str(text_content))) and len(text_content) <= 150:
+            text_content = landing_document.get_text_content()
+            if landing_document.get_script_length() > len(text_content) and len(text_content) <= 150:
                 self.logger.warning(
                     "FsF-F1-02D : Landing page seems to be JavaScript generated, could not detect enough content"
                 )
@@ -617,21 +632,14 @@ class MetadataHarvester:
         except Exception:
             pass
 
-    def clean_html_language_tag(self, response_content):
+    def clean_html_language_tag(self, landing_document):
         # avoid RDFa errors
         try:
-            langregex = r"<html\s.*lang\s*=\s*\"([^\"]+)\""
-            lm = re.search(langregex, response_content)
-            if lm:
-                lang = lm[1]
-                if not re.match(r"^[a-zA-Z]+(?:-[a-zA-Z0-9]+)*$", lang):
-                    self.logger.warning(
-                        "FsF-F1-02D : Trying to fix invalid language tag detected in HTML -: " + str(lang)
-                    )
-                    response_content = response_content.replace(lang, "en")
+            lang = landing_document.clean_language_tag()
+            if lang:
+                self.logger.warning("FsF-F1-02D : Trying to fix invalid language tag detected in HTML -: " + str(lang))
         except Exception:
             pass
-        return response_content
 
     def retrieve_metadata_embedded_extruct(self):
         # extract contents from the landing page using extruct, which returns a dict with
@@ -639,25 +647,17 @@ class MetadataHarvester:
         syntaxes = ["microdata", "opengraph", "json-ld"]
         extracted = {}
         if self.landing_html:
-            try:
-                extruct_target = self.landing_html.encode("utf-8")
-            except Exception:
-                extruct_target = self.landing_html
-                pass
-
             try:
                 self.logger.info(
                     "{} : Trying to identify EMBEDDED  Microdata, OpenGraph or Schema.org -: {}".format(
                         "FsF-F2-01M", self.landing_url
                     )
                 )
-                # remove html comments which sometimes fails in extruct...
-                try:
-                    extruct_target = re.sub("(<!--.*?-->)", "", extruct_target.decode("utf-8")).encode("utf-8")
-                except Exception:
-                    pass
-
-                extracted = extruct.extract(extruct_target, syntaxes=syntaxes, encoding="utf-8")
+                # the shared landing page tree is parsed without html comments which sometimes fail in extruct...
+                landing_tree = self.get_landing_document().tree
+                if landing_tree is None:
+                    raise ValueError("HTML could not be parsed")
+                extracted = extruct.extract(landing_tree, syntaxes=syntaxes, encoding="utf-8")
 
             except Exception as e:
                 extracted = {}
@@ -735,13 +735,15 @@ class MetadataHarvester:
             if self.landing_url not in ["https://datacite.org/invalid.html"]:
                 if response_status == 200:
                     if "html" in requestHelper.content_type:
-                        self.raise_warning_if_javascript_page(requestHelper.response_content)
+                        self.raise_warning_if_javascript_page(
+                            self.get_landing_document(requestHelper.getResponseContent())
+                        )
                     up = urlparse(self.landing_url)
                     upp = extract(self.landing_url)
                     self.landing_origin = f"{up.scheme}://{up.netloc}"
                     self.landing_domain = upp.domain + "." + upp.suffix
                     if self.is_html_page:
-                        self.landing_html = requestHelper.getResponseContent()
+                        self.landing_html = self.get_landing_document(requestHelper.getResponseContent()).html
                     self.landing_content_type = requestHelper.content_type
                     self.landing_redirect_list = requestHelper.redirect_list
                     self.landing_redirect_status_list = requestHelper.redirect_status_list
@@ -835,7 +837,7 @@ class MetadataHarvester:
                     # ========= retrieve dublin core embedded in html page =========
                     self.logger.info("FsF-F2-01M : Trying to retrieve Dublin Core metadata from html page")
                     dc_collector = MetaDataCollectorDublinCore(
-                        loggerinst=self.logger, sourcemetadata=self.landing_html, mapping=Mapper.DC_MAPPING
+                        loggerinst=self.logger, sourcemetadata=self.get_landing_document(), mapping=Mapper.DC_MAPPING
                     )
                     source_dc, dc_dict = dc_collector.parse_metadata()
                     dc_dict = self.exclude_null(dc_dict)
@@ -896,17 +898,17 @@ class MetadataHarvester:
                         rdfa_dict = {}
                         rdflib_logger = logging.getLogger("rdflib")
                         rdflib_logger.setLevel(logging.ERROR)
-                        try:
-                            rdfa_html = self.landing_html.decode("utf-8")
-                        except Exception:
-                            rdfa_html = self.landing_html
-                            pass
-                        rdfa_html = self.clean_html_language_tag(rdfa_html)
-                        rdfabuffer = io.StringIO(rdfa_html)
-                        # rdflib is no longer supporting RDFa: https://stackoverflow.com/questions/68500028/parsing-htmlrdfa-in-rdflib
-                        # https://github.com/RDFLib/rdflib/discussions/1582
-
-                        rdfa_graph = pyRdfa(media_type="text/html").graph_from_source(rdfabuffer)
+                        landing_document = self.get_landing_document()
+                        # pyRdfa is expensive, skip it for pages without RDFa attributes
+                        if landing_document.has_rdfa():
+                            self.clean_html_language_tag(landing_document)
+                            # rdflib is no longer supporting RDFa: https://stackoverflow.com/questions/68500028/parsing-htmlrdfa-in-rdflib
+                            # https://github.com/RDFLib/rdflib/discussions/1582
+                            # pyRdfa works on the DOM interface of the RDFa relevant parts of the landing page tree
+                            rdfa_graph = pyRdfa(media_type="text/html").graph_from_DOM(landing_document.get_rdfa_tree())
+                        else:
+                            self.logger.info("FsF-F2-01M : No RDFa attributes found in html page")
+                            rdfa_graph = rdflib.Graph()
                         # rdfa_graph = rdflib.Graph().parse(data=rdfa_html, format='rdfa')
                         # filter rdfagraph drop images
                         clean_rdfa_graph = rdflib.Graph()
@@ -957,7 +959,7 @@ class MetadataHarvester:
                     # ========= retrieve highwire and eprints embedded in html page =========
                     self.logger.info("FsF-F2-01M : Trying to retrieve Highwire and eprints metadata from html page")
                     hw_collector = MetaDataCollectorHighwireEprints(
-                        loggerinst=self.logger, sourcemetadata=self.landing_html
+                        loggerinst=self.logger, sourcemetadata=self.get_landing_document()
                     )
                     source_hw, hw_dict = hw_collector.parse_metadata()
                     hw_metaformat = hw_collector.metadata_format
@@ -1069,6 +1071,15 @@ class MetadataHarvester:
             )
         self.check_pidtest_repeat()
 
+    def is_content_negotiation_promising(self, target_url):
+        # skip content negotiation in case the host already answered other Accept types with its HTML page
+        if NegotiationPlanner.should_negotiate(target_url):
+            return True
+        self.logger.info(
+            "FsF-F2-01M : Skipping content negotiation, server seems to ignore the Accept header -: " + str(target_url)
+        )
+        return False
+
     def retrieve_metadata_external_rdf_negotiated(self, target_url_list=[]):
         # ========= retrieve rdf metadata namespaces by content negotiation ========
         if self.is_harvesting_method_allowed(MetadataOfferingMethods.CONTENT_NEGOTIATION):
@@ -1080,6 +1091,8 @@ class MetadataHarvester:
             # print('TARGET URLS:',target_url_list)
 
             for targeturl in target_url_list:
+                if not self.is_content_negotiation_promising(targeturl):
+                    continue
                 self.logger.info(
                     "FsF-F2-01M : Trying to retrieve RDF metadata through content negotiation from URL -: "
                     + str(targeturl)
@@ -1090,7 +1103,11 @@ class MetadataHarvester:
                     source_rdf, rdf_dict = neg_rdf_collector.parse_metadata()
                     # in case F-UJi was redirected and the landing page content negotiation doesnt return anything try the origin URL
                     if not rdf_dict:
-                        if self.origin_url is not None and self.origin_url != targeturl:
+                        if (
+                            self.origin_url is not None
+                            and self.origin_url != targeturl
+                            and self.is_content_negotiation_promising(self.origin_url)
+                        ):
                             neg_rdf_collector.target_url = self.origin_url
                             source_rdf, rdf_dict = neg_rdf_collector.parse_metadata()
                     self.namespace_uri.extend(neg_rdf_collector.getNamespaces())
@@ -1123,6 +1140,8 @@ class MetadataHarvester:
     def retrieve_metadata_external_schemaorg_negotiated(self, target_url_list=[]):
         if self.is_harvesting_method_allowed(MetadataOfferingMethods.CONTENT_NEGOTIATION):
             for target_url in target_url_list:
+                if not self.is_content_negotiation_promising(target_url):
+                    continue
                 # ========= retrieve json-ld/schema.org metadata namespaces by content negotiation ========
                 self.logger.info(
                     "FsF-F2-01M : Trying to retrieve schema.org JSON-LD metadata through content negotiation from URL -: "
@@ -1167,6 +1186,8 @@ class MetadataHarvester:
         if self.is_harvesting_method_allowed(MetadataOfferingMethods.CONTENT_NEGOTIATION):
             # print('TARGET URLS:',target_url_list)
             for target_url in target_url_list:
+                if not self.is_content_negotiation_promising(target_url):
+                    continue
                 self.logger.info(
                     "FsF-F2-01M : Trying to retrieve XML metadata through content negotiation from URL -: "
                     + str(target_url)
@@ -1267,7 +1288,11 @@ class MetadataHarvester:
                 datacite_target_url = self.pid_url
             else:
                 datacite_target_url = self.landing_url
-            if datacite_target_url:
+            if not datacite_target_url:
+                self.logger.info(
+                    "FsF-F2-01M : No target URL (PID or landing page) given, therefore Datacite metadata (json) not requested."
+                )
+            elif self.is_content_negotiation_promising(datacite_target_url):
                 dcite_collector = MetaDataCollectorDatacite(
                     mapping=Mapper.DATACITE_JSON_MAPPING, loggerinst=self.logger, pid_url=datacite_target_url
                 )
@@ -1293,14 +1318,51 @@ class MetadataHarvester:
                     )
                 else:
                     self.logger.info("FsF-F2-01M : Datacite metadata UNAVAILABLE")
-            else:
+        else:
+            self.logger.info(
+                "FsF-F2-01M : Skipped disabled harvesting method -: "
+                + str(MetadataSources.DATACITE_JSON_NEGOTIATED.value.get("label"))
+            )
+
+    def retrieve_metadata_preharvested(self):
+        if not self.preharvested_metadata:
+            return
+        if self.is_harvesting_method_allowed(MetadataOfferingMethods.METADATA_SERVICE):
+            for metadata_url, metadata_xml in self.preharvested_metadata:
                 self.logger.info(
-                    "FsF-F2-01M : No target URL (PID or landing page) given, therefore Datacite metadata (json) not requested."
+                    "FsF-F2-01M : Parsing already harvested OAI-PMH metadata record -: " + str(metadata_url)
+                )
+                oai_xml_collector = MetaDataCollectorXML(
+                    loggerinst=self.logger,
+                    target_url=metadata_url,
+                    link_type=MetadataOfferingMethods.METADATA_SERVICE,
+                    content=metadata_xml,
                 )
+                source_oai_xml, metadata_oai_dict = oai_xml_collector.parse_metadata()
+                metadata_oai_dict = self.exclude_null(metadata_oai_dict)
+                oai_namespace = "unknown xml"
+                if len(oai_xml_collector.getNamespaces()) > 0:
+                    self.namespace_uri.extend(oai_xml_collector.getNamespaces())
+                    oai_namespace = oai_xml_collector.getNamespaces()[0]
+                self.linked_namespace_uri.update(oai_xml_collector.getLinkedNamespaces())
+                if metadata_oai_dict:
+                    self.add_metadata_source(source_oai_xml)
+                    self.merge_metadata(
+                        metadata_oai_dict,
+                        metadata_url,
+                        source_oai_xml,
+                        oai_xml_collector.metadata_format,
+                        oai_xml_collector.getContentType(),
+                        oai_namespace,
+                    )
+                    self.logger.log(
+                        self.LOG_SUCCESS,
+                        "FsF-F2-01M : Found XML metadata in OAI-PMH record -: " + str(metadata_oai_dict.keys()),
+                    )
         else:
             self.logger.info(
                 "FsF-F2-01M : Skipped disabled harvesting method -: "
-                + str(MetadataSources.DATACITE_JSON_NEGOTIATED.value.get("label"))
+                + str(MetadataSources.XML_OAI_PMH.value.get("label"))
             )
 
     def get_connected_metadata_links(self):
@@ -1503,6 +1565,8 @@ class MetadataHarvester:
                     if not repeat_mode:
                         self.retrieve_metadata_external_linked_metadata()
                         self.retrieve_metadata_external_oai_ore()
+            if not repeat_mode:
+                self.retrieve_metadata_preharvested()
 
             """if self.reference_elements:
                 self.logger.debug(f"FsF-F2-01M : Reference metadata elements NOT FOUND -: {self.reference_elements}")
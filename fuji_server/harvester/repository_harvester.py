@@ -2,16 +2,322 @@
 #
 # SPDX-License-Identifier: MIT
 
+import json
+import logging
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from urllib.parse import urlencode
+
+import lxml.etree
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
+
+from fuji_server.controllers.fair_check import FAIRCheck
+from fuji_server.helper.catalogue_helper_datacite import MetaDataCatalogueDataCite
+from fuji_server.helper.identifier_helper import IdentifierHelper
+
 
 class RepositoryHarvester:
-    def __init__(self, harvester_type="oai", endpoint_url=""):
+    """Harvests the records of a repository with OAI-PMH (ListIdentifiers/ListRecords) to assess whole repositories.
+
+    Pages are requested following the resumption tokens and parsed while they are downloaded, records are yielded
+    lazily, so memory use does not grow with the size of the repository. If a checkpoint file is given, the resumption
+    token of the current page is stored, an interrupted crawl with the same parameters resumes at this page (records
+    of this page may be yielded again). The checkpoint is removed when the crawl is complete.
+    """
+
+    OAI_NAMESPACE = "http://www.openarchives.org/OAI/2.0/"
+
+    def __init__(
+        self,
+        harvester_type="oai",
+        endpoint_url="",
+        metadata_prefix="oai_dc",
+        set_spec=None,
+        from_date=None,
+        until_date=None,
+        checkpoint_path=None,
+        logger=None,
+        timeout=60,
+    ):
         self.type = harvester_type
-        self.url = endpoint_url
-        return True
+        self.url = endpoint_url.split("?")[0]
+        self.metadata_prefix = metadata_prefix
+        self.set_spec = set_spec
+        self.from_date = from_date
+        self.until_date = until_date
+        self.checkpoint_path = checkpoint_path
+        self.logger = logger or logging.getLogger(__name__)
+        self.timeout = timeout
+        self.harvested_records = []
+        self.session = requests.Session()
+        # OAI-PMH servers signal flow control with 503 and Retry-After
+        retry = Retry(
+            total=5,
+            backoff_factor=1,
+            status_forcelist=[429, 500, 502, 503, 504],
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        self.session.mount("http://", HTTPAdapter(max_retries=retry))
+        self.session.mount("https://", HTTPAdapter(max_retries=retry))
+
+    def get_element_name(self, name):
+        return "{" + self.OAI_NAMESPACE + "}" + name
+
+    def request(self, params):
+        response = self.session.get(self.url, params=params, stream=True, timeout=self.timeout)
+        response.raise_for_status()
+        # the content is decompressed while it is parsed
+        response.raw.decode_content = True
+        return response
 
     def identify(self):
-        return True
+        """Requests the Identify response of the endpoint.
 
-    def harvest(self, max_records):
-        self.harvested_records = []
-        return True
+        Returns:
+            dict: the repository name, base URL, protocol version, earliest datestamp and granularity, None if the
+            endpoint is not an OAI-PMH endpoint
+        """
+        try:
+            response = self.request({"verb": "Identify"})
+            tree = lxml.etree.fromstring(response.content, lxml.etree.XMLParser(resolve_entities=False))
+        except (requests.RequestException, lxml.etree.XMLSyntaxError) as e:
+            self.logger.warning(f"FsF-R1.3-01M : Could not identify OAI-PMH endpoint -: {e}")
+            return None
+        identify = tree.find(self.get_element_name("Identify"))
+        if identify is None:
+            self.logger.warning(f"FsF-R1.3-01M : Not a valid OAI-PMH Identify response -: {self.url}")
+            return None
+        return {
+            name: identify.findtext(self.get_element_name(name))
+            for name in ["repositoryName", "baseURL", "protocolVersion", "earliestDatestamp", "granularity"]
+        }
+
+    def get_list_params(self, verb):
+        params = {"verb": verb, "metadataPrefix": self.metadata_prefix}
+        if self.set_spec:
+            params["set"] = self.set_spec
+        if self.from_date:
+            params["from"] = self.from_date
+        if self.until_date:
+            params["until"] = self.until_date
+        return params
+
+    def load_checkpoint(self, params):
+        if not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            return None
+        with open(self.checkpoint_path) as f:
+            checkpoint = json.load(f)
+        if checkpoint.get("endpoint") != self.url or checkpoint.get("params") != params:
+            self.logger.warning("FsF-R1.3-01M : Ignoring OAI-PMH checkpoint of a different crawl")
+            return None
+        return checkpoint
+
+    def save_checkpoint(self, params, resumption_token, harvested):
+        if not self.checkpoint_path:
+            return
+        checkpoint = {
+            "endpoint": self.url,
+            "params": params,
+            "resumption_token": resumption_token,
+            "harvested": harvested,
+        }
+        temporary_path = self.checkpoint_path + ".tmp"
+        with open(temporary_path, "w") as f:
+            json.dump(checkpoint, f)
+        # replacing the file is atomic, an interrupted write does not corrupt the checkpoint
+        os.replace(temporary_path, self.checkpoint_path)
+
+    def remove_checkpoint(self):
+        if self.checkpoint_path and os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+
+    def parse_header(self, header):
+        identifier = header.findtext(self.get_element_name("identifier"))
+        return {
+            "identifier": identifier.strip() if identifier else None,
+            "datestamp": header.findtext(self.get_element_name("datestamp")),
+            "sets": [set_spec.text for set_spec in header.iter(self.get_element_name("setSpec"))],
+            "deleted": header.get("status") == "deleted",
+        }
+
+    def get_record_url(self, identifier):
+        return (
+            self.url
+            + "?"
+            + urlencode({"verb": "GetRecord", "metadataPrefix": self.metadata_prefix, "identifier": identifier})
+        )
+
+    def list(self, verb):
+        params = self.get_list_params(verb)
+        checkpoint = self.load_checkpoint(params)
+        resumption_token = None
+        harvested = 0
+        if checkpoint:
+            resumption_token = checkpoint.get("resumption_token")
+            harvested = checkpoint.get("harvested", 0)
+            self.logger.info(f"FsF-R1.3-01M : Resuming OAI-PMH crawl after {harvested} records")
+        item_tag = self.get_element_name("record" if verb == "ListRecords" else "header")
+        tags = [item_tag, self.get_element_name("resumptionToken"), self.get_element_name("error")]
+        error = None
+        while True:
+            page_params = {"verb": verb, "resumptionToken": resumption_token} if resumption_token else params
+            self.save_checkpoint(params, resumption_token, harvested)
+            response = self.request(page_params)
+            next_token = None
+            for _, element in lxml.etree.iterparse(
+                response.raw, events=("end",), tag=tags, resolve_entities=False, no_network=True
+            ):
+                if element.tag == item_tag:
+                    if verb == "ListRecords":
+                        record = self.parse_header(element.find(self.get_element_name("header")))
+                        metadata = element.find(self.get_element_name("metadata"))
+                        record["metadata"] = None
+                        if metadata is not None and len(metadata):
+                            record["metadata"] = lxml.etree.tostring(metadata[0])
+                    else:
+                        record = self.parse_header(element)
+                    if record["identifier"]:
+                        record["url"] = self.get_record_url(record["identifier"])
+                        harvested += 1
+                        yield record
+                elif element.tag == self.get_element_name("resumptionToken"):
+                    next_token = (element.text or "").strip() or None
+                else:
+                    code = element.get("code")
+                    if code == "badResumptionToken" and checkpoint and resumption_token:
+                        self.logger.warning("FsF-R1.3-01M : OAI-PMH resumption token expired, restarting the crawl")
+                        checkpoint = None
+                        harvested = 0
+                        next_token = ""
+                    elif code != "noRecordsMatch":
+                        error = f"{code}: {element.text}"
+                # parsed elements are not needed anymore
+                element.clear()
+                while element.getprevious() is not None:
+                    del element.getparent()[0]
+            response.close()
+            if error is not None:
+                # the checkpoint is kept, the crawl can be resumed
+                self.logger.warning(f"FsF-R1.3-01M : OAI-PMH crawl stopped after error -: {error}")
+                return
+            if next_token is None:
+                break
+            resumption_token = next_token or None
+        self.remove_checkpoint()
+        self.logger.info(f"FsF-R1.3-01M : Harvested {harvested} records from OAI-PMH endpoint -: {self.url}")
+
+    def list_identifiers(self):
+        """Lists the record headers of the repository with ListIdentifiers.
+
+        Yields:
+            dict: the identifier, datestamp, sets, deleted status and GetRecord url of each record
+        """
+        return self.list("ListIdentifiers")
+
+    def list_records(self):
+        """Lists the records of the repository with ListRecords.
+
+        Yields:
+            dict: the header fields of each record as in list_identifiers and the serialized metadata element
+        """
+        return self.list("ListRecords")
+
+    def harvest(self, max_records=None):
+        self.harvested_records = list(islice(self.list_records(), max_records))
+        return self.harvested_records
+
+    def get_assessment_target(self, record):
+        """Returns the identifier to assess, the first identifier (URL or DOI) in the record metadata, otherwise the
+        OAI identifier.
+
+        Args:
+            record (dict): a harvested record
+
+        Returns:
+            str: the identifier
+        """
+        if record.get("metadata"):
+            metadata = lxml.etree.fromstring(record["metadata"], lxml.etree.XMLParser(resolve_entities=False))
+            for element in metadata.iter("{*}identifier"):
+                value = (element.text or "").strip()
+                if value.lower().startswith(("http://", "https://", "doi:", "10.")):
+                    return value
+        return record["identifier"]
+
+    def create_fair_check(self, record, **kwargs):
+        """Creates a FAIRCheck for a harvested record, the record metadata is used as an already harvested
+        metadata source.
+
+        Args:
+            record (dict): a harvested record
+            **kwargs: further arguments of FAIRCheck, e.g. metric_version
+
+        Returns:
+            FAIRCheck: the assessment of the record
+        """
+        fair_check = FAIRCheck(
+            uid=self.get_assessment_target(record),
+            metadata_service_url=self.url,
+            metadata_service_type="oai_pmh",
+            **kwargs,
+        )
+        if record.get("metadata"):
+            fair_check.add_preharvested_metadata(record["metadata"], record["url"])
+        return fair_check
+
+    def prefetch_catalogue_listing(self, records):
+        """Looks up the DOIs of a batch of records in the DataCite catalogue at once, the assessments of the records
+        then use the cached listing status.
+
+        Args:
+            records (list): harvested records
+        """
+        dois = []
+        for record in records:
+            try:
+                pidhelper = IdentifierHelper(self.get_assessment_target(record))
+            except lxml.etree.XMLSyntaxError:
+                continue
+            if pidhelper.preferred_schema == "doi" and pidhelper.normalized_id:
+                dois.append(pidhelper.normalized_id)
+        if dois:
+            MetaDataCatalogueDataCite.prefetch(dois, self.logger)
+
+    def assess(self, assess_record, records=None, max_workers=4, prefetch_listing=True):
+        """Assesses records concurrently while they are harvested, at most twice as many records as workers are
+        harvested ahead of the assessments.
+
+        Args:
+            assess_record (callable): assesses a record, e.g. by running the metrics on create_fair_check(record)
+            records (iterable): the records to assess, by default the records of list_records()
+            max_workers (int): the number of concurrent assessments
+            prefetch_listing (bool): look up the DataCite listing of each batch of harvested records at once
+
+        Yields:
+            tuple: each record (in harvesting order) and its assessment result, None if the assessment failed
+        """
+        records = iter(self.list_records() if records is None else records)
+        pending = deque()
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for batch in iter(lambda: list(islice(records, 2 * max_workers)), []):
+                batch = [record for record in batch if not record.get("deleted")]
+                if prefetch_listing:
+                    self.prefetch_catalogue_listing(batch)
+                for record in batch:
+                    pending.append((record, executor.submit(assess_record, record)))
+                    if len(pending) >= 2 * max_workers:
+                        yield self.get_assessment(*pending.popleft())
+            while pending:
+                yield self.get_assessment(*pending.popleft())
+
+    def get_assessment(self, record, future):
+        try:
+            return record, future.result()
+        except Exception as e:
+            self.logger.warning(f"FsF-R1.3-01M : Assessment of record failed -: {record.get('identifier')}: {e}")
+            return record, None
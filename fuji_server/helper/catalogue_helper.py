@@ -4,6 +4,9 @@
 
 import enum
 import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from fuji_server.helper.catalogue_listing_cache import CatalogueListingCache
 
 
 class MetaDataCatalogue:
@@ -21,9 +24,17 @@ class MetaDataCatalogue:
         Class method to return Sources
     query(pid)
         Method to access the metadata catalog given a parameter of PID
+    lookup(pid)
+        Method to look up if a PID is listed in the metadata catalog
+    query_listed(pids)
+        Method to return the (cached) listing status of PIDs, PIDs which are not cached are looked up concurrently
+    prefetch(pids, logger)
+        Class method to look up the PIDs of a batch of records at once
     """
 
     apiURI = None
+    # maximum number of concurrent catalogue requests
+    max_workers = 8
 
     # Using enum class create enumerations of metadata catalogs
 
@@ -62,3 +73,65 @@ class MetaDataCatalogue:
         """
         response = None
         return response
+
+    def lookup(self, pid):
+        """Method to look up if a PID is listed in the metadata catalog
+        Parameters
+        ----------
+        pid:str
+            Persistence Identifier
+
+        Returns
+        -------
+        bool
+            True if listed, False if not listed, None if the catalog could not be queried
+        """
+        return None
+
+    def query_listed(self, pids):
+        """Method to return the listing status of PIDs, the cached status is used and the other PIDs are looked up
+        concurrently, failed lookups are not cached
+        Parameters
+        ----------
+        pids:list
+            A list of PIDs
+
+        Returns
+        -------
+        dict
+            The listing status (True, False or None if the lookup failed) by PID
+        """
+        pids = list(dict.fromkeys(pid for pid in pids if pid))
+        status = CatalogueListingCache.get_many(self.source, pids)
+        for pid, listed in status.items():
+            self.logger.info(
+                "FsF-F4-01M : Cached {} status in {} -:{}".format(
+                    "listed" if listed else "not listed", self.source, pid
+                )
+            )
+        missing = [pid for pid in pids if pid not in status]
+        if missing:
+            with ThreadPoolExecutor(max_workers=min(len(missing), self.max_workers)) as executor:
+                for pid, listed in zip(missing, executor.map(self.lookup, missing)):
+                    if listed is not None:
+                        CatalogueListingCache.put(self.source, pid, listed)
+                    status[pid] = listed
+        return status
+
+    @classmethod
+    def prefetch(cls, pids, logger: logging.Logger | None = None):
+        """Class method to look up the PIDs of a batch of records at once, the assessments of the records then use
+        the cached listing status
+        Parameters
+        ----------
+        pids:list
+            The PIDs of all records
+        logger: logging.Logger, optional
+            Logger instance, default is the module logger
+
+        Returns
+        -------
+        dict
+            The listing status by PID
+        """
+        return cls(logger or logging.getLogger(__name__)).query_listed(pids)
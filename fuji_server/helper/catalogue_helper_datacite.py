@@ -22,6 +22,8 @@ class MetaDataCatalogueDataCite(MetaDataCatalogue):
     -------
     query(pid)
         Method to check whether the metadata given by PID is listed in Datacite
+    lookup(pid)
+        Method to query the DataCite API for a PID
     """
 
     islisted = False
@@ -50,17 +52,33 @@ class MetaDataCatalogueDataCite(MetaDataCatalogue):
             session response
         """
         response = None
+        if pid:
+            self.islisted = bool(self.query_listed([pid]).get(pid))
+        return response
+
+    def lookup(self, pid):
+        """Method to query the DataCite API for a PID
+        Parameters
+        ----------
+        pid:str
+            A PID
+
+        Returns
+        -------
+        bool
+            True if listed, False if not listed, None if the API is not available
+        """
         try:
             res = requests.get(self.apiURI + "/" + pid, timeout=5)
             self.logger.info("FsF-F4-01M : Querying DataCite API for -:" + str(pid))
             if res.status_code == 200:
-                self.islisted = True
                 self.logger.info("FsF-F4-01M : Found identifier in DataCite catalogue -:" + str(pid))
+                return True
             elif res.status_code == 404:
                 self.logger.info("FsF-F4-01M : Identifier not listed in DataCite catalogue -:" + str(pid))
+                return False
             else:
                 self.logger.error("FsF-F4-01M : DataCite API not available -:" + str(res.status_code))
         except Exception as e:
             self.logger.error("FsF-F4-01M : DataCite API not available or returns errors -:" + str(e))
-
-        return response
+        return None
@@ -6,6 +6,8 @@ import logging
 import os
 import re
 import sqlite3 as sl
+import threading
+from pathlib import Path
 from random import randint
 from time import sleep
 
@@ -15,6 +17,7 @@ from bs4 import BeautifulSoup
 
 from fuji_server.helper.catalogue_helper import MetaDataCatalogue
 from fuji_server.helper.preprocessor import Preprocessor
+from fuji_server.helper.uri_bloom_filter import UriBloomFilter
 
 
 class MetaDataCatalogueGoogleDataSearch(MetaDataCatalogue):
@@ -29,31 +32,118 @@ class MetaDataCatalogueGoogleDataSearch(MetaDataCatalogue):
     -------
     query(pid)
         Method to check whether the metadata given by PID is listed in Google Data Search
+    lookup_cache(uris)
+        Method to return the URIs which are listed in the Google Dataset Search cache DB
     create_list(google_cache_file)
     create_cache_db(google_cache_file)
+    create_bloom_filter(error_rate)
+        Method to create the Bloom filter of the URIs in the cache DB
     random_sample(limit)
 
+    The cache DB is opened read-only once per process and shared by all assessments. If a Bloom filter of the cache
+    (google_cache.bloom next to the DB) exists, it is loaded memory mapped and URIs which are not in the filter are
+    not looked up in the DB. Records added to the DB after the filter was built are read once when the filter is
+    loaded and kept in memory.
     """
 
     # apiURI = 'https://api.datacite.org/dois'
+    _connections = {}
+    _bloom_filters = {}
+    _added_uris = {}
+    _lock = threading.Lock()
+
     def __init__(self, logger: logging.Logger | None = None, object_type=None):
         self.islisted = False
 
         self.logger = logger
         self.source = self.getEnumSourceNames().GOOGLE_DATASET.value
         self.google_cache_db_path = os.path.join(Preprocessor.fuji_server_dir, "data", "google_cache.db")
+        self.google_cache_bloom_path = os.path.splitext(self.google_cache_db_path)[0] + ".bloom"
 
         self.google_custom_search_id = Preprocessor.google_custom_search_id
         self.google_custom_search_api_key = Preprocessor.google_custom_search_api_key
         self.object_type = object_type
 
+    def get_connection(self):
+        """Return the shared read-only connection to the cache DB"""
+        connection = MetaDataCatalogueGoogleDataSearch._connections.get(self.google_cache_db_path)
+        if connection is None:
+            connection = sl.connect(
+                Path(self.google_cache_db_path).resolve().as_uri() + "?mode=ro", uri=True, check_same_thread=False
+            )
+            MetaDataCatalogueGoogleDataSearch._connections[self.google_cache_db_path] = connection
+        return connection
+
+    def get_bloom_filter(self):
+        """Return the Bloom filter of the cache DB, None if there is none. Must be called with the lock held."""
+        if self.google_cache_db_path not in MetaDataCatalogueGoogleDataSearch._bloom_filters:
+            bloom_filter = None
+            added_uris = set()
+            if os.path.exists(self.google_cache_bloom_path):
+                try:
+                    bloom_filter = UriBloomFilter.load(self.google_cache_bloom_path)
+                    # records added (e.g. by custom search matches) after the filter was built
+                    added_uris = {
+                        uri.lower()
+                        for (uri,) in self.get_connection().execute(
+                            "SELECT uri FROM google_links WHERE rowid > ?", (bloom_filter.max_rowid,)
+                        )
+                        if uri
+                    }
+                except (OSError, ValueError, sl.Error) as e:
+                    bloom_filter = None
+                    if self.logger:
+                        self.logger.warning("FsF-F4-01M : Google Search Cache Bloom filter not usable -:" + str(e))
+            MetaDataCatalogueGoogleDataSearch._bloom_filters[self.google_cache_db_path] = bloom_filter
+            MetaDataCatalogueGoogleDataSearch._added_uris[self.google_cache_db_path] = added_uris
+        return MetaDataCatalogueGoogleDataSearch._bloom_filters[self.google_cache_db_path]
+
+    @classmethod
+    def reset_cache(cls):
+        """Close the shared connections and unload the Bloom filters, e.g. after the cache DB has been rebuilt"""
+        with cls._lock:
+            for connection in cls._connections.values():
+                connection.close()
+            cls._connections = {}
+            cls._bloom_filters = {}
+            cls._added_uris = {}
+
+    def lookup_cache(self, uris):
+        """Method to return the URIs which are listed in the Google Dataset Search cache DB
+        Parameters
+        ----------
+        uris:list
+            Lower case URIs
+
+        Returns
+        -------
+        list
+            The listed URIs (lower case)
+        """
+        with MetaDataCatalogueGoogleDataSearch._lock:
+            bloom_filter = self.get_bloom_filter()
+            if bloom_filter is not None:
+                added_uris = MetaDataCatalogueGoogleDataSearch._added_uris[self.google_cache_db_path]
+                uris = [uri for uri in uris if uri in bloom_filter or uri in added_uris]
+            if not uris:
+                return []
+            return [
+                uri
+                for (uri,) in self.get_connection().execute(
+                    "SELECT LOWER(uri) FROM google_links WHERE uri IN (" + ", ".join("?" * len(uris)) + ")", uris
+                )
+            ]
+
     def random_sample(self, limit):
         sample = []
         try:
-            con = sl.connect(self.google_cache_db_path)
-            with con:
-                samplef = pd.read_sql_query("SELECT uri FROM google_links ORDER BY RANDOM() LIMIT " + str(limit), con)
-                sample = samplef["uri"].values.tolist()
+            with MetaDataCatalogueGoogleDataSearch._lock:
+                samplef = pd.read_sql_query(
+                    "SELECT uri FROM google_links ORDER BY RANDOM() LIMIT ?",
+                    self.get_connection(),
+                    params=(int(limit),),
+                )
+            sample = samplef["uri"].values.tolist()
         except Exception as e:
             print(e)
         return sample
@@ -69,16 +159,7 @@ class MetaDataCatalogueGoogleDataSearch(MetaDataCatalogue):
             )
         else:
             try:
-                con = sl.connect(self.google_cache_db_path)
-                with con:
-                    dbquery = (
-                        "SELECT LOWER(uri) FROM google_links where uri IN("
-                        + ", ".join(f"'{str(pid).lower()}'" for pid in pidlist)
-                        + ")"
-                    )
-
-                    dbres = con.execute(dbquery)
-                    found_google_links = dbres.fetchall()
+                found_google_links = self.lookup_cache(list(dict.fromkeys(str(pid).lower() for pid in pidlist)))
             except Exception as e:
                 self.logger.warning("FsF-F4-01M : Google Search Cache DB Query Error: -:" + str(e))
 
@@ -99,37 +180,119 @@ class MetaDataCatalogueGoogleDataSearch(MetaDataCatalogue):
                     break"""
 
         if self.islisted:
-            self.logger.info(
-                "FsF-F4-01M : Found identifier in Google Dataset Search cache -:" + str(found_google_links)
-            )
+            self.logger.info("FsF-F4-01M : Found identifier in Google Dataset Search cache -:%s", found_google_links)
         else:
-            self.logger.info("FsF-F4-01M : Identifier not listed in Google Dataset Search cache -:" + str(pidlist))
+            self.logger.info("FsF-F4-01M : Identifier not listed in Google Dataset Search cache -:%s", pidlist)
 
         return response
 
-    def create_cache_db(self, google_cache_file):
-        gs = pd.read_csv(google_cache_file)
-        # google_cache_db_path = os.path.join(Preprocessor.fuji_server_dir, 'data','google_cache.db')
+    def create_cache_db(self, google_cache_file, chunk_size=500000, bloom_filter_error_rate=0.001):
+        """Method to create the cache DB from the Dataset Search corpus file (CSV with url and doi columns)
+
+        The corpus is read in chunks, the URIs are normalized (trimmed, lower case) and staged in a separate DB
+        file, duplicates are removed by SQLite while copying them into the new DB (sorted, spilling to disk) and the
+        unique index is created afterwards. The new DB replaces the cache DB when it is complete, finally the Bloom
+        filter used at query time is created.
+        Parameters
+        ----------
+        google_cache_file:str
+            Path of the corpus CSV file
+        chunk_size:int, optional
+            Number of CSV rows read and inserted at once, default is 500000
+        bloom_filter_error_rate:float, optional
+            False positive rate of the Bloom filter, None to not create the filter, default is 0.001
+
+        Returns
+        -------
+        int
+            The number of URIs in the cache DB
+        """
+        build_path = self.google_cache_db_path + ".build"
+        staging_path = self.google_cache_db_path + ".staging"
+        os.makedirs(os.path.dirname(os.path.abspath(self.google_cache_db_path)), exist_ok=True)
+        for path in (build_path, staging_path):
+            if os.path.exists(path):
+                os.remove(path)
+        con = sl.connect(build_path)
+        try:
+            # the DBs are only used once they are complete, no journal is needed
+            con.execute("PRAGMA journal_mode = OFF")
+            con.execute("PRAGMA synchronous = OFF")
+            con.execute("ATTACH DATABASE ? AS staging", (staging_path,))
+            con.execute("PRAGMA staging.journal_mode = OFF")
+            con.execute("CREATE TABLE staging.uris (uri TEXT)")
+            for chunk in pd.read_csv(google_cache_file, usecols=["url", "doi"], dtype=str, chunksize=chunk_size):
+                uris = pd.concat([chunk["url"], chunk["doi"]]).dropna().str.strip().str.lower()
+                with con:
+                    con.executemany("INSERT INTO staging.uris VALUES (?)", ((uri,) for uri in uris if uri))
+            con.execute("CREATE TABLE google_links (uri TEXT, source INTEGER)")
+            with con:
+                con.execute("INSERT INTO google_links SELECT DISTINCT uri, 0 FROM staging.uris ORDER BY uri")
+            con.execute("DETACH DATABASE staging")
+            con.execute("CREATE UNIQUE INDEX google_uri_index ON google_links (uri)")
+            count = con.execute("SELECT COUNT(*) FROM google_links").fetchone()[0]
+        except BaseException:
+            con.close()
+            os.remove(build_path)
+            raise
+        finally:
+            con.close()
+            if os.path.exists(staging_path):
+                os.remove(staging_path)
+        os.replace(build_path, self.google_cache_db_path)
+        # a Bloom filter of the previous DB must not be used
+        if os.path.exists(self.google_cache_bloom_path):
+            os.remove(self.google_cache_bloom_path)
+        MetaDataCatalogueGoogleDataSearch.reset_cache()
+        if bloom_filter_error_rate:
+            self.create_bloom_filter(bloom_filter_error_rate)
+        return count
+
+    def create_bloom_filter(self, error_rate=0.001):
+        """Method to create the Bloom filter of the URIs in the cache DB, it is saved next to the DB
+        Parameters
+        ----------
+        error_rate:float, optional
+            The false positive rate of the filter, default is 0.001
+
+        Returns
+        -------
+        UriBloomFilter
+            The Bloom filter
+        """
         con = sl.connect(self.google_cache_db_path)
-        gf = pd.DataFrame(pd.concat([gs["url"], gs["doi"]]), columns=["uri"]).drop_duplicates()
-        gf["source"] = 0
-        gf.to_sql("google_links", con, if_exists="replace", index=False)
-        with con:
-            con.execute("CREATE INDEX google_uri_index ON google_links (uri) ")
-        con.close()
+        try:
+            max_rowid, count = con.execute("SELECT MAX(rowid), COUNT(*) FROM google_links").fetchone()
+            bloom_filter = UriBloomFilter.for_capacity(count, error_rate)
+            bloom_filter.max_rowid = max_rowid if max_rowid is not None else -1
+            for (uri,) in con.execute("SELECT uri FROM google_links WHERE rowid <= ?", (bloom_filter.max_rowid,)):
+                if uri:
+                    bloom_filter.add(uri.lower())
+        finally:
+            con.close()
+        bloom_filter.save(self.google_cache_bloom_path)
+        MetaDataCatalogueGoogleDataSearch.reset_cache()
+        return bloom_filter
 
     def add_google_search_record(self, url_to_save, source=1):
         # three sourced (int) : 0 = from kaggle file, 1 = from custom search match, 2 = google search (scraped)
-        con = sl.connect(self.google_cache_db_path)
         try:
+            con = sl.connect(self.google_cache_db_path)
             with con:
-                con.execute("INSERT INTO google_links (uri, source) values ('" + str(url_to_save) + "',1)")
-            return
+                # URIs are looked up in lower case
+                con.execute(
+                    "INSERT OR IGNORE INTO google_links (uri, source) values (?, ?)", (str(url_to_save).lower(), source)
+                )
+            con.close()
+            with MetaDataCatalogueGoogleDataSearch._lock:
+                # the Bloom filter does not contain the new record
+                if MetaDataCatalogueGoogleDataSearch._bloom_filters.get(self.google_cache_db_path) is not None:
+                    MetaDataCatalogueGoogleDataSearch._added_uris[self.google_cache_db_path].add(
+                        str(url_to_save).lower()
+                    )
+            return True
         except Exception as e:
             print("GOOGLE CACHE INSERT FAILED", e)
-        con.close()
-        return True
-        ##test
 
     def query_google_webindex(self, url_to_test, pidlist):
         url_to_test = str(url_to_test).strip()
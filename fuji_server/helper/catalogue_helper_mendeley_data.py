@@ -22,6 +22,8 @@ class MetaDataCatalogueMendeleyData(MetaDataCatalogue):
     -------
     query(pidlist)
         Method to check whether the metadata given by PID is listed in Mendeley Data
+    lookup(pid)
+        Method to query the Mendeley Data API for a PID
     """
 
     islisted = False
@@ -44,32 +46,37 @@ class MetaDataCatalogueMendeleyData(MetaDataCatalogue):
             session response
         """
         response = None
-        for pid in pidlist:
-            try:
-                if pid:
-                    res = requests.get(self.apiURI + "/" + requests.utils.quote(str(pid)), timeout=1)
-                    self.logger.info("FsF-F4-01M : Querying Mendeley Data API for -:" + str(pid))
-                    if res.status_code == 200:
-                        resp = res.json()
-                        if resp.get("results"):
-                            for result in resp.get("results"):
-                                if (
-                                    str(pid).lower() == str(result.get("doi")).lower()
-                                    or str(pid).lower() == str(result.get("containerURI")).lower()
-                                ):
-                                    self.islisted = True
-                                    self.logger.info(
-                                        "FsF-F4-01M : Found identifier in Mendeley Data catalogue -:" + str(pid)
-                                    )
-                                    break
-                            if not self.islisted:
-                                self.logger.info(
-                                    "FsF-F4-01M : Identifier not listed in Mendeley Data catalogue -:" + str(pid)
-                                )
+        self.islisted = any(self.query_listed(pidlist).values())
+        return response
 
-                    else:
-                        self.logger.error("FsF-F4-01M : Mendeley Data API not available -:" + str(res.status_code))
-            except Exception as e:
-                self.logger.error("FsF-F4-01M : Mendeley Data API not available or returns errors: " + str(e))
+    def lookup(self, pid):
+        """Method to query the Mendeley Data API for a PID
+        Parameters
+        ----------
+        pid:str
+            A PID
 
-        return response
+        Returns
+        -------
+        bool
+            True if listed, False if not listed, None if the API is not available
+        """
+        try:
+            res = requests.get(self.apiURI + "/" + requests.utils.quote(str(pid)), timeout=1)
+            self.logger.info("FsF-F4-01M : Querying Mendeley Data API for -:" + str(pid))
+            if res.status_code == 200:
+                resp = res.json()
+                for result in resp.get("results") or []:
+                    if (
+                        str(pid).lower() == str(result.get("doi")).lower()
+                        or str(pid).lower() == str(result.get("containerURI")).lower()
+                    ):
+                        self.logger.info("FsF-F4-01M : Found identifier in Mendeley Data catalogue -:" + str(pid))
+                        return True
+                self.logger.info("FsF-F4-01M : Identifier not listed in Mendeley Data catalogue -:" + str(pid))
+                return False
+            else:
+                self.logger.error("FsF-F4-01M : Mendeley Data API not available -:" + str(res.status_code))
+        except Exception as e:
+            self.logger.error("FsF-F4-01M : Mendeley Data API not available or returns errors: " + str(e))
+        return None
@@ -0,0 +1,95 @@
+# SPDX-FileCopyrightText: 2020 PANGAEA (https://www.pangaea.de/)
+#
+# SPDX-License-Identifier: MIT
+
+import time
+
+from fuji_server.helper.sqlite_cache import ExpiringSQLiteCache
+
+
+class CatalogueListingCache(ExpiringSQLiteCache):
+    """
+    A class which caches if identifiers are listed in metadata catalogues (e.g. DataCite, Mendeley Data), so mass
+    assessments do not query the catalogue APIs again for identifiers which have been looked up recently.
+
+    Entries are keyed by catalogue and (lower case) identifier. Identifiers which are not listed are cached with a
+    shorter time to live (negative caching), failed lookups are not cached. The cache is stored in a SQLite database
+    (in memory unless a database path has been set), expired entries are removed when new entries are stored.
+
+    Methods
+    -------
+    get_many(source, pids)
+        Return the cached listing status of identifiers.
+    put(source, pid, listed)
+        Cache the listing status of an identifier.
+    set_db_path(db_path)
+        Set the path of the cache database.
+    set_ttl(ttl, negative_ttl)
+        Set the seconds to keep the status of listed and not listed identifiers.
+    """
+
+    SCHEMA = [
+        "CREATE TABLE IF NOT EXISTS listing (source TEXT, pid TEXT, listed INTEGER, expires REAL, "
+        "PRIMARY KEY (source, pid))"
+    ]
+    TABLES = ["listing"]
+    ttl = 604800
+    negative_ttl = 86400
+
+    @classmethod
+    def get_many(cls, source, pids):
+        """Return the cached listing status of identifiers.
+
+        Parameters
+        ----------
+        source : str
+            The catalogue, e.g. 'DataCite Registry'
+        pids : list
+            The identifiers
+
+        Returns
+        -------
+        dict
+            The listing status (bool) by identifier, identifiers which are not cached or expired are missing
+        """
+        keys = {str(pid).lower(): pid for pid in pids}
+        now = time.time()
+        rows = []
+        key_list = list(keys)
+        with cls._lock:
+            connection = cls.get_connection()
+            # the number of query parameters is limited, large batches are queried in chunks
+            for start in range(0, len(key_list), 500):
+                chunk = key_list[start : start + 500]
+                rows.extend(
+                    connection.execute(
+                        "SELECT pid, listed FROM listing WHERE source = ? AND expires > ? "
+                        f"AND pid IN ({', '.join('?' * len(chunk))})",
+                        (source, now, *chunk),
+                    ).fetchall()
+                )
+        return {keys[key]: bool(listed) for key, listed in rows}
+
+    @classmethod
+    def put(cls, source, pid, listed):
+        """Cache the listing status of an identifier, identifiers which are not listed expire after the negative
+        time to live.
+
+        Parameters
+        ----------
+        source : str
+            The catalogue, e.g. 'DataCite Registry'
+        pid : str
+            The identifier
+        listed : bool
+            True if the identifier is listed in the catalogue
+        """
+        now = time.time()
+        expires = now + (cls.ttl if listed else cls.negative_ttl)
+        with cls._lock:
+            connection = cls.get_connection()
+            connection.execute("DELETE FROM listing WHERE expires <= ?", (now,))
+            connection.execute(
+                "INSERT OR REPLACE INTO listing VALUES (?, ?, ?, ?)", (source, str(pid).lower(), int(listed), expires)
+            )
+            connection.commit()
@@ -2,19 +2,51 @@
 #
 # SPDX-License-Identifier: MIT
 
+"""
+Create the Google Dataset Search cache DB (data/google_cache.db) and its Bloom filter used to evaluate FsF-F4-01M.
+
+Step 1 visit: https://www.kaggle.com/googleai/dataset-search-metadata-for-datasets
+Step 2 download the latest Dataset Search corpus file
+Step 3 run python -m fuji_server.helper.create_google_cache_db <corpus file>
+"""
+
+import argparse
+import os
+import time
+
 from fuji_server.helper.catalogue_helper_google_datasearch import MetaDataCatalogueGoogleDataSearch
 
-g = MetaDataCatalogueGoogleDataSearch()
 
-# Step 1 visit: https://www.kaggle.com/googleai/dataset-search-metadata-for-datasets
-# Step 2 download the latest Dataset Search corpus file
-# Step 3 indicate the location of the file below
-google_file_location = "C:\\Users\\Robert\\Documents\\dataset_metadata_2020_10_16.csv"
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Create the Google Dataset Search cache DB from the corpus CSV file.")
+    parser.add_argument("corpus_file", help="the Dataset Search corpus file (CSV with url and doi columns)")
+    parser.add_argument("--db", help="path of the cache DB, default is the google_cache.db of the data directory")
+    parser.add_argument(
+        "--chunk-size", type=int, default=500000, help="number of CSV rows processed at once (default: %(default)s)"
+    )
+    parser.add_argument(
+        "--error-rate",
+        type=float,
+        default=0.001,
+        help="false positive rate of the Bloom filter (default: %(default)s)",
+    )
+    parser.add_argument("--no-bloom-filter", action="store_true", help="do not create the Bloom filter")
+    args = parser.parse_args(argv)
+
+    google_cache = MetaDataCatalogueGoogleDataSearch()
+    if args.db:
+        google_cache.google_cache_db_path = os.path.abspath(args.db)
+        google_cache.google_cache_bloom_path = os.path.splitext(google_cache.google_cache_db_path)[0] + ".bloom"
+    print("Starting to create Google Dataset Search DB -:", google_cache.google_cache_db_path)
+    tic = time.perf_counter()
+    count = google_cache.create_cache_db(
+        args.corpus_file,
+        chunk_size=args.chunk_size,
+        bloom_filter_error_rate=None if args.no_bloom_filter else args.error_rate,
+    )
+    print(f"Finished, {count} URIs in {time.perf_counter() - tic:.1f} s")
+    return 0
+
 
-# Step 4 run the script
-if google_file_location is not None:
-    print("Starting to create Google Dataset Search DB")
-    g.create_cache_db(google_file_location)
-    print("Finished...")
-else:
-    print("No google_file_location provided, FUJI is not properly installed.")
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,142 @@
+# SPDX-FileCopyrightText: 2020 PANGAEA (https://www.pangaea.de/)
+#
+# SPDX-License-Identifier: MIT
+
+import json
+import threading
+import time
+
+from fuji_server.helper.sqlite_cache import ExpiringSQLiteCache
+
+
+class EndpointCapabilityCache(ExpiringSQLiteCache):
+    """
+    A class which caches the capabilities of metadata service endpoints (OAI-PMH, OGC CSW, SPARQL), so the records of
+    one repository do not query and parse the same endpoint listing for every assessment.
+
+    Entries are keyed by service type and endpoint URL and hold the parsed metadata standards and namespaces of the
+    endpoint. Endpoints which could not be queried or returned an invalid response are cached as unavailable with a
+    shorter time to live (negative caching). The cache is stored in a SQLite database (in memory unless a database
+    path has been set), expired entries are removed when new entries are stored.
+
+    Methods
+    -------
+    get(service, endpoint)
+        Return the cached capabilities of an endpoint.
+    put(service, endpoint, capability)
+        Cache the capabilities of an endpoint.
+    get_or_retrieve(service, endpoint, retrieve)
+        Return the cached capabilities of an endpoint, retrieve them once if not cached.
+    set_db_path(db_path)
+        Set the path of the cache database.
+    set_ttl(ttl, negative_ttl)
+        Set the seconds to keep the capabilities of available and unavailable endpoints.
+    """
+
+    SCHEMA = [
+        "CREATE TABLE IF NOT EXISTS capability (service TEXT, endpoint TEXT, available INTEGER, "
+        "standards TEXT, namespaces TEXT, expires REAL, PRIMARY KEY (service, endpoint))"
+    ]
+    TABLES = ["capability"]
+    ttl = 86400
+    negative_ttl = 3600
+    # (service, endpoint) -> [lock, number of waiting retrievals], removed once no retrieval is waiting
+    _endpoint_locks = {}
+
+    @classmethod
+    def get(cls, service, endpoint):
+        """Return the cached capabilities of an endpoint.
+
+        Parameters
+        ----------
+        service : str
+            The service type, e.g. 'oai-pmh', 'csw' or 'sparql'
+        endpoint : str
+            The endpoint URL
+
+        Returns
+        -------
+        dict
+            The capabilities with available, standards and namespaces, None if not cached or expired
+        """
+        with cls._lock:
+            row = (
+                cls.get_connection()
+                .execute(
+                    "SELECT available, standards, namespaces FROM capability WHERE service = ? AND endpoint = ? "
+                    "AND expires > ?",
+                    (service, endpoint, time.time()),
+                )
+                .fetchone()
+            )
+        if row is None:
+            return None
+        return {"available": bool(row[0]), "standards": json.loads(row[1]), "namespaces": json.loads(row[2])}
+
+    @classmethod
+    def put(cls, service, endpoint, capability):
+        """Cache the capabilities of an endpoint, unavailable endpoints expire after the negative time to live.
+
+        Parameters
+        ----------
+        service : str
+            The service type, e.g. 'oai-pmh', 'csw' or 'sparql'
+        endpoint : str
+            The endpoint URL
+        capability : dict
+            The capabilities with available, standards (dict) and namespaces (list)
+        """
+        available = bool(capability.get("available"))
+        now = time.time()
+        expires = now + (cls.ttl if available else cls.negative_ttl)
+        with cls._lock:
+            connection = cls.get_connection()
+            connection.execute("DELETE FROM capability WHERE expires <= ?", (now,))
+            connection.execute(
+                "INSERT OR REPLACE INTO capability VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    service,
+                    endpoint,
+                    int(available),
+                    json.dumps(capability.get("standards") or {}),
+                    json.dumps(capability.get("namespaces") or []),
+                    expires,
+                ),
+            )
+            connection.commit()
+
+    @classmethod
+    def get_or_retrieve(cls, service, endpoint, retrieve):
+        """Return the cached capabilities of an endpoint, if not cached they are retrieved and cached. Concurrent
+        assessments wait for a running retrieval of the same endpoint instead of querying it again.
+
+        Parameters
+        ----------
+        service : str
+            The service type, e.g. 'oai-pmh', 'csw' or 'sparql'
+        endpoint : str
+            The endpoint URL
+        retrieve : callable
+            Queries the endpoint and returns the capabilities with available, standards and namespaces
+
+        Returns
+        -------
+        dict
+            The capabilities with available, standards and namespaces
+        """
+        key = (service, endpoint)
+        with cls._lock:
+            endpoint_lock = cls._endpoint_locks.setdefault(key, [threading.Lock(), 0])
+            endpoint_lock[1] += 1
+        try:
+            with endpoint_lock[0]:
+                capability = cls.get(service, endpoint)
+                if capability is None:
+                    capability = retrieve()
+                    cls.put(service, endpoint, capability)
+        finally:
+            with cls._lock:
+                endpoint_lock[1] -= 1
+                if not endpoint_lock[1]:
+                    del cls._endpoint_locks[key]
+        return capability
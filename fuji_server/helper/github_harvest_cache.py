@@ -0,0 +1,205 @@
+# SPDX-FileCopyrightText: 2020 PANGAEA (https://www.pangaea.de/)
+#
+# SPDX-License-Identifier: MIT
+
+import base64
+import json
+import time
+
+from fuji_server.helper.sqlite_cache import SQLiteCache
+
+
+def encode_bytes(value):
+    if isinstance(value, bytes):
+        return {"__bytes__": base64.b64encode(value).decode("ascii")}
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def decode_bytes(value):
+    if set(value) == {"__bytes__"}:
+        return base64.b64decode(value["__bytes__"])
+    return value
+
+
+class GithubHarvestCache(SQLiteCache):
+    """
+    A class which stores GitHub harvest results on disk, so repositories which have not changed since their last
+    assessment are not harvested again.
+
+    Harvest results are keyed by host, repository and commit SHA of the harvested branch. In addition the ETags and
+    responses of metadata requests are stored for conditional requests. The cache is bounded by the total size of the
+    stored results and responses and evicts the least recently used entries of both first.
+
+    Methods
+    -------
+    get(host, repo_id, sha)
+        Return a cached harvest result.
+    put(host, repo_id, sha, data)
+        Store a harvest result.
+    get_response(url)
+        Return the ETag and the data of a cached response.
+    put_response(url, etag, data)
+        Store the ETag and the data of a response.
+    set_db_path(db_path)
+        Set the path of the cache database.
+    set_max_size(max_size)
+        Set the maximum size of the stored harvest results and responses in bytes.
+    """
+
+    SCHEMA = [
+        "CREATE TABLE IF NOT EXISTS harvest (host TEXT, repo_id TEXT, sha TEXT, data TEXT, size INTEGER, "
+        "last_used REAL, PRIMARY KEY (host, repo_id, sha))",
+        "CREATE INDEX IF NOT EXISTS harvest_lru ON harvest (last_used)",
+        # responses were stored without size before they counted against the size limit
+        "DROP TABLE IF EXISTS response",
+        "CREATE TABLE IF NOT EXISTS etag_response (url TEXT PRIMARY KEY, etag TEXT, data TEXT, size INTEGER, "
+        "last_used REAL)",
+        "CREATE INDEX IF NOT EXISTS etag_response_lru ON etag_response (last_used)",
+    ]
+    TABLES = ["harvest", "etag_response"]
+    max_size = 50000000
+    configured = False
+
+    @classmethod
+    def set_db_path(cls, db_path):
+        # setting the current path again keeps the open database
+        cls.configured = True
+        if (db_path or ":memory:") != cls.db_path:
+            super().set_db_path(db_path)
+
+    @classmethod
+    def set_max_size(cls, max_size):
+        cls.max_size = int(max_size)
+
+    @classmethod
+    def get(cls, host, repo_id, sha):
+        """Return a cached harvest result.
+
+        Parameters
+        ----------
+        host : str
+            The GitHub host
+        repo_id : str
+            The repository ('owner/name')
+        sha : str
+            The commit SHA of the harvested branch
+
+        Returns
+        -------
+        dict
+            The harvest result, None if not cached
+        """
+        with cls._lock:
+            connection = cls.get_connection()
+            key = (host, repo_id.lower(), sha)
+            row = connection.execute(
+                "SELECT data FROM harvest WHERE host = ? AND repo_id = ? AND sha = ?", key
+            ).fetchone()
+            if row is None:
+                return None
+            connection.execute(
+                "UPDATE harvest SET last_used = ? WHERE host = ? AND repo_id = ? AND sha = ?", (time.time(), *key)
+            )
+            connection.commit()
+        return json.loads(row[0], object_hook=decode_bytes)
+
+    @classmethod
+    def put(cls, host, repo_id, sha, data):
+        """Store a harvest result and evict the least recently used results if the cache is full. Results of older
+        commits of the same repository are replaced.
+
+        Parameters
+        ----------
+        host : str
+            The GitHub host
+        repo_id : str
+            The repository ('owner/name')
+        sha : str
+            The commit SHA of the harvested branch
+        data : dict
+            The harvest result
+        """
+        serialized_data = json.dumps(data, default=encode_bytes)
+        size = len(serialized_data)
+        if size > cls.max_size:
+            return
+        with cls._lock:
+            connection = cls.get_connection()
+            connection.execute("DELETE FROM harvest WHERE host = ? AND repo_id = ?", (host, repo_id.lower()))
+            connection.execute(
+                "INSERT INTO harvest VALUES (?, ?, ?, ?, ?, ?)",
+                (host, repo_id.lower(), sha, serialized_data, size, time.time()),
+            )
+            cls.evict(connection)
+            connection.commit()
+
+    @classmethod
+    def evict(cls, connection):
+        # harvest results and responses share the size limit, the least recently used entry is removed first
+        total_size = connection.execute(
+            "SELECT (SELECT COALESCE(SUM(size), 0) FROM harvest) + (SELECT COALESCE(SUM(size), 0) FROM etag_response)"
+        ).fetchone()[0]
+        while total_size > cls.max_size:
+            oldest_harvest = connection.execute(
+                "SELECT last_used, host, repo_id, sha, size FROM harvest ORDER BY last_used LIMIT 1"
+            ).fetchone()
+            oldest_response = connection.execute(
+                "SELECT last_used, url, size FROM etag_response ORDER BY last_used LIMIT 1"
+            ).fetchone()
+            if oldest_response is None or (oldest_harvest is not None and oldest_harvest[0] <= oldest_response[0]):
+                connection.execute(
+                    "DELETE FROM harvest WHERE host = ? AND repo_id = ? AND sha = ?", oldest_harvest[1:4]
+                )
+                total_size -= oldest_harvest[4]
+            else:
+                connection.execute("DELETE FROM etag_response WHERE url = ?", (oldest_response[1],))
+                total_size -= oldest_response[2]
+
+    @classmethod
+    def get_response(cls, url):
+        """Return the ETag and the data of a cached response.
+
+        Parameters
+        ----------
+        url : str
+            The request URL
+
+        Returns
+        -------
+        tuple
+            The ETag and the data, None if not cached
+        """
+        with cls._lock:
+            connection = cls.get_connection()
+            row = connection.execute("SELECT etag, data FROM etag_response WHERE url = ?", (url,)).fetchone()
+            if row is None:
+                return None
+            connection.execute("UPDATE etag_response SET last_used = ? WHERE url = ?", (time.time(), url))
+            connection.commit()
+        return row[0], json.loads(row[1])
+
+    @classmethod
+    def put_response(cls, url, etag, data):
+        """Store the ETag and the data of a response, it counts against the size limit of the cache.
+
+        Parameters
+        ----------
+        url : str
+            The request URL
+        etag : str
+            The ETag of the response
+        data : object
+            The JSON serializable data of the response
+        """
+        serialized_data = json.dumps(data)
+        size = len(url) + len(etag or "") + len(serialized_data)
+        if size > cls.max_size:
+            return
+        with cls._lock:
+            connection = cls.get_connection()
+            connection.execute(
+                "INSERT OR REPLACE INTO etag_response VALUES (?, ?, ?, ?, ?)",
+                (url, etag, serialized_data, size, time.time()),
+            )
+            cls.evict(connection)
+            connection.commit()
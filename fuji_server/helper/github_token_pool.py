@@ -0,0 +1,145 @@
+# SPDX-FileCopyrightText: 2020 PANGAEA (https://www.pangaea.de/)
+#
+# SPDX-License-Identifier: MIT
+
+import os
+import threading
+import time
+
+
+class GithubTokenPool:
+    """
+    A class which manages the GitHub access tokens shared by all harvests of the process.
+
+    The tokens are read once from the token file (again only if the file has changed) or taken from the single
+    configured token. The remaining requests and the reset time of each token are tracked from the rate limit headers
+    of the responses received during harvesting, so a token can be picked without probing the rate limit API. Tokens
+    without known state are assumed to have their full quota, tokens which ran into a rate limit are skipped until
+    their quota is reset and invalid tokens are dropped.
+
+    Methods
+    -------
+    load(token_file, token)
+        Load the tokens from the token file or the single token.
+    acquire()
+        Return the token with the most remaining requests.
+    update(token, resource, remaining, reset)
+        Update the rate limit state of a token.
+    mark_exhausted(token, resource, reset)
+        Mark a token as rate limited until its quota is reset.
+    discard(token)
+        Remove an invalid token from the pool.
+    """
+
+    tokens = []
+    rate_limits = {}
+    source = None
+    min_remaining = {"core": 1000, "search": 2}
+    default_limit = 5000
+    default_backoff = 60
+    _lock = threading.Lock()
+
+    @classmethod
+    def load(cls, token_file="", token=""):
+        """Load the tokens from the token file or the single token, the state of known tokens is kept.
+
+        Parameters
+        ----------
+        token_file : str, optional
+            Path of a file with one token per line, takes precedence over the single token
+        token : str, optional
+            A single token
+        """
+        if token_file:
+            source = (token_file, os.path.getmtime(token_file))
+        else:
+            source = ("", token or "")
+        with cls._lock:
+            if source == cls.source:
+                return
+            if token_file:
+                with open(token_file) as f:
+                    tokens = [line.strip() for line in f.read().splitlines()]
+            else:
+                tokens = [token or ""]
+            cls.tokens = list(dict.fromkeys(token for token in tokens if token))
+            cls.rate_limits = {token: cls.rate_limits.get(token, {}) for token in cls.tokens}
+            cls.source = source
+
+    @classmethod
+    def get_remaining(cls, token, resource, now):
+        state = cls.rate_limits.get(token, {}).get(resource)
+        if state is None or state["reset"] <= now:
+            return cls.default_limit
+        return state["remaining"]
+
+    @classmethod
+    def acquire(cls):
+        """Return the token with the most remaining core requests which has enough core and search requests left,
+        if there is none the token with the most remaining core requests.
+
+        Returns
+        -------
+        str
+            The token, None if no token is configured or all tokens are rate limited
+        """
+        now = time.time()
+        with cls._lock:
+            candidates = [
+                (cls.get_remaining(token, "core", now), cls.get_remaining(token, "search", now), token)
+                for token in cls.tokens
+            ]
+        available = [
+            candidate
+            for candidate in candidates
+            if candidate[0] >= cls.min_remaining["core"] and candidate[1] >= cls.min_remaining["search"]
+        ]
+        fallback = [candidate for candidate in candidates if candidate[0] > 0]
+        for tokens in (available, fallback):
+            if tokens:
+                # the first configured token wins a tie
+                return max(tokens, key=lambda candidate: candidate[0])[2]
+        return None
+
+    @classmethod
+    def update(cls, token, resource, remaining, reset):
+        """Update the rate limit state of a token from the rate limit headers of a response.
+
+        Parameters
+        ----------
+        token : str
+            The token
+        resource : str
+            The rate limit resource ('core' or 'search')
+        remaining : int
+            The remaining requests (X-RateLimit-Remaining)
+        reset : float
+            The time when the quota is reset in seconds since the epoch (X-RateLimit-Reset)
+        """
+        with cls._lock:
+            if token in cls.rate_limits:
+                cls.rate_limits[token][resource] = {"remaining": int(remaining), "reset": float(reset)}
+
+    @classmethod
+    def mark_exhausted(cls, token, resource="core", reset=None):
+        """Mark a token as rate limited (after a 403 or 429 response) until its quota is reset.
+
+        Parameters
+        ----------
+        token : str
+            The token
+        resource : str, optional
+            The rate limit resource ('core' or 'search')
+        reset : float, optional
+            The time when the quota is reset in seconds since the epoch, by default after a short backoff
+        """
+        if not reset or float(reset) <= time.time():
+            reset = time.time() + cls.default_backoff
+        cls.update(token, resource, 0, reset)
+
+    @classmethod
+    def discard(cls, token):
+        with cls._lock:
+            if token in cls.tokens:
+                cls.tokens.remove(token)
+                cls.rate_limits.pop(token, None)
@@ -0,0 +1,183 @@
+# SPDX-FileCopyrightText: 2020 PANGAEA (https://www.pangaea.de/)
+#
+# SPDX-License-Identifier: MIT
+
+import json
+import logging
+import threading
+from collections import OrderedDict
+from urllib.parse import urljoin, urlparse
+
+import requests
+
+import yaml
+from fuji_server.helper.preprocessor import Preprocessor
+
+logger = logging.getLogger(__name__)
+
+
+class JsonLdContextLoader:
+    """
+    A class which loads JSON-LD context documents, to resolve remote @context references before JSON-LD is parsed.
+
+    rdflib fetches every remote @context (e.g. https://schema.org/) over the network each time a JSON-LD document is
+    parsed. Instead, remote context references are replaced by the context definitions beforehand: well known
+    contexts are read from offline copies in the data directory, other contexts are fetched once and kept in an
+    in-memory LRU cache. Remote fetches can be disabled completely.
+
+    Methods
+    -------
+    set_allow_remote_contexts(allow)
+        Allow or forbid to fetch contexts which are not available offline.
+    set_max_cached_contexts(size)
+        Set the size of the LRU cache for fetched contexts.
+    load_context(url)
+        Return the context document for a context URL.
+    resolve_contexts(jsonld, base)
+        Replace remote @context references in a JSON-LD document by their definitions.
+    """
+
+    # context URL without scheme and trailing slash -> offline copy in the data directory
+    OFFLINE_CONTEXTS = {
+        "schema.org": "jsonldcontext.yaml",
+        "schema.org/docs/jsonldcontext.json": "jsonldcontext.yaml",
+        "schema.org/docs/jsonldcontext.jsonld": "jsonldcontext.yaml",
+        "www.schema.org": "jsonldcontext.yaml",
+    }
+    MAX_CONTEXT_DEPTH = 10
+    allow_remote_contexts = True
+    max_cached_contexts = 128
+    remote_timeout = 5
+    offline_contexts = {}
+    remote_contexts = OrderedDict()
+    _lock = threading.Lock()
+
+    @classmethod
+    def set_allow_remote_contexts(cls, allow):
+        cls.allow_remote_contexts = bool(allow)
+
+    @classmethod
+    def set_max_cached_contexts(cls, size):
+        cls.max_cached_contexts = int(size)
+
+    @classmethod
+    def get_context_key(cls, url):
+        parsed_url = urlparse(str(url).strip())
+        return (parsed_url.netloc + parsed_url.path).rstrip("/").lower()
+
+    @classmethod
+    def get_offline_context(cls, url):
+        context_file = cls.OFFLINE_CONTEXTS.get(cls.get_context_key(url))
+        if not context_file:
+            return None
+        if context_file not in cls.offline_contexts:
+            with open(Preprocessor.data_dir / context_file, encoding="utf-8") as f:
+                if context_file.endswith(".yaml"):
+                    cls.offline_contexts[context_file] = yaml.safe_load(f)
+                else:
+                    cls.offline_contexts[context_file] = json.load(f)
+        return cls.offline_contexts[context_file]
+
+    @classmethod
+    def get_remote_context(cls, url):
+        with cls._lock:
+            if url in cls.remote_contexts:
+                cls.remote_contexts.move_to_end(url)
+                return cls.remote_contexts[url]
+        context_document = None
+        try:
+            response = requests.get(
+                url, headers={"Accept": "application/ld+json, application/json"}, timeout=cls.remote_timeout
+            )
+            if response.status_code == 200:
+                context_document = response.json()
+        except (requests.exceptions.RequestException, ValueError) as e:
+            logger.warning(f"Loading JSON-LD context failed -: {url} {e}")
+        if not isinstance(context_document, dict) or "@context" not in context_document:
+            context_document = None
+        with cls._lock:
+            # failed fetches are cached as well to not request them again for every document
+            cls.remote_contexts[url] = context_document
+            cls.remote_contexts.move_to_end(url)
+            while len(cls.remote_contexts) > cls.max_cached_contexts:
+                cls.remote_contexts.popitem(last=False)
+        return context_document
+
+    @classmethod
+    def load_context(cls, url):
+        """Return the context document for a context URL.
+
+        Parameters
+        ----------
+        url : str
+            The context URL
+
+        Returns
+        -------
+        dict
+            The context document which has a '@context' key
+
+        Raises
+        ------
+        ValueError
+            In case the context is neither available offline nor could be fetched
+        """
+        context_document = cls.get_offline_context(url)
+        if context_document is None:
+            if not cls.allow_remote_contexts:
+                raise ValueError(f"Remote JSON-LD context is not available offline -: {url}")
+            context_document = cls.get_remote_context(url)
+            if context_document is None:
+                raise ValueError(f"Could not load remote JSON-LD context -: {url}")
+        return context_document
+
+    @classmethod
+    def resolve_context(cls, context, base=None, depth=0):
+        if depth > cls.MAX_CONTEXT_DEPTH:
+            raise ValueError("Too many nested JSON-LD contexts")
+        if isinstance(context, str):
+            context_url = urljoin(base, context) if base else context
+            return cls.resolve_context(cls.load_context(context_url).get("@context"), context_url, depth + 1)
+        elif isinstance(context, list):
+            resolved_contexts = []
+            for context_item in context:
+                resolved_context = cls.resolve_context(context_item, base, depth)
+                if isinstance(resolved_context, list):
+                    resolved_contexts.extend(resolved_context)
+                else:
+                    resolved_contexts.append(resolved_context)
+            return resolved_contexts
+        elif isinstance(context, dict) and depth == 0:
+            # scoped contexts of term definitions given in the document
+            for term_definition in context.values():
+                if isinstance(term_definition, dict) and "@context" in term_definition:
+                    term_definition["@context"] = cls.resolve_context(term_definition["@context"], base, depth)
+        return context
+
+    @classmethod
+    def resolve_contexts(cls, jsonld, base=None):
+        """Replace all remote @context references in a JSON-LD document by the context definitions,
+        so the document can be parsed without network access.
+
+        Parameters
+        ----------
+        jsonld : dict | list
+            The JSON-LD document, is changed in place
+        base : str, optional
+            Base URL to resolve relative context references
+
+        Returns
+        -------
+        dict | list
+            The JSON-LD document
+        """
+        if isinstance(jsonld, dict):
+            for key, value in jsonld.items():
+                if key == "@context":
+                    jsonld[key] = cls.resolve_context(value, base)
+                else:
+                    cls.resolve_contexts(value, base)
+        elif isinstance(jsonld, list):
+            for item in jsonld:
+                cls.resolve_contexts(item, base)
+        return jsonld
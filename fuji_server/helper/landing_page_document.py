@@ -0,0 +1,202 @@
+# SPDX-FileCopyrightText: 2020 PANGAEA (https://www.pangaea.de/)
+#
+# SPDX-License-Identifier: MIT
+
+import copy
+import logging
+import re
+
+import lxml.html
+from extruct.xmldom import XmlDomHTMLParser
+
+
+class LandingPageDocument:
+    """
+    The HTML of a landing page, parsed once and shared by all extractors of embedded metadata.
+
+    The page is parsed into a single lxml tree using extruct's XmlDomHTMLParser, whose elements additionally
+    provide the xml.dom interface pyRdfa works on. Therefore extruct (microdata, JSON-LD, OpenGraph), pyRdfa,
+    the typed links, the Dublin Core and Highwire/Eprints meta tags and the JavaScript page check all read from
+    the same tree instead of parsing the HTML again. HTML comments and processing instructions are dropped while
+    parsing.
+
+    Attributes
+    ----------
+    source : str | bytes
+        The HTML content of the landing page as given
+    html : str | bytes
+        The HTML content of the landing page, decoded in case it has been given as UTF-8 bytes
+    tree : lxml.html.HtmlElement
+        The parsed document, None in case the HTML could not be parsed
+    logger : logging.Logger
+        Logger of the assessment, parsing errors are logged as warnings
+
+    Methods
+    -------
+    get_head_links()
+        Return the link elements in the head of the document.
+    get_meta_tags(name_pattern)
+        Return the attributes of all meta tags whose name matches the given pattern.
+    get_text_content()
+        Return the visible text of the document.
+    get_script_length()
+        Return the length of the serialized script elements.
+    clean_language_tag()
+        Replace an invalid language tag of the html element.
+    has_rdfa()
+        Check if the document contains RDFa attributes.
+    get_rdfa_tree()
+        Return the parts of the document which are relevant for RDFa processing.
+    """
+
+    TEXT_EXCLUDED_TAGS = ("script", "style", "title", "noscript")
+    # elements with RDFa attributes; rel/rev only count with CURIEs/IRIs or the describedby term since the other
+    # (XHTML vocabulary) terms give triples which are ignored by the RDF metadata collector anyway
+    RDFA_XPATH = (
+        "//*[@property or @typeof or @vocab or @about or @resource or @prefix or @datatype or @inlist"
+        " or contains(@rel, ':') or contains(@rev, ':')"
+        " or contains(translate(@rel, 'DESCRIBY', 'describy'), 'describedby')"
+        " or contains(translate(@rev, 'DESCRIBY', 'describy'), 'describedby')]"
+    )
+    # elements whose subtrees are kept for RDFa processing
+    RDFA_RELEVANT_XPATH = RDFA_XPATH[:-1] + " or @rel or @rev or @role] | /*/head/base"
+
+    def __init__(self, html, logger: logging.Logger | None = None):
+        """
+        Parameters
+        ----------
+        html : str | bytes
+            The HTML content of the landing page
+        logger : logging.Logger, optional
+            Logger of the assessment, default is the module logger
+        """
+        self.logger = logger or logging.getLogger(__name__)
+        self.source = html
+        if isinstance(html, bytes):
+            try:
+                html = html.decode()
+            except UnicodeDecodeError:
+                pass
+        self.html = html
+        self._tree = None
+        self._parsed = False
+        self._meta_tags = None
+        self._has_rdfa = None
+
+    @property
+    def tree(self):
+        if not self._parsed:
+            self._parsed = True
+            html = self.html
+            if isinstance(html, str):
+                html = html.encode("utf-8")
+            if html:
+                try:
+                    parser = XmlDomHTMLParser(encoding="utf-8", remove_comments=True, remove_pis=True)
+                    self._tree = lxml.html.fromstring(html, parser=parser)
+                except Exception as e:
+                    self.logger.warning("FsF-F2-01M : Could not parse the landing page HTML -: " + str(e))
+        return self._tree
+
+    def get_head_links(self):
+        if self.tree is None:
+            return []
+        return self.tree.xpath("/*/head/link")
+
+    def get_meta_tags(self, name_pattern=None):
+        """Return the attributes of the meta tags which have a name attribute, in document order.
+
+        Parameters
+        ----------
+        name_pattern : str | re.Pattern, optional
+            Only meta tags whose name contains a match of this pattern are returned
+
+        Returns
+        -------
+        list
+            a list of attribute dictionaries
+        """
+        if self._meta_tags is None:
+            self._meta_tags = []
+            if self.tree is not None:
+                for meta_tag in self.tree.iter("meta"):
+                    if meta_tag.get("name") is not None:
+                        self._meta_tags.append(dict(meta_tag.attrib))
+        if name_pattern is None:
+            return self._meta_tags
+        return [meta_tag for meta_tag in self._meta_tags if re.search(name_pattern, meta_tag["name"])]
+
+    def get_text_content(self):
+        """Return the text of the document without the content of script, style, title and noscript elements,
+        the stripped text nodes are joined without separator."""
+        if self.tree is None:
+            return ""
+        excluded = " or ".join(f"ancestor::{tag}" for tag in self.TEXT_EXCLUDED_TAGS)
+        return "".join(text.strip() for text in self.tree.xpath(f"//text()[not({excluded})]"))
+
+    def get_script_length(self):
+        if self.tree is None:
+            return 0
+        return sum(
+            len(lxml.html.tostring(script, encoding="unicode", with_tail=False)) for script in self.tree.iter("script")
+        )
+
+    def clean_language_tag(self):
+        """Replace an invalid language tag of the html element (which causes RDFa errors) by 'en'.
+
+        Returns
+        -------
+        str
+            the invalid language tag or None
+        """
+        invalid_lang = None
+        if self.tree is not None:
+            for lang_attribute in ("lang", "xml:lang"):
+                lang = self.tree.get(lang_attribute)
+                if lang and not re.match(r"^[a-zA-Z]+(?:-[a-zA-Z0-9]+)*$", lang):
+                    invalid_lang = lang
+                    self.tree.set(lang_attribute, "en")
+        return invalid_lang
+
+    def has_rdfa(self):
+        """Cheap check if the document contains any RDFa attributes (property, typeof, vocab, about, resource, prefix,
+        datatype, inlist or rel/rev with a CURIE, IRI or the describedby term).
+
+        Returns
+        -------
+        bool
+            True if RDFa processing of the document can give triples
+        """
+        if self._has_rdfa is None:
+            self._has_rdfa = self.tree is not None and bool(self.tree.xpath(f"boolean({self.RDFA_XPATH})"))
+        return self._has_rdfa
+
+    def get_rdfa_tree(self):
+        """Return a copy of the document tree which only contains the subtrees with RDFa attributes together with
+        their ancestors, so pyRdfa does not walk through the rest of a large page. Text and elements outside of these
+        subtrees do not contribute to the RDFa triples. The tree itself is returned if nothing can be dropped.
+
+        Returns
+        -------
+        lxml.html.HtmlElement
+            the tree for RDFa processing, None if the document contains no RDFa
+        """
+        if not self.has_rdfa():
+            return None
+        relevant_elements = set()
+        for element in self.tree.xpath(self.RDFA_RELEVANT_XPATH):
+            if element not in relevant_elements:
+                relevant_elements.update(element.iter())
+                relevant_elements.update(element.iterancestors())
+        elements = list(self.tree.iter())
+        if len(relevant_elements) >= len(elements):
+            return self.tree
+        rdfa_tree = copy.deepcopy(self.tree)
+        irrelevant_subtrees = [
+            copied_element
+            for element, copied_element in zip(elements, rdfa_tree.iter())
+            if element not in relevant_elements and element.getparent() in relevant_elements
+        ]
+        for copied_element in irrelevant_subtrees:
+            copied_element.getparent().remove(copied_element)
+        return rdfa_tree
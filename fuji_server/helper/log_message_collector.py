@@ -0,0 +1,91 @@
+# SPDX-FileCopyrightText: 2020 PANGAEA (https://www.pangaea.de/)
+#
+# SPDX-License-Identifier: MIT
+
+import logging
+
+ASSESSMENT_LOGGER_NAME = "fuji_server.assessment"
+
+
+def get_assessment_logger(name, level=logging.NOTSET):
+    """Return a new logger which is scoped to one assessment.
+
+    Unlike logging.getLogger(name), the logger is not registered in the global logging manager, so it is
+    garbage collected together with the assessment instead of being kept for the lifetime of the process.
+    Concurrent assessments of the same identifier get separate loggers and do not share their handlers.
+    Records are propagated to the shared 'fuji_server.assessment' logger.
+
+    Parameters
+    ----------
+    name : str
+        Name of the assessment, e.g. the test id
+    level : int, optional
+        Log level of the logger, default is logging.NOTSET (use the level of the shared logger)
+
+    Returns
+    -------
+    logging.Logger
+    """
+    logger = logging.Logger(f"{ASSESSMENT_LOGGER_NAME}.{name}", level)
+    logger.parent = logging.getLogger(ASSESSMENT_LOGGER_NAME)
+    return logger
+
+
+class LogMessageCollector(logging.Handler):
+    """
+    A logging handler which collects the debug messages of one assessment grouped by metric.
+
+    Metric messages follow the pattern '<metric id> : <message>', e.g. 'FsF-F1-01D : Identifier is a URL'.
+    Instead of writing formatted lines into a stream which have to be parsed again later, the handler stores
+    (level, message) entries per metric directly. Messages are deduplicated per metric while keeping the order
+    in which they have been logged first. Since log records are only formatted once they reach a handler, loggers
+    which are not enabled for a level never render their (potentially large) message arguments.
+
+    Methods
+    -------
+    emit(record)
+        Store the message of a metric log record.
+    get_messages_dict()
+        Return the collected messages as dict of metric id -> list of 'LEVEL: message' strings.
+    clear()
+        Remove all collected messages.
+    """
+
+    METRIC_PREFIXES = ("FsF-", "FRSM-")
+
+    def __init__(self, level=logging.NOTSET):
+        super().__init__(level)
+        # metric id -> dict used as insertion ordered set of (level name, message) tuples
+        self.messages = {}
+
+    def emit(self, record):
+        try:
+            log_message = record.getMessage()
+        except Exception:
+            self.handleError(record)
+            return
+        if log_message.startswith(self.METRIC_PREFIXES):
+            metric, _, message = log_message.partition(":")
+            self.messages.setdefault(metric.strip(), {})[(record.levelname, message.strip())] = None
+
+    def get_messages_dict(self):
+        """Return the collected messages per metric.
+
+        Returns
+        -------
+        dict
+            metric id -> list of 'LEVEL: message' strings in the order they have been logged first
+        """
+        with self.lock:
+            return {
+                metric: [f"{level}: {message}" for level, message in metric_messages]
+                for metric, metric_messages in self.messages.items()
+            }
+
+    def clear(self):
+        with self.lock:
+            self.messages = {}
+
+    def close(self):
+        self.clear()
+        super().close()
@@ -0,0 +1,235 @@
+# SPDX-FileCopyrightText: 2020 PANGAEA (https://www.pangaea.de/)
+#
+# SPDX-License-Identifier: MIT
+
+
+class MetadataCleaner:
+    """
+    A class providing single pass cleaning routines for harvested metadata.
+
+    All methods visit every node of the given (nested) metadata exactly once, so the cost is linear in the
+    size of the document, also for deeply nested JSON-LD such as schema.org hasPart trees.
+
+    Methods
+    -------
+    exclude_null(dt)
+        Return a copy of dt without empty values, strings are stripped and lists made unique.
+    clean_merged_metadata(metadata)
+        Return a cleaned copy of the merged metadata dictionary.
+    clean_mime_type(mime_type)
+        Return a mime type, reduced to type/subtype in case it is given in URI form.
+    get_hashable_key(value)
+        Return a canonical hashable key for a (nested) metadata value.
+    unique_values(values)
+        Return the values without duplicates, keeping the order of their first occurrence.
+    """
+
+    MIME_TOP_LEVEL_TYPES = (
+        "application",
+        "audio",
+        "font",
+        "example",
+        "image",
+        "message",
+        "model",
+        "multipart",
+        "text",
+        "video",
+    )
+
+    @classmethod
+    def exclude_null(cls, dt):
+        """Remove all empty (falsy) values from nested dicts and lists, strip strings and make lists unique.
+
+        Parameters
+        ----------
+        dt : dict | list | str | object
+            The (nested) metadata to be cleaned
+
+        Returns
+        -------
+        dict | list | str | object
+            A cleaned copy of dt, list order is preserved
+        """
+        if isinstance(dt, dict):
+            cleaned_dict = {}
+            for k, v in dt.items():
+                cleaned_value = cls.exclude_null(v)
+                if cleaned_value:
+                    cleaned_dict[k] = cleaned_value
+            return cleaned_dict
+        elif isinstance(dt, list):
+            cleaned_list = []
+            for v in dt:
+                cleaned_value = cls.exclude_null(v)
+                if cleaned_value:
+                    cleaned_list.append(cleaned_value)
+            try:
+                return list(dict.fromkeys(cleaned_list))
+            except TypeError:
+                # unhashable members such as dicts
+                return cleaned_list
+        elif isinstance(dt, str):
+            return dt.strip()
+        else:
+            return dt
+
+    @classmethod
+    def get_hashable_key(cls, value):
+        """Return a canonical hashable key for a (nested) metadata value, equal values get equal keys.
+
+        Dicts are compared independent of their key order, lists and tuples by their order like ==.
+
+        Raises
+        ------
+        TypeError
+            In case the value contains unhashable objects other than dicts, lists and sets
+        """
+        if isinstance(value, dict):
+            return (dict, frozenset((k, cls.get_hashable_key(v)) for k, v in value.items()))
+        elif isinstance(value, list | tuple):
+            return (type(value), tuple(cls.get_hashable_key(v) for v in value))
+        elif isinstance(value, set | frozenset):
+            return (frozenset, frozenset(cls.get_hashable_key(v) for v in value))
+        hash(value)
+        return value
+
+    @classmethod
+    def unique_values(cls, values):
+        """Return the values without duplicates, keeping the order of their first occurrence.
+
+        Duplicates are detected by their canonical key, so this is linear in the number of values also for dicts.
+        """
+        unique = []
+        seen_keys = set()
+        unhashable = []
+        for value in values:
+            try:
+                key = cls.get_hashable_key(value)
+            except TypeError:
+                if value not in unhashable:
+                    unhashable.append(value)
+                    unique.append(value)
+                continue
+            if key not in seen_keys:
+                seen_keys.add(key)
+                unique.append(value)
+        return unique
+
+    @classmethod
+    def prune_none(cls, dt):
+        """Replace 'None' strings by real None and remove None, empty strings and resulting empty containers.
+
+        Other falsy values like 0 or False are kept.
+
+        Parameters
+        ----------
+        dt : dict | list | str | object
+
+        Returns
+        -------
+        dict | list | str | object | None
+            A pruned copy of dt or None if nothing is left
+        """
+        if isinstance(dt, dict):
+            pruned_dict = {}
+            for k, v in dt.items():
+                pruned_value = cls.prune_none(v)
+                if pruned_value is not None:
+                    pruned_dict[k] = pruned_value
+            return pruned_dict or None
+        elif isinstance(dt, list):
+            pruned_list = []
+            for v in dt:
+                pruned_value = cls.prune_none(v)
+                if pruned_value is not None:
+                    pruned_list.append(pruned_value)
+            return pruned_list or None
+        elif isinstance(dt, str):
+            if dt == "" or dt == "None":
+                return None
+            return dt
+        else:
+            return dt
+
+    @classmethod
+    def clean_mime_type(cls, mime_type):
+        """Return the first mime type in case a list is given and reduce URI forms
+        (e.g. http://www.iana.org/assignments/media-types/text/csv) to type/subtype.
+        """
+        if isinstance(mime_type, list):
+            mime_type = mime_type[0] if mime_type else None
+        if mime_type:
+            mime_parts = str(mime_type).split("/")
+            if len(mime_parts) > 2 and mime_parts[-2] in cls.MIME_TOP_LEVEL_TYPES:
+                mime_type = str(mime_parts[-2]) + "/" + str(mime_parts[-1])
+        return mime_type
+
+    @classmethod
+    def clean_content_identifier(cls, data_objects, object_size=None):
+        """Deduplicate data links (object_content_identifier) by URL and clean their mime types.
+
+        Type and size information of duplicates is used to complete the first occurrence.
+
+        Parameters
+        ----------
+        data_objects : list | dict
+            Pruned object_content_identifier entries
+        object_size : str | int, optional
+            The size of the whole object, used in case there is only one data link without size
+
+        Returns
+        -------
+        list | None
+        """
+        if not isinstance(data_objects, list):
+            data_objects = [data_objects]
+        unique_objects = {}
+        for data_object in data_objects:
+            if not isinstance(data_object, dict):
+                data_object = {"url": data_object}
+            dcurl = data_object.get("url")
+            if dcurl not in unique_objects:
+                unique_objects[dcurl] = data_object
+            else:
+                known_object = unique_objects[dcurl]
+                # complete size and type
+                if not known_object.get("type") and data_object.get("type"):
+                    known_object["type"] = data_object.get("type")
+                elif data_object.get("type") and known_object.get("type"):
+                    if "/" in str(data_object.get("type")) and "/" not in str(known_object.get("type")):
+                        known_object["type"] = data_object.get("type")
+                if not known_object.get("size") and data_object.get("size"):
+                    known_object["size"] = data_object.get("size")
+        cleaned_objects = list(unique_objects.values())
+        for data_object in cleaned_objects:
+            if not data_object.get("size") and object_size and len(cleaned_objects) == 1:
+                data_object["size"] = object_size
+            if data_object.get("type"):
+                data_object["type"] = cls.clean_mime_type(data_object["type"])
+        return cleaned_objects or None
+
+    @classmethod
+    def clean_merged_metadata(cls, metadata):
+        """Clean the merged metadata in one pass: normalizes 'None' strings, prunes empty values,
+        deduplicates data links and cleans their mime types.
+
+        Parameters
+        ----------
+        metadata : dict
+            The merged metadata
+
+        Returns
+        -------
+        dict
+            A cleaned copy of the metadata
+        """
+        cleaned_metadata = cls.prune_none(metadata) or {}
+        data_objects = cleaned_metadata.get("object_content_identifier")
+        if data_objects is not None:
+            data_objects = cls.clean_content_identifier(data_objects, cleaned_metadata.get("object_size"))
+            if data_objects:
+                cleaned_metadata["object_content_identifier"] = data_objects
+            else:
+                del cleaned_metadata["object_content_identifier"]
+        return cleaned_metadata
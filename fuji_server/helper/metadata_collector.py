@@ -9,6 +9,7 @@ from urlextract import URLExtract
 
 from fuji_server.helper import metadata_mapper
 from fuji_server.helper.linked_vocab_helper import LinkedVocabHelper
+from fuji_server.helper.metadata_cleaner import MetadataCleaner
 from fuji_server.helper.metadata_mapper import Mapper
 from fuji_server.helper.preprocessor import Preprocessor
 
@@ -38,6 +39,7 @@ class MetadataOfferingMethods(enum.Enum):
     TYPED_LINKS = {"label": "Typed Links", "acronym": "typed_links"}
     SIGNPOSTING = {"label": "Signposting Links", "acronym": "signposting"}
     CONTENT_NEGOTIATION = {"label": "Content Negotiation", "acronym": "content_negotiation"}
+    METADATA_SERVICE = {"label": "Metadata Service (OAI-PMH)", "acronym": "metadata_service"}
 
     def acronym(self):
         return self.value.get("acronym")
@@ -162,6 +164,12 @@ class MetadataSources(enum.Enum):
         "acronym": "xml-signposting-linked",
         "format": MetadataFormats.XML,
     }
+    XML_OAI_PMH = {
+        "method": MetadataOfferingMethods.METADATA_SERVICE,
+        "label": "Generic XML, OAI-PMH Record",
+        "acronym": "xml-oai-pmh",
+        "format": MetadataFormats.XML,
+    }
     # B2FIND = 'B2FIND Metadata Aggregator'
     XML_GUESSED = {"method": None, "label": "Guessed XML Link", "acronym": "xml-guessed", "format": MetadataFormats.XML}
     OAI_ORE = {"method": MetadataOfferingMethods.TYPED_LINKS, "label": "OAI-ORE", "format": MetadataFormats.XML}
@@ -317,14 +325,4 @@ class MetaDataCollector:
         self.auth_token_type = authtokentype
 
     def exclude_null(self, dt):
-        if isinstance(dt, dict):
-            return dict((k, self.exclude_null(v)) for k, v in dt.items() if v and self.exclude_null(v))
-        elif isinstance(dt, list):
-            try:
-                return list(set([self.exclude_null(v) for v in dt if v and self.exclude_null(v)]))
-            except Exception:
-                return [self.exclude_null(v) for v in dt if v and self.exclude_null(v)]
-        elif isinstance(dt, str):
-            return dt.strip()
-        else:
-            return dt
+        return MetadataCleaner.exclude_null(dt)
@@ -2,10 +2,7 @@
 #
 # SPDX-License-Identifier: MIT
 
-import re
-
-from bs4 import BeautifulSoup
-
+from fuji_server.helper.landing_page_document import LandingPageDocument
 from fuji_server.helper.metadata_collector import MetaDataCollector, MetadataFormats, MetadataSources
 from fuji_server.helper.metadata_mapper import Mapper
 
@@ -27,8 +24,8 @@ class MetaDataCollectorDublinCore(MetaDataCollector):
         """
         Parameters
         ----------
-        sourcemetadata : str
-            Source of metadata
+        sourcemetadata : LandingPageDocument | str
+            The (parsed) HTML landing page
         mapping : Mapper
             Mapper to metedata sources
         loggerinst : logging.Logger
@@ -105,15 +102,13 @@ class MetaDataCollectorDublinCore(MetaDataCollector):
                 meta_dc_matches = []
                 self.content_type = "text/html"
                 try:
-                    metasoup = BeautifulSoup(self.source_metadata, "lxml")
-                    meta_dc_soupresult = metasoup.findAll(
-                        "meta", attrs={"name": re.compile(r"(DC|dc|DCTERMS|dcterms)\.([A-Za-z]+)")}
-                    )
+                    landing_document = self.source_metadata
+                    if not isinstance(landing_document, LandingPageDocument):
+                        landing_document = LandingPageDocument(landing_document, self.logger)
+                    meta_dc_soupresult = landing_document.get_meta_tags(r"(DC|dc|DCTERMS|dcterms)\.([A-Za-z]+)")
 
                     if len(meta_dc_soupresult) <= 0:
-                        meta_dc_soupresult = metasoup.findAll(
-                            "meta", attrs={"name": re.compile(r"(" + "|".join(dc_core_base_props) + ")")}
-                        )
+                        meta_dc_soupresult = landing_document.get_meta_tags(r"(" + "|".join(dc_core_base_props) + ")")
                     for meta_tag in meta_dc_soupresult:
                         dc_name_parts = str(meta_tag["name"]).split(".")
                         if len(dc_name_parts) == 1 and dc_name_parts[0] in dc_core_base_props:
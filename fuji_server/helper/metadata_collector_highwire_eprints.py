@@ -2,10 +2,7 @@
 #
 # SPDX-License-Identifier: MIT
 
-import re
-
-from bs4 import BeautifulSoup
-
+from fuji_server.helper.landing_page_document import LandingPageDocument
 from fuji_server.helper.metadata_collector import MetaDataCollector, MetadataFormats
 from fuji_server.helper.metadata_mapper import Mapper
 
@@ -27,8 +24,8 @@ class MetaDataCollectorHighwireEprints(MetaDataCollector):
         """
         Parameters
         ----------
-        sourcemetadata : str
-            Source of metadata
+        sourcemetadata : LandingPageDocument | str
+            The (parsed) HTML landing page
         mapping : Mapper
             Mapper to metedata sources
         loggerinst : logging.Logger
@@ -53,10 +50,10 @@ class MetaDataCollectorHighwireEprints(MetaDataCollector):
         if self.source_metadata is not None:
             self.metadata_format = MetadataFormats.HTML
             self.content_type = "text/html"
-            metasoup = BeautifulSoup(self.source_metadata, "lxml")
-            meta_hw_soupresult = metasoup.findAll(
-                "meta", attrs={"name": re.compile(r"(eprints\.|citation_)([A-Z_a-z]+)")}
-            )
+            landing_document = self.source_metadata
+            if not isinstance(landing_document, LandingPageDocument):
+                landing_document = LandingPageDocument(landing_document, self.logger)
+            meta_hw_soupresult = landing_document.get_meta_tags(r"(eprints\.|citation_)([A-Z_a-z]+)")
             flipped_hw = Mapper.flip_dict(Mapper.HIGHWIRE_MAPPING.value)
             flipped_hw.update(flipped_eprints=Mapper.flip_dict(Mapper.EPRINTS_MAPPING.value))
             for meta_tag in meta_hw_soupresult:
@@ -18,6 +18,7 @@ from rdflib.namespace import (
     SDO,  # schema.org
 )
 
+from fuji_server.helper.jsonld_context_loader import JsonLdContextLoader
 from fuji_server.helper.metadata_collector import MetaDataCollector, MetadataFormats, MetadataSources
 from fuji_server.helper.metadata_mapper import Mapper
 from fuji_server.helper.preprocessor import Preprocessor
@@ -207,7 +208,7 @@ class MetaDataCollectorRdf(MetaDataCollector):
             self.metadata_format = neg_format
             if requestHelper.checked_content_hash:
                 if (
-                    requestHelper.checked_content.get(requestHelper.checked_content_hash).get("checked")
+                    requestHelper.checked_content.get(requestHelper.checked_content_hash, {}).get("checked")
                     and "xml" in requestHelper.content_type
                 ):
                     requestHelper.response_content = None
@@ -275,9 +276,15 @@ class MetaDataCollectorRdf(MetaDataCollector):
                             % (jsonld_source_url)
                         )
                         try:
+                            # resolve remote contexts (e.g. schema.org) offline or from cache before parsing
+                            jsonld_data = JsonLdContextLoader.resolve_contexts(
+                                json.loads(rdf_response), self.resolved_url
+                            )
+                            if not isinstance(jsonld_data, dict):
+                                jsonld_data = json.dumps(jsonld_data)
                             jsonldgraph = rdflib.ConjunctiveGraph(identifier=self.resolved_url)
                             rdf_response_graph = jsonldgraph.parse(
-                                data=rdf_response, format="json-ld", publicID=self.resolved_url
+                                data=jsonld_data, format="json-ld", publicID=self.resolved_url
                             )
                             # rdf_response_graph = jsonldgraph
                             self.setLinkedNamespaces(self.getAllURIS(jsonldgraph))
@@ -1085,8 +1092,8 @@ class MetaDataCollectorRdf(MetaDataCollector):
 
             if dcat_metadata["object_content_identifier"]:
                 self.logger.info(
-                    "FsF-F3-01M : Found data links in DCAT.org metadata -: "
-                    + str(dcat_metadata["object_content_identifier"])
+                    "FsF-F3-01M : Found data links in DCAT.org metadata -: %s",
+                    dcat_metadata["object_content_identifier"],
                 )
             # metadata services
             data_services = graph.objects(datasets[0], DCAT.service)
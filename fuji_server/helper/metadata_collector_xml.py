@@ -34,7 +34,7 @@ class MetaDataCollectorXML(MetaDataCollector):
 
     """
 
-    def __init__(self, loggerinst, target_url=None, link_type="linked", pref_mime_type=None):
+    def __init__(self, loggerinst, target_url=None, link_type="linked", pref_mime_type=None, content=None):
         """
         Parameters
         ----------
@@ -46,10 +46,13 @@ class MetaDataCollectorXML(MetaDataCollector):
             Link Type, from MetadataOfferigMethods enum
         pref_mime_type : str, optional
             Preferred mime type, e.g. specific XML format
+        content : bytes, optional
+            Already harvested XML (e.g. an OAI-PMH record), parsed instead of requesting the target URL
         """
         self.target_url = target_url
         self.link_type = link_type
         self.pref_mime_type = pref_mime_type
+        self.content = content
         self.is_xml = False
         super().__init__(logger=loggerinst)
 
@@ -101,6 +104,8 @@ class MetaDataCollectorXML(MetaDataCollector):
         #    source_name = self.getEnumSourceNames().XML_GUESSED
         elif self.link_type == MetadataOfferingMethods.CONTENT_NEGOTIATION:
             source_name = self.getEnumSourceNames().XML_NEGOTIATED
+        elif self.link_type == MetadataOfferingMethods.METADATA_SERVICE:
+            source_name = self.getEnumSourceNames().XML_OAI_PMH
         else:
             source_name = self.getEnumSourceNames().XML_TYPED_LINKS
         requestHelper = RequestHelper(self.target_url, self.logger)
@@ -109,7 +114,12 @@ class MetaDataCollectorXML(MetaDataCollector):
         if self.pref_mime_type:
             requestHelper.addAcceptType(self.pref_mime_type)
         # self.logger.info('FsF-F2-01M : Sending request to access metadata from -: {}'.format(self.target_url))
-        neg_format, xml_response = requestHelper.content_negotiate("FsF-F2-01M")
+        if self.content is not None:
+            neg_format, xml_response = MetadataFormats.XML, self.content
+            requestHelper.response_content = self.content
+            requestHelper.content_type = "application/xml"
+        else:
+            neg_format, xml_response = requestHelper.content_negotiate("FsF-F2-01M")
         self.metadata_format = neg_format
         if requestHelper.response_content is not None:
             self.content_type = requestHelper.content_type
@@ -244,7 +254,9 @@ class MetaDataCollectorXML(MetaDataCollector):
 
         if xml_metadata:
             if requestHelper.checked_content_hash:
-                requestHelper.checked_content.get(requestHelper.checked_content_hash)["checked"] = True
+                checked_content = requestHelper.checked_content.get(requestHelper.checked_content_hash)
+                if checked_content is not None:
+                    checked_content["checked"] = True
             self.logger.info("FsF-F2-01M : Found some metadata in XML -: " + (str(xml_metadata.keys())))
         else:
             self.logger.info("FsF-F2-01M : Could not identify metadata properties in XML")
@@ -6,6 +6,7 @@ from abc import ABC, abstractmethod
 
 from urlextract import URLExtract
 
+from fuji_server.helper.endpoint_capability_cache import EndpointCapabilityCache
 from fuji_server.helper.preprocessor import Preprocessor
 
 
@@ -36,6 +37,8 @@ class MetadataProvider(ABC):
         Abstract method
     getNamespacefromIRIs(meta_source)
         Generate list of namespaces given IRI and store it class attributes of namespaces
+    getCachedCapability(service, endpoint, retrieve)
+        Return the (cached) capabilities of the endpoint and add its namespaces
     """
 
     def __init__(self, logger=None, endpoint=None, metric_id=None):
@@ -67,21 +70,65 @@ class MetadataProvider(ABC):
     def getMetadataStandards(self):
         pass
 
+    def getCachedCapability(self, service, endpoint, retrieve):
+        """Return the capabilities of the endpoint from the endpoint capability cache, they are retrieved only if they
+        are not cached. The namespaces of the endpoint are added to the namespaces.
+
+        Parameters
+        ----------
+        service : str
+            The service type, e.g. 'oai-pmh'
+        endpoint : str
+            The endpoint url used as cache key
+        retrieve : callable
+            Queries the endpoint and returns a dict with available, standards and namespaces
+
+        Returns
+        -------
+        dict
+            The capabilities with available, standards and namespaces
+        """
+        capability = EndpointCapabilityCache.get(service, endpoint)
+        if capability is None:
+            capability = EndpointCapabilityCache.get_or_retrieve(service, endpoint, retrieve)
+        elif capability["available"]:
+            self.logger.info(f"{self.metric_id} : Using cached capabilities of {service} endpoint -: {endpoint}")
+        else:
+            self.logger.warning(
+                f"{self.metric_id} : Skipping {service} endpoint which was not available recently -: {endpoint}"
+            )
+        for namespace in capability["namespaces"]:
+            if namespace not in self.namespaces:
+                self.namespaces.append(namespace)
+        return capability
+
     def getNamespacesfromIRIs(self, meta_source):
         extractor = URLExtract()
-        namespaces = set()
+        iris = set()
         if meta_source is not None:
-            for url in set(extractor.gen_urls(str(meta_source))):
-                namespace_candidate = url.rsplit("/", 1)[0]
+            iris = set(extractor.gen_urls(str(meta_source)))
+        self.addNamespacesfromIRIs(iris)
+
+    def addNamespacesfromIRIs(self, iris):
+        """Add the namespaces of IRIs which are namespaces of known linked vocabularies.
+
+        Parameters
+        ----------
+        iris : iterable
+            IRIs, e.g. the IRIs of the nodes of an RDF graph
+        """
+        namespaces = set()
+        for url in set(iris):
+            namespace_candidate = url.rsplit("/", 1)[0]
+            if namespace_candidate != url:
+                namespaces.add(namespace_candidate)
+            else:
+                namespace_candidate = url.rsplit("#", 1)[0]
                 if namespace_candidate != url:
                     namespaces.add(namespace_candidate)
-                else:
-                    namespace_candidate = url.rsplit("#", 1)[0]
-                    if namespace_candidate != url:
-                        namespaces.add(namespace_candidate)
-
+        if namespaces:
             vocabs = Preprocessor.getLinkedVocabs()
-            lod_namespaces = [d["namespace"] for d in vocabs if "namespace" in d]
+            lod_namespaces = {d["namespace"] for d in vocabs if "namespace" in d}
             for ns in namespaces:
                 if ns + "/" in lod_namespaces:
                     self.namespaces.append(ns + "/")
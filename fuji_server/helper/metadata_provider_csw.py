@@ -28,7 +28,7 @@ class OGCCSWMetadataProvider(MetadataProvider):
         return None
 
     def getMetadataStandards(self):
-        """Method to get the metadata schema from the OGCCSW namespaces
+        """Method to get the metadata schema from the OGCCSW namespaces, the listed schemas of an endpoint are cached
 
         Returns
         -------
@@ -36,26 +36,41 @@ class OGCCSWMetadataProvider(MetadataProvider):
             A dictionary of schemas in OGCCSW
         """
         csw_endpoint = self.endpoint.split("?")[0]
+        capability = self.getCachedCapability("csw", csw_endpoint, self.retrieveMetadataStandards)
+        return dict(capability["standards"])
+
+    def retrieveMetadataStandards(self):
+        """Method to query the output schemas listed in the capabilities of the OGC CSW endpoint (GetCapabilities)
+
+        Returns
+        -------
+        dict
+            The endpoint capabilities with available, standards and namespaces
+        """
+        csw_endpoint = self.endpoint.split("?")[0]
         csw_listmetadata_url = csw_endpoint + "?service=CSW&request=GetCapabilities"
         requestHelper = RequestHelper(url=csw_listmetadata_url, logInst=self.logger)
         requestHelper.setAcceptType(AcceptTypes.xml)
         response_type, xml = requestHelper.content_negotiate(self.metric_id)
         schemas = {}
+        namespaces = []
+        available = False
         if xml:
             try:
                 root = etree.fromstring(requestHelper.response_content)
                 metadata_nodes = root.xpath(
                     '//ows:Parameter[@name="outputSchema"]/ows:Value', namespaces=OGCCSWMetadataProvider.csw_namespaces
                 )
+                available = True
                 for node in metadata_nodes:
                     if node.text:
-                        if node.text not in self.namespaces:
-                            self.namespaces.append(str(node.text))
+                        if node.text not in namespaces:
+                            namespaces.append(str(node.text))
                             schemas[str(node.text)] = str(node.text)
             except:
                 self.logger.info(f"{self.metric_id} : Could not parse XML response retrieved from OGC CSW endpoint")
 
-        return schemas
+        return {"available": available, "standards": schemas, "namespaces": namespaces}
 
     def getNamespaces(self):
         return self.namespaces
@@ -36,13 +36,25 @@ class OAIMetadataProvider(MetadataProvider):
         return None
 
     def getMetadataStandards(self):
-        """Method to get the metadata schema from the OAI namespaces
+        """Method to get the metadata schema from the OAI namespaces, the listed formats of an endpoint are cached
 
         Returns
         -------
         dict
             A dictionary of schemas in OAI
         """
+        oai_endpoint = self.endpoint.split("?")[0]
+        capability = self.getCachedCapability("oai-pmh", oai_endpoint, self.retrieveMetadataStandards)
+        return dict(capability["standards"])
+
+    def retrieveMetadataStandards(self):
+        """Method to query the metadata formats listed by the OAI-PMH endpoint (ListMetadataFormats)
+
+        Returns
+        -------
+        dict
+            The endpoint capabilities with available, standards (schemas by metadata prefix) and namespaces
+        """
         filter = []
         # filter = ['datacite.org', 'openarchives.org', 'purl.org/dc/']  # TODO expand filters
         # http://ws.pangaea.de/oai/provider?verb=ListMetadataFormats
@@ -53,6 +65,8 @@ class OAIMetadataProvider(MetadataProvider):
         requestHelper.setAcceptType(AcceptTypes.xml)
         response_type, xml = requestHelper.content_negotiate(self.metric_id)
         schemas = {}
+        namespaces = []
+        available = False
         if xml:
             try:
                 root = etree.fromstring(requestHelper.response_content)
@@ -60,6 +74,7 @@ class OAIMetadataProvider(MetadataProvider):
                     "//oai:OAI-PMH/oai:ListMetadataFormats/oai:metadataFormat",
                     namespaces=OAIMetadataProvider.oai_namespaces,
                 )
+                available = True
                 for node in metadata_nodes:
                     ele = etree.XPathEvaluator(node, namespaces=OAIMetadataProvider.oai_namespaces)  # .evaluate
                     metadata_prefix = ele(
@@ -69,7 +84,7 @@ class OAIMetadataProvider(MetadataProvider):
                         "string(oai:schema/text())"
                     )  # <schema>http://www.openarchives.org/OAI/2.0/oai_dc.xsd</schema>
                     metadata_schema = metadata_schema.strip()
-                    self.namespaces.append(metadata_schema)
+                    namespaces.append(metadata_schema)
                     # TODO there can be more than one OAI-PMH endpoint, https://www.re3data.org/repository/r3d100011221
                     if not any(s in metadata_schema for s in filter):
                         schemas[metadata_prefix] = metadata_schema
@@ -85,7 +100,7 @@ class OAIMetadataProvider(MetadataProvider):
                 )
                 print("OAI-PMH Parsing Error: ", e)
 
-        return schemas
+        return {"available": available, "standards": schemas, "namespaces": namespaces}
 
     def getNamespaces(self):
         return self.namespaces
@@ -7,6 +7,7 @@ from urllib.error import HTTPError
 import rdflib
 from SPARQLWrapper import RDFXML, SPARQLExceptions, SPARQLWrapper
 
+from fuji_server.helper.endpoint_capability_cache import EndpointCapabilityCache
 from fuji_server.helper.metadata_provider import MetadataProvider
 
 
@@ -15,6 +16,9 @@ class SPARQLMetadataProvider(MetadataProvider):
 
     ...
 
+    The namespaces bound by an endpoint are cached as its capabilities, endpoints which are not valid SPARQL endpoints
+    are cached as unavailable and not queried again until the cache entry expires.
+
     Methods
     -------
     getMetadataStandards()
@@ -36,6 +40,10 @@ class SPARQLMetadataProvider(MetadataProvider):
 
         """
 
+        if not self.namespaces:
+            capability = EndpointCapabilityCache.get("sparql", self.endpoint)
+            if capability is not None:
+                self.namespaces.extend(capability["namespaces"])
         standards = {v: k for v, k in enumerate(self.namespaces)}
         return standards
 
@@ -50,6 +58,12 @@ class SPARQLMetadataProvider(MetadataProvider):
             Content type of the result of SPARQL query
         """
 
+        capability = EndpointCapabilityCache.get("sparql", self.endpoint)
+        if capability is not None and not capability["available"]:
+            self.logger.warning(
+                f"{self.metric_id} : Skipping SPARQL endpoint which was not available recently -: {self.endpoint}"
+            )
+            return None, None
         wrapper = SPARQLWrapper(self.endpoint)
         wrapper.setQuery(queryString)
         wrapper.setReturnFormat(RDFXML)
@@ -63,6 +77,7 @@ class SPARQLMetadataProvider(MetadataProvider):
                 self.logger.warning(
                     f"{self.metric_id} : Looks like not a valid SPARQL endpoint, content type -: {content_type} "
                 )
+                EndpointCapabilityCache.put("sparql", self.endpoint, {"available": False})
             else:
                 rdf_graph = response.convert()  # rdflib.graph.ConjunctiveGraph
                 # print(rdf_graph.serialize(format='xml'))
@@ -76,17 +91,27 @@ class SPARQLMetadataProvider(MetadataProvider):
                             self.metric_id, len(rdf_graph), content_type
                         )
                     )
-                    graph_text = rdf_graph.serialize(format="ttl")
-
-                    for n in rdf_graph.namespaces():
-                        self.namespaces.append(str(n[1]))
-                    self.getNamespacesfromIRIs(graph_text)
+                    bound_namespaces = [str(n[1]) for n in rdf_graph.namespaces()]
+                    self.namespaces.extend(bound_namespaces)
+                    EndpointCapabilityCache.put(
+                        "sparql", self.endpoint, {"available": True, "namespaces": bound_namespaces}
+                    )
+                    # the IRIs are taken from the graph instead of re-parsing a serialization of it
+                    iris = set()
+                    for triple in rdf_graph:
+                        for node in triple:
+                            if isinstance(node, rdflib.URIRef):
+                                iris.add(str(node))
+                            elif isinstance(node, rdflib.Literal) and node.datatype is not None:
+                                iris.add(str(node.datatype))
+                    self.addNamespacesfromIRIs(iris)
                 else:
                     self.logger.warning(f"{self.metric_id} : SPARQL query returns NO result.")
         except HTTPError as err1:
             self.logger.warning(f"{self.metric_id} : HTTPError -: {err1}")
         except SPARQLExceptions.EndPointNotFound as err2:
             self.logger.warning(f"{self.metric_id} : SPARQLExceptions -: {err2}")
+            EndpointCapabilityCache.put("sparql", self.endpoint, {"available": False})
         return rdf_graph, content_type
 
     def getNamespaces(self):
@@ -0,0 +1,418 @@
+# SPDX-FileCopyrightText: 2020 PANGAEA (https://www.pangaea.de/)
+#
+# SPDX-License-Identifier: MIT
+
+import codecs
+import csv
+import mimetypes
+import re
+import struct
+from urllib.parse import urlparse
+
+from fuji_server.helper.preprocessor import Preprocessor
+
+
+class MimeTypeDetector:
+    """
+    A class which detects the media type of a (possibly truncated) data object locally, without sending it to a Tika
+    server.
+
+    The type is determined by magic bytes, container formats are inspected further: zip archives by the names of
+    their members (OOXML, OpenDocument, zipped shapefiles), HDF5 files by netCDF-4 markers and OLE2 files by their
+    stream names. Text is classified as JSON, XML, Turtle, CSV or plain text. In case the content does not reveal
+    more than a generic type, the media types which are registered in file_formats.yaml for the file extension are
+    added.
+
+    Methods
+    -------
+    detect(content, url)
+        Detect the media types of a data object.
+    detect_content_type(content)
+        Detect the media type from the content.
+    get_extension_types(url)
+        Return the media types registered for the file extension of an URL.
+    extract_text(content, content_types)
+        Return the text of a text data object.
+    extract_header(content, content_types)
+        Return the header of a CSV or TSV data object.
+    """
+
+    SNIFF_SIZE = 65536
+    GENERIC_TYPES = ("application/octet-stream", "text/plain")
+    # (offset, signature, media type), longer signatures first where signatures overlap
+    MAGIC_SIGNATURES = [
+        (0, b"\x89HDF\r\n\x1a\n", "application/x-hdf5"),
+        (0, b"\x0e\x03\x13\x01", "application/x-hdf"),
+        (0, b"CDF\x01", "application/x-netcdf"),
+        (0, b"CDF\x02", "application/x-netcdf"),
+        (0, b"CDF\x05", "application/x-netcdf"),
+        (0, b"\xcd\xf3\x00\x01", "application/x-cdf"),
+        (0, b"\xcd\xf2\x60\x02", "application/x-cdf"),
+        (0, b"GRIB", "application/x-grib"),
+        (0, b"SIMPLE  =", "application/fits"),
+        (128, b"DICM", "application/dicom"),
+        (0, b"MATLAB 5.0 MAT-file", "application/x-matlab-data"),
+        (0, b"<stata_dta>", "application/x-stata-dta"),
+        (0, b"$FL2", "application/x-spss-sav"),
+        (0, b"$FL3", "application/x-spss-sav"),
+        (0, b"root\x00", "application/x-root"),
+        (0, b"\x00\x00\x27\x0a", "application/x-shapefile"),
+        (0, b"%PDF", "application/pdf"),
+        (0, b"PK\x03\x04", "application/zip"),
+        (0, b"PK\x05\x06", "application/zip"),
+        (0, b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1", "application/x-tika-msoffice"),
+        (0, b"\x1f\x8b", "application/gzip"),
+        (0, b"BZh", "application/x-bzip2"),
+        (0, b"\xfd7zXZ\x00", "application/x-xz"),
+        (0, b"7z\xbc\xaf\x27\x1c", "application/x-7z-compressed"),
+        (0, b"\x28\xb5\x2f\xfd", "application/zstd"),
+        (257, b"ustar", "application/x-tar"),
+        (0, b"SQLite format 3\x00", "application/vnd.sqlite3"),
+        (0, b"\x89PNG\r\n\x1a\n", "image/png"),
+        (0, b"\xff\xd8\xff", "image/jpeg"),
+        (0, b"GIF87a", "image/gif"),
+        (0, b"GIF89a", "image/gif"),
+        (0, b"II*\x00", "image/tiff"),
+        (0, b"MM\x00*", "image/tiff"),
+        (0, b"\x00\x00\x00\x0cjP  \r\n\x87\n", "image/jp2"),
+        (0, b"\xff\x4f\xff\x51", "image/jp2"),
+        (0, b"v/1\x01", "image/x-exr"),
+        (0, b"FLIF", "image/flif"),
+        (0, b"\x8aMNG\r\n\x1a\n", "video/x-mng"),
+        (0, b"OggS", "application/ogg"),
+        (0, b"ID3", "audio/mpeg"),
+        (0, b"\x00\x00\x01\xba", "video/mpeg"),
+        (0, b"\x00\x00\x01\xb3", "video/mpeg"),
+        (0, b"0&\xb2u\x8ef\xcf\x11", "video/x-ms-asf"),
+        (0, b"\x06\x0e\x2b\x34\x02\x05\x01\x01", "application/mxf"),
+    ]
+    RIFF_TYPES = {b"WAVE": "audio/x-wav", b"AVI ": "video/x-msvideo", b"WEBP": "image/webp"}
+    IFF_TYPES = {b"AIFF": "audio/x-aiff", b"AIFC": "audio/x-aiff"}
+    FTYP_BRANDS = {
+        b"avif": "image/avif",
+        b"avis": "image/avif-sequence",
+        b"M4A ": "audio/mp4",
+        b"M4V ": "video/mp4",
+        b"mjp2": "video/mj2",
+        b"qt  ": "video/quicktime",
+        b"f4v ": "video/mp4",
+    }
+    OOXML_TYPES = {
+        "xl/": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        "word/": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+        "ppt/": "application/vnd.openxmlformats-officedocument.presentationml.presentation",
+    }
+    OLE2_TYPES = {
+        "Workbook": "application/vnd.ms-excel",
+        "Book": "application/vnd.ms-excel",
+        "WordDocument": "application/msword",
+        "PowerPoint Document": "application/vnd.ms-powerpoint",
+    }
+    # markers of HDF5 files written by the netCDF-4 library
+    NETCDF4_MARKERS = (b"_NCProperties", b"_Netcdf4Dimid", b"_Netcdf4Coordinates", b"_nc3_strict")
+    XML_ROOT_TYPES = {
+        "svg": "image/svg+xml",
+        "sbml": "application/sbml+xml",
+        "math": "application/mathml+xml",
+        "cml": "chemical/x-cml",
+        "COLLADA": "model/vnd.collada+xml",
+        "X3D": "model/x3d+xml",
+        "RDF": "application/rdf+xml",
+        "html": "text/html",
+    }
+    TEXT_TYPES = ("application/json", "application/xml", "application/javascript", "application/x-ipynb+json")
+    HTML_PATTERN = re.compile(rb"<!doctype html|<html", re.IGNORECASE)
+    XML_ROOT_PATTERN = re.compile(rb"<([A-Za-z_][\w.:-]*)")
+    XML_PROLOG_PATTERN = re.compile(rb"\s*(?:<\?.*?\?>|<!--.*?-->|<!DOCTYPE[^>]*>)", re.DOTALL | re.IGNORECASE)
+    GEOJSON_PATTERN = re.compile(rb'"type"\s*:\s*"(?:FeatureCollection|Feature)"')
+    CSV_DELIMITERS = ",;\t|"
+    TABULAR_TYPES = ("text/csv", "text/tab-separated-values")
+    extension_types = {}
+
+    @classmethod
+    def detect(cls, content, url=None):
+        """Detect the media types of a data object.
+
+        Parameters
+        ----------
+        content : bytes
+            The (possibly truncated) content of the data object
+        url : str, optional
+            The URL of the data object, its file extension is used if the content only reveals a generic type
+
+        Returns
+        -------
+        list
+            The detected media types, the most specific one first
+        """
+        content_types = []
+        content_type = cls.detect_content_type(content)
+        if content_type:
+            content_types.append(content_type)
+            if content_type == "application/x-hdf5" and cls.is_netcdf4(content):
+                content_types.insert(0, "application/x-netcdf")
+        if url and (not content_type or content_type in cls.GENERIC_TYPES):
+            for extension_type in cls.get_extension_types(url):
+                if extension_type not in content_types:
+                    content_types.append(extension_type)
+        return content_types
+
+    @classmethod
+    def detect_content_type(cls, content):
+        """Detect the media type from the content.
+
+        Parameters
+        ----------
+        content : bytes
+            The (possibly truncated) content of the data object
+
+        Returns
+        -------
+        str
+            The detected media type, None if the content is empty
+        """
+        if not content:
+            return None
+        head = bytes(content[: cls.SNIFF_SIZE])
+        if head[:4] in (b"RIFF", b"FORM"):
+            riff_types = cls.RIFF_TYPES if head[:4] == b"RIFF" else cls.IFF_TYPES
+            if head[8:12] in riff_types:
+                return riff_types[head[8:12]]
+        if head[4:8] == b"ftyp":
+            return cls.FTYP_BRANDS.get(head[8:12], "video/mp4")
+        # HDF5 files may start with a user block of 512, 1024, 2048... bytes
+        for offset in (512, 1024, 2048, 4096, 8192, 16384, 32768):
+            if head[offset : offset + 8] == b"\x89HDF\r\n\x1a\n":
+                return "application/x-hdf5"
+        for offset, signature, content_type in cls.MAGIC_SIGNATURES:
+            if head[offset : offset + len(signature)] == signature:
+                if content_type == "application/zip":
+                    return cls.detect_zip_type(content)
+                if content_type == "application/x-tika-msoffice":
+                    return cls.detect_ole2_type(head)
+                return content_type
+        return cls.detect_text_type(head)
+
+    @classmethod
+    def is_netcdf4(cls, content):
+        head = bytes(content[: cls.SNIFF_SIZE * 16])
+        return any(marker in head for marker in cls.NETCDF4_MARKERS)
+
+    @classmethod
+    def get_zip_members(cls, content, max_members=1000):
+        """Return the names of the members of a zip archive from the local file headers, which also works for
+        truncated archives. The content of a stored 'mimetype' member (OpenDocument) is returned as well."""
+        members = []
+        mimetype = None
+        for match in re.finditer(b"PK\x03\x04", content):
+            start = match.start()
+            header = content[start : start + 30]
+            if len(header) < 30:
+                break
+            method, compressed_size, name_length, extra_length = struct.unpack("<8xH8xI4xHH", header)
+            name = content[start + 30 : start + 30 + name_length].decode("utf-8", errors="replace")
+            members.append(name)
+            if name == "mimetype" and method == 0:
+                data_start = start + 30 + name_length + extra_length
+                mimetype = content[data_start : data_start + compressed_size].decode("ascii", errors="ignore").strip()
+            if len(members) >= max_members:
+                break
+        return members, mimetype
+
+    @classmethod
+    def detect_zip_type(cls, content):
+        members, mimetype = cls.get_zip_members(content)
+        if mimetype and "/" in mimetype:
+            return mimetype
+        if "[Content_Types].xml" in members:
+            for prefix, content_type in cls.OOXML_TYPES.items():
+                if any(member.startswith(prefix) for member in members):
+                    return content_type
+        if any(member.lower().endswith(".shp") for member in members):
+            return "application/zipped-shapefile"
+        if "META-INF/MANIFEST.MF" in members:
+            return "application/java-archive"
+        return "application/zip"
+
+    @classmethod
+    def detect_ole2_type(cls, head):
+        for stream_name, content_type in cls.OLE2_TYPES.items():
+            if stream_name.encode("utf-16-le") + b"\x00\x00" in head:
+                return content_type
+        return "application/x-tika-msoffice"
+
+    @classmethod
+    def decode(cls, content):
+        """Decode text content, returns None in case the content seems to be binary."""
+        content = bytes(content)
+        for bom, encoding in (
+            (codecs.BOM_UTF8, "utf-8"),
+            (codecs.BOM_UTF16_LE, "utf-16"),
+            (codecs.BOM_UTF16_BE, "utf-16"),
+        ):
+            if content.startswith(bom):
+                return content.decode(encoding, errors="replace").lstrip("\ufeff")
+        if b"\x00" in content[: cls.SNIFF_SIZE]:
+            return None
+        try:
+            return content.decode("utf-8")
+        except UnicodeDecodeError as e:
+            # the content may have been truncated in the middle of a multibyte character
+            if e.reason == "unexpected end of data" and e.start > len(content) - 4:
+                return content[: e.start].decode("utf-8")
+            text = content.decode("latin-1")
+        control_characters = sum(1 for c in text[: cls.SNIFF_SIZE] if ord(c) < 32 and c not in "\r\n\t\f")
+        if control_characters > len(text[: cls.SNIFF_SIZE]) * 0.05:
+            return None
+        return text
+
+    @classmethod
+    def detect_text_type(cls, head):
+        text = cls.decode(head)
+        if text is None:
+            return "application/octet-stream"
+        text = text.lstrip()
+        if text.startswith(("{", "[")):
+            if cls.GEOJSON_PATTERN.search(head):
+                return "application/geo+json"
+            if b'"nbformat"' in head:
+                return "application/x-ipynb+json"
+            return "application/json"
+        if text.startswith("<"):
+            if cls.HTML_PATTERN.search(head[:1024]):
+                return "text/html"
+            return cls.detect_xml_type(head.lstrip(codecs.BOM_UTF8))
+        if text.startswith(("@prefix", "@base", "PREFIX", "BASE")):
+            return "text/turtle"
+        if cls.is_csv(text):
+            return "text/tab-separated-values" if cls.is_csv(text, "\t") else "text/csv"
+        return "text/plain"
+
+    @classmethod
+    def detect_xml_type(cls, head):
+        prolog = cls.XML_PROLOG_PATTERN.match(head)
+        while prolog and prolog.end() > 0:
+            head = head[prolog.end() :]
+            prolog = cls.XML_PROLOG_PATTERN.match(head)
+        root = cls.XML_ROOT_PATTERN.match(head.lstrip())
+        if root:
+            local_name = root.group(1).decode("utf-8", errors="ignore").split(":")[-1]
+            return cls.XML_ROOT_TYPES.get(local_name, "application/xml")
+        return "application/xml"
+
+    @classmethod
+    def is_csv(cls, text, delimiters=None):
+        lines = [line for line in text.splitlines()[:21] if line.strip()]
+        # the last line may be truncated
+        if len(lines) > 2:
+            lines = lines[:-1]
+        if len(lines) < 2:
+            return False
+        try:
+            dialect = csv.Sniffer().sniff("\n".join(lines), delimiters=delimiters or cls.CSV_DELIMITERS)
+        except csv.Error:
+            return False
+        column_counts = {len(row) for row in csv.reader(lines, dialect)}
+        return len(column_counts) == 1 and column_counts.pop() > 1
+
+    @classmethod
+    def get_extension_types(cls, url):
+        """Return the media types registered for the file extension of an URL in file_formats.yaml, or the type
+        guessed by the mimetypes module.
+
+        Parameters
+        ----------
+        url : str
+            The URL of the data object
+
+        Returns
+        -------
+        list
+            The media types
+        """
+        if not cls.extension_types:
+            if not Preprocessor.all_file_formats:
+                Preprocessor.retrieve_all_file_formats()
+            extension_types = {}
+            for file_format in Preprocessor.all_file_formats.values():
+                for extension in file_format.get("ext") or []:
+                    extension = str(extension).lstrip("*").lower()
+                    if extension.startswith(".") and "*" not in extension:
+                        for mime in file_format.get("mime") or []:
+                            if mime not in extension_types.setdefault(extension, []):
+                                extension_types[extension].append(mime)
+            cls.extension_types = extension_types
+        path = urlparse(str(url)).path.lower()
+        extensions = re.findall(r"\.[a-z0-9]+", path.rsplit("/", 1)[-1])
+        extension_types = []
+        # double extensions such as '.numbers.zip' first
+        for extension in ("".join(extensions[-2:]), "".join(extensions[-1:])):
+            if extension in cls.extension_types:
+                extension_types = list(cls.extension_types[extension])
+                break
+        guessed_type = mimetypes.guess_type(path)[0]
+        if guessed_type and guessed_type not in extension_types:
+            extension_types.insert(0, guessed_type)
+        return extension_types
+
+    @classmethod
+    def is_text_type(cls, content_type):
+        content_type = str(content_type)
+        return (
+            content_type.startswith("text/")
+            or content_type in cls.TEXT_TYPES
+            or content_type.endswith(("+xml", "+json"))
+        )
+
+    @classmethod
+    def extract_text(cls, content, content_types):
+        """Return the text of a text data object with normalized whitespace.
+
+        Parameters
+        ----------
+        content : bytes
+            The content of the data object
+        content_types : list
+            The detected media types
+
+        Returns
+        -------
+        str
+            The text, None in case the data object is binary and needs to be parsed by Tika
+        """
+        if not content_types or not cls.is_text_type(content_types[0]):
+            return None
+        text = cls.decode(content)
+        if text is None:
+            return None
+        return re.sub(r"[\r\n\t\s]+", " ", text)
+
+    @classmethod
+    def extract_header(cls, content, content_types):
+        """Return the header of a CSV or TSV data object, the first line after leading '#' comments, with normalized
+        whitespace.
+
+        Parameters
+        ----------
+        content : bytes
+            The content of the data object
+        content_types : list
+            The detected media types
+
+        Returns
+        -------
+        str
+            The header, None in case the data object is not tabular
+        """
+        if not content_types or content_types[0] not in cls.TABULAR_TYPES:
+            return None
+        text = cls.decode(content[: cls.SNIFF_SIZE])
+        if text is None:
+            return None
+        header_lines = []
+        for line in text.splitlines():
+            if line.strip():
+                header_lines.append(line)
+                if not line.lstrip().startswith("#"):
+                    break
+        return re.sub(r"[\r\n\t\s]+", " ", " ".join(header_lines))
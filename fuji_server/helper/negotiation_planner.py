@@ -0,0 +1,195 @@
+# SPDX-FileCopyrightText: 2020 PANGAEA (https://www.pangaea.de/)
+#
+# SPDX-License-Identifier: MIT
+
+import contextvars
+import hashlib
+import threading
+import time
+from urllib.parse import urlparse
+
+
+class NegotiationPlanner:
+    """
+    A class which learns per host whether responses depend on the Accept header, to skip content negotiation
+    attempts which cannot succeed.
+
+    Many landing page hosts ignore the Accept header and return their HTML page for every request, which is ignored
+    by the negotiating metadata collectors. All responses received by the RequestHelper are recorded, and responses
+    for the same URL but different Accept types are compared. A host ignores content negotiation once it answered
+    several non HTML Accept types with HTML, or with identical content of a type none of the Accept types asked for
+    (identical content of a requested type, e.g. JSON-LD for two Accept lists which both contain application/ld+json,
+    is a correct answer). A 'Vary: Accept' header or a response which differs between Accept types shows that a host
+    does content negotiation. URLs which are redirected to another host
+    (e.g. by doi.org or handle.net) are judged by URL instead of host since the resolver behaviour depends on the PID.
+    The observations belong to the assessment running in the current thread (context) and are reset for each
+    assessment, conclusions can be remembered across assessments.
+
+    Methods
+    -------
+    set_host_memory_ttl(ttl)
+        Set the time in seconds hosts are remembered across assessments, 0 disables this.
+    record_response(url, accept_type, status, headers, content_type, content, final_url)
+        Record a received response.
+    should_negotiate(url)
+        Check if content negotiation can succeed for a URL.
+    reset()
+        Reset the observations of an assessment.
+    """
+
+    HTML_TYPES = ("text/html", "application/xhtml+xml")
+    # number of different non HTML Accept types a host has to answer with HTML before negotiation is skipped
+    min_ignored_accept_types = 2
+    # seconds a host's content negotiation behaviour is remembered across assessments, 0 disables this
+    host_memory_ttl = 0
+    # observations of the current assessment: 'responses' url -> {accept type: (is HTML, content type, content
+    # hash)}, 'hosts' host or url -> {'varies': bool, 'ignored': set of Accept types answered with HTML}
+    _observations = contextvars.ContextVar("negotiation_observations", default=None)
+    # host or url -> (varies, time of the conclusion)
+    known_hosts = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def set_host_memory_ttl(cls, ttl):
+        cls.host_memory_ttl = int(ttl)
+
+    @classmethod
+    def get_observations(cls):
+        observations = cls._observations.get()
+        if observations is None:
+            observations = {"responses": {}, "hosts": {}}
+            cls._observations.set(observations)
+        return observations
+
+    @classmethod
+    def reset(cls):
+        cls._observations.set({"responses": {}, "hosts": {}})
+        with cls._lock:
+            now = time.time()
+            cls.known_hosts = {
+                key: known for key, known in cls.known_hosts.items() if now - known[1] < cls.host_memory_ttl
+            }
+
+    @classmethod
+    def is_html_accept_type(cls, accept_type):
+        return str(accept_type).strip().startswith(cls.HTML_TYPES)
+
+    @classmethod
+    def get_host(cls, url):
+        return urlparse(str(url)).netloc.lower()
+
+    @classmethod
+    def get_host_key(cls, url, final_url=None):
+        host = cls.get_host(url)
+        if final_url and cls.get_host(final_url) != host:
+            return str(url)
+        return host
+
+    @classmethod
+    def is_accepted(cls, accept_type, content_type):
+        """Check if a content type is requested by an Accept header (including wildcards)."""
+        content_type = str(content_type).split(";", 1)[0].strip().lower()
+        for accepted in str(accept_type).split(","):
+            accepted = accepted.split(";", 1)[0].strip().lower()
+            if accepted in (content_type, "*/*") or (
+                accepted.endswith("/*") and content_type.startswith(accepted[:-1])
+            ):
+                return True
+        return False
+
+    @classmethod
+    def has_vary_accept(cls, headers):
+        for name, value in headers or []:
+            if name.lower() == "vary":
+                vary = [v.strip().lower() for v in str(value).split(",")]
+                if "accept" in vary or "*" in vary:
+                    return True
+        return False
+
+    @classmethod
+    def record_response(cls, url, accept_type, status, headers, content_type, content, final_url=None):
+        """Record a response and update what is known about the content negotiation of its host.
+
+        Parameters
+        ----------
+        url : str
+            The requested URL
+        accept_type : str
+            The Accept header of the request
+        status : int
+            The HTTP status code
+        headers : list
+            The response headers as (name, value) tuples
+        content_type : str
+            The (detected) content type of the response
+        content : bytes | str
+            The response body
+        final_url : str, optional
+            The URL after redirects
+        """
+        if status != 200 or not content:
+            return
+        if isinstance(content, str):
+            content = content.encode("utf-8")
+        content_type = str(content_type).split(";", 1)[0].strip()
+        is_html = content_type in cls.HTML_TYPES
+        content_hash = hashlib.md5(content).hexdigest()
+        key = cls.get_host_key(url, final_url)
+        observations = cls.get_observations()
+        with cls._lock:
+            host = observations["hosts"].setdefault(key, {"varies": False, "ignored": set()})
+            if cls.has_vary_accept(headers):
+                host["varies"] = True
+            url_responses = observations["responses"].setdefault(str(url), {})
+            for other_accept_type, (other_is_html, other_content_type, other_hash) in url_responses.items():
+                if other_accept_type == accept_type:
+                    continue
+                if is_html and other_is_html:
+                    ignored = True
+                elif other_hash == content_hash:
+                    # the same response for different Accept types is only wrong if none of them asked for it
+                    ignored = not cls.is_accepted(accept_type, content_type) and not cls.is_accepted(
+                        other_accept_type, other_content_type
+                    )
+                    if not ignored:
+                        continue
+                else:
+                    host["varies"] = True
+                    continue
+                for ignored_accept_type in (accept_type, other_accept_type):
+                    if not cls.is_html_accept_type(ignored_accept_type):
+                        host["ignored"].add(ignored_accept_type)
+            url_responses[accept_type] = (is_html, content_type, content_hash)
+            if cls.host_memory_ttl > 0:
+                if host["varies"]:
+                    cls.known_hosts[key] = (True, time.time())
+                elif len(host["ignored"]) >= cls.min_ignored_accept_types:
+                    cls.known_hosts[key] = (False, time.time())
+
+    @classmethod
+    def should_negotiate(cls, url):
+        """Check if content negotiation can succeed for a URL.
+
+        Parameters
+        ----------
+        url : str
+            The URL to negotiate
+
+        Returns
+        -------
+        bool
+            False in case the URL or its host is known to ignore the Accept header
+        """
+        now = time.time()
+        hosts = cls.get_observations()["hosts"]
+        for key in (str(url), cls.get_host(url)):
+            host = hosts.get(key)
+            if host:
+                if host["varies"]:
+                    return True
+                if len(host["ignored"]) >= cls.min_ignored_accept_types:
+                    return False
+            known = cls.known_hosts.get(key)
+            if known and now - known[1] < cls.host_memory_ttl:
+                return known[0]
+        return True
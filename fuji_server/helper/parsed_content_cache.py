@@ -0,0 +1,120 @@
+# SPDX-FileCopyrightText: 2020 PANGAEA (https://www.pangaea.de/)
+#
+# SPDX-License-Identifier: MIT
+
+import hashlib
+import json
+import time
+
+from fuji_server.helper.sqlite_cache import SQLiteCache
+
+
+class ParsedContentCache(SQLiteCache):
+    """
+    A class which caches the Tika parse results of data objects, so files which are referenced by many records (e.g.
+    a shared README.pdf or license file) are only parsed once.
+
+    Entries are keyed by the SHA-256 hash and the byte range of the downloaded content and hold the content types,
+    the Tika status and the normalized text. The cache is stored in a SQLite database (in memory unless a database
+    path has been set) and is bounded by the total size of the cached entries, least recently used entries are
+    evicted first.
+
+    Methods
+    -------
+    get_key(content, offset)
+        Return the cache key of downloaded content.
+    get(key)
+        Return a cached parse result.
+    put(key, parse_result)
+        Cache a parse result.
+    set_db_path(db_path)
+        Set the path of the cache database.
+    set_max_size(max_size)
+        Set the maximum size of the cached entries in bytes.
+    """
+
+    SCHEMA = [
+        "CREATE TABLE IF NOT EXISTS parsed_content (content_key TEXT PRIMARY KEY, content_types TEXT, "
+        "status INTEGER, content_text TEXT, size INTEGER, last_used REAL)",
+        "CREATE INDEX IF NOT EXISTS parsed_content_lru ON parsed_content (last_used)",
+    ]
+    TABLES = ["parsed_content"]
+    max_size = 100000000
+
+    @classmethod
+    def set_max_size(cls, max_size):
+        cls.max_size = int(max_size)
+
+    @classmethod
+    def get_key(cls, content, offset=0):
+        """Return the cache key of downloaded content.
+
+        Parameters
+        ----------
+        content : bytes
+            The downloaded (possibly truncated) content
+        offset : int, optional
+            The position of the content within the data object
+
+        Returns
+        -------
+        str
+            The SHA-256 hash and the byte range of the content
+        """
+        return f"{hashlib.sha256(content).hexdigest()}:{offset}-{offset + len(content)}"
+
+    @classmethod
+    def get(cls, key):
+        """Return a cached parse result.
+
+        Parameters
+        ----------
+        key : str
+            The cache key of the content
+
+        Returns
+        -------
+        dict
+            The parse result with tika_content_type, tika_status and test_data_content_text, None if not cached
+        """
+        with cls._lock:
+            connection = cls.get_connection()
+            row = connection.execute(
+                "SELECT content_types, status, content_text FROM parsed_content WHERE content_key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            connection.execute("UPDATE parsed_content SET last_used = ? WHERE content_key = ?", (time.time(), key))
+            connection.commit()
+        return {"tika_content_type": json.loads(row[0]), "tika_status": row[1], "test_data_content_text": row[2]}
+
+    @classmethod
+    def put(cls, key, parse_result):
+        """Cache a parse result and evict the least recently used entries if the cache is full.
+
+        Parameters
+        ----------
+        key : str
+            The cache key of the content
+        parse_result : dict
+            The parse result with tika_content_type, tika_status and test_data_content_text
+        """
+        content_types = json.dumps(parse_result.get("tika_content_type") or [])
+        content_text = parse_result.get("test_data_content_text") or ""
+        size = len(key) + len(content_types) + len(content_text.encode("utf-8"))
+        if size > cls.max_size:
+            return
+        with cls._lock:
+            connection = cls.get_connection()
+            connection.execute(
+                "INSERT OR REPLACE INTO parsed_content VALUES (?, ?, ?, ?, ?, ?)",
+                (key, content_types, parse_result.get("tika_status"), content_text, size, time.time()),
+            )
+            total_size = connection.execute("SELECT SUM(size) FROM parsed_content").fetchone()[0]
+            while total_size > cls.max_size:
+                oldest_key, oldest_size = connection.execute(
+                    "SELECT content_key, size FROM parsed_content ORDER BY last_used LIMIT 1"
+                ).fetchone()
+                connection.execute("DELETE FROM parsed_content WHERE content_key = ?", (oldest_key,))
+                total_size -= oldest_size
+            connection.commit()
@@ -4,7 +4,10 @@
 
 import logging
 import mimetypes
+import os
+import tempfile
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from urllib.parse import urlparse
 
@@ -64,6 +67,9 @@ class Preprocessor:
     max_content_size = 5000000
     google_custom_search_id = None
     google_custom_search_api_key = None
+    re3data_update_interval = 86400  # seconds
+    datacite_page_size = 1000
+    reference_data_max_workers = 4  # maximum number of concurrent requests when updating reference data
 
     def __new__(cls):
         if cls._instance is None:
@@ -218,43 +224,96 @@ class Preprocessor:
         # cls.formatted_specification['metrics'] = temp_list
         cls.formatted_specification["metrics"] = cls.all_metrics_list
 
+    @classmethod
+    def set_reference_data_max_workers(cls, max_workers):
+        cls.reference_data_max_workers = max(1, int(max_workers))
+
+    @classmethod
+    def dump_reference_yaml(cls, data, path):
+        """Write reference data to a YAML file, the file is replaced atomically so readers never see partial content"""
+        path = Path(path)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                yaml.safe_dump(data, f)
+            os.replace(tmp_path, path)
+        except Exception:
+            os.remove(tmp_path)
+            raise
+
     @classmethod
     def retrieve_datacite_re3repos(cls):
         # retrieve all client id and re3data doi from datacite
-        isDebugMode = True
         re3dict_path = cls.data_dir / "repodois.yaml"
-        repolistdate = re3dict_path.stat().st_mtime
         try:
             # update once a day
-            if time.time() - repolistdate >= 86400:
-                isDebugMode = False
+            if time.time() - re3dict_path.stat().st_mtime >= cls.re3data_update_interval:
+                cls.update_datacite_re3repos()
+                return
         except:
             pass
-        if isDebugMode:
-            with open(re3dict_path) as f:
-                cls.re3repositories = yaml.safe_load(f)
-        else:
-            print("updating re3data dois")
-            p = {"query": "re3data_id:*"}
-            try:
-                req = requests.get(cls.DATACITE_API_REPO, params=p, headers=cls.header, timeout=5)
-                raw = req.json()
-                for r in raw["data"]:
-                    cls.re3repositories[r["id"]] = r["attributes"]["re3data"]
-                while "next" in raw["links"]:
-                    response = requests.get(raw["links"]["next"]).json()
-                    for r in response["data"]:
-                        cls.re3repositories[r["id"]] = r["attributes"]["re3data"]
-                    raw["links"] = response["links"]
-                # fix wrong entry
-                cls.re3repositories["bl.imperial"] = "http://doi.org/10.17616/R3K64N"
-                with open(re3dict_path, "w") as f2:
-                    yaml.safe_dump(cls.re3repositories, f2)
+        cls.load_datacite_re3repos()
 
-            except requests.exceptions.RequestException as e:
-                re3dict_path.touch()
-                print("Preprocessor Error: " + str(e))
-                cls.logger.error(e)
+    @classmethod
+    def load_datacite_re3repos(cls):
+        re3dict_path = cls.data_dir / "repodois.yaml"
+        with open(re3dict_path) as f:
+            cls.re3repositories = yaml.safe_load(f)
+
+    @classmethod
+    def load_licenses(cls):
+        """Load the SPDX licenses from the local licenses.yaml, without downloading the license list."""
+        with open(cls.data_dir / "licenses.yaml") as f:
+            data = yaml.safe_load(f)
+        if data:
+            cls.set_licenses(data)
+
+    @classmethod
+    def update_datacite_re3repos(cls):
+        """Harvest the client ids and re3data dois from DataCite and swap them in once complete,
+        requests keep on reading the previous dictionary until then."""
+        re3dict_path = cls.data_dir / "repodois.yaml"
+        print("updating re3data dois")
+        try:
+            re3repositories = cls.harvest_datacite_re3repos()
+            cls.re3repositories = re3repositories
+            cls.dump_reference_yaml(re3repositories, re3dict_path)
+        except (requests.exceptions.RequestException, KeyError, ValueError) as e:
+            re3dict_path.touch()
+            print("Preprocessor Error: " + str(e))
+            cls.logger.error(e)
+            if not cls.re3repositories:
+                cls.load_datacite_re3repos()
+
+    @classmethod
+    def harvest_datacite_re3repos(cls):
+        """Retrieve all DataCite repositories which have a re3data id, the result pages are requested concurrently
+        by at most reference_data_max_workers threads.
+
+        Returns
+        -------
+        dict
+            DataCite client id -> re3data doi
+        """
+
+        def get_page(page_number):
+            p = {"query": "re3data_id:*", "page[size]": cls.datacite_page_size, "page[number]": page_number}
+            req = requests.get(cls.DATACITE_API_REPO, params=p, headers=cls.header, timeout=30)
+            req.raise_for_status()
+            return req.json()
+
+        pages = [get_page(1)]
+        total_pages = int(pages[0].get("meta", {}).get("totalPages") or 1)
+        if total_pages > 1:
+            with ThreadPoolExecutor(max_workers=cls.reference_data_max_workers) as executor:
+                pages.extend(executor.map(get_page, range(2, total_pages + 1)))
+        re3repositories = {}
+        for page in pages:
+            for r in page["data"]:
+                re3repositories[r["id"]] = r["attributes"]["re3data"]
+        # fix wrong entry
+        re3repositories["bl.imperial"] = "http://doi.org/10.17616/R3K64N"
+        return re3repositories
 
     @classmethod
     def get_access_rights(cls):
@@ -266,49 +325,69 @@ class Preprocessor:
 
     @classmethod
     def retrieve_licenses(cls, isDebugMode):
-        data = None
-        path = cls.data_dir / "licenses.yaml"
         # The repository can be found at https://github.com/spdx/license-list-data
         # https://spdx.org/spdx-license-list/license-list-overview
         if isDebugMode:  # use local file instead of downloading the file online
-            with open(path) as f:
-                data = yaml.safe_load(f)
+            cls.load_licenses()
         else:
-            # cls.SPDX_URL = license_path
+            data = cls.download_licenses()
+            if data:
+                cls.set_licenses(data)
+
+    @classmethod
+    def download_licenses(cls):
+        """Download the SPDX license list and store it in the data directory
+
+        Returns
+        -------
+        list
+            SPDX licenses or None in case the download failed
+        """
+        data = None
+        path = cls.data_dir / "licenses.yaml"
+        # cls.SPDX_URL = license_path
+        try:
+            r = requests.get(cls.SPDX_URL, timeout=30)
             try:
-                r = requests.get(cls.SPDX_URL)
-                try:
-                    if r.status_code == 200:
-                        resp = r.json()
-                        data = resp["licenses"]
-                        for d in data:
-                            d["name"] = d["name"].lower()  # convert license name to lowercase
-                        with open(path, "w") as f:
-                            yaml.safe_dump(data, f)
-                except yaml.YAMLError as exc1:
-                    cls.logger.error(exc1)
-            except requests.exceptions.RequestException as exc2:
-                cls.logger.error(exc2)
+                if r.status_code == 200:
+                    resp = r.json()
+                    data = resp["licenses"]
+                    for d in data:
+                        d["name"] = d["name"].lower()  # convert license name to lowercase
+                    cls.dump_reference_yaml(data, path)
+            except yaml.YAMLError as exc1:
+                cls.logger.error(exc1)
+        except requests.exceptions.RequestException as exc2:
+            cls.logger.error(exc2)
+        return data
+
+    @classmethod
+    def update_licenses(cls):
+        data = cls.download_licenses()
         if data:
-            cls.all_licenses = data
-            for licenceitem in cls.all_licenses:
-                seeAlso = licenceitem.get("seeAlso")
-                # some cleanup to add modified licence URLs
-                for licenceurl in seeAlso:
-                    if "http:" in licenceurl:
-                        altURL = licenceurl.replace("http:", "https:")
-                    else:
-                        altURL = licenceurl.replace("https:", "http:")
-                    if altURL not in seeAlso:
-                        seeAlso.append(altURL)
-                    if licenceurl.endswith("/legalcode"):
-                        altURL = licenceurl.replace("/legalcode", "")
-                        seeAlso.append(altURL)
-            cls.total_licenses = len(data)
-            cls.license_names = [d["name"] for d in data if "name" in d]
-            # referenceNumber = [r['referenceNumber'] for r in data if 'referenceNumber' in r]
-            # seeAlso = [s['seeAlso'] for s in data if 'seeAlso' in s]
-            # cls.license_urls = dict(zip(referenceNumber, seeAlso))
+            cls.set_licenses(data)
+
+    @classmethod
+    def set_licenses(cls, data):
+        """Prepare the license list and swap it in"""
+        for licenceitem in data:
+            seeAlso = licenceitem.get("seeAlso")
+            # some cleanup to add modified licence URLs
+            for licenceurl in seeAlso:
+                if "http:" in licenceurl:
+                    altURL = licenceurl.replace("http:", "https:")
+                else:
+                    altURL = licenceurl.replace("https:", "http:")
+                if altURL not in seeAlso:
+                    seeAlso.append(altURL)
+                if licenceurl.endswith("/legalcode"):
+                    altURL = licenceurl.replace("/legalcode", "")
+                    seeAlso.append(altURL)
+        license_names = [d["name"] for d in data if "name" in d]
+        # referenceNumber = [r['referenceNumber'] for r in data if 'referenceNumber' in r]
+        # seeAlso = [s['seeAlso'] for s in data if 'seeAlso' in s]
+        # cls.license_urls = dict(zip(referenceNumber, seeAlso))
+        cls.all_licenses, cls.license_names, cls.total_licenses = data, license_names, len(data)
 
     @classmethod
     def retrieve_metadata_standards_uris(cls):
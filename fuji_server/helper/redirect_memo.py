@@ -0,0 +1,126 @@
+# SPDX-FileCopyrightText: 2020 PANGAEA (https://www.pangaea.de/)
+#
+# SPDX-License-Identifier: MIT
+
+import contextvars
+import threading
+from urllib.parse import urlparse
+
+
+class RedirectMemo:
+    """
+    A class which remembers the redirect hops of requests, so repeated requests of the same URL (e.g. a DOI or handle
+    which is negotiated several times during an assessment) can skip known redirects and go straight to their target.
+
+    Each hop is remembered per URL and Accept class (the first media type of the Accept header). A known hop is
+    reused for requests with the same Accept class. For other Accept classes a hop is only reused in case it has been
+    observed with the same target for at least two Accept classes and does not depend on the Accept header, which
+    is the case if the response has a 'Vary: Accept' header, different targets have been observed or the host is a
+    DOI resolver (doi.org redirects e.g. DataCite metadata types to data.crosscite.org). Redirects which set cookies
+    are never skipped. The skipped hops are reported as if they had been followed.
+
+    Methods
+    -------
+    get_accept_class(accept_type)
+        Return the Accept class of an Accept header.
+    record(url, accept_type, redirects)
+        Record the redirect hops of a request.
+    get_shortcut(url, accept_type)
+        Return the URL to request and the known redirect hops which are skipped.
+    reset()
+        Forget all redirects of the current assessment.
+    """
+
+    # resolvers which redirect depending on the Accept header
+    ACCEPT_DEPENDENT_HOSTS = ("doi.org", "dx.doi.org", "www.doi.org")
+    MAX_HOPS = 20
+    # hops of the assessment running in the current thread (context):
+    # url -> {'targets': {accept class: (target url, status code)}, 'accept_dependent': bool, 'sets_cookie': bool}
+    _hops = contextvars.ContextVar("redirect_hops", default=None)
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_hops(cls):
+        hops = cls._hops.get()
+        if hops is None:
+            hops = {}
+            cls._hops.set(hops)
+        return hops
+
+    @classmethod
+    def reset(cls):
+        cls._hops.set({})
+
+    @classmethod
+    def get_accept_class(cls, accept_type):
+        return str(accept_type).split(",", 1)[0].split(";", 1)[0].strip().lower()
+
+    @classmethod
+    def record(cls, url, accept_type, redirects):
+        """Record the redirect hops of a request.
+
+        Parameters
+        ----------
+        url : str
+            The requested URL
+        accept_type : str
+            The Accept header of the request
+        redirects : list
+            The followed redirects as (target url, status code, Vary header, sets cookie) tuples
+        """
+        accept_class = cls.get_accept_class(accept_type)
+        source_url = url
+        hops = cls.get_hops()
+        with cls._lock:
+            for target_url, status_code, vary, sets_cookie in redirects:
+                hop = hops.setdefault(source_url, {"targets": {}, "accept_dependent": False, "sets_cookie": False})
+                hop["targets"][accept_class] = (target_url, status_code)
+                vary = [v.strip().lower() for v in str(vary or "").split(",")]
+                if (
+                    "accept" in vary
+                    or "*" in vary
+                    or urlparse(source_url).netloc.lower() in cls.ACCEPT_DEPENDENT_HOSTS
+                    or len(set(target for target, _ in hop["targets"].values())) > 1
+                ):
+                    hop["accept_dependent"] = True
+                if sets_cookie:
+                    hop["sets_cookie"] = True
+                source_url = target_url
+
+    @classmethod
+    def get_shortcut(cls, url, accept_type):
+        """Return the URL to request and the known redirect hops which can be skipped.
+
+        Parameters
+        ----------
+        url : str
+            The URL to request
+        accept_type : str
+            The Accept header of the request
+
+        Returns
+        -------
+        str
+            The URL to request
+        list
+            The skipped redirects as (target url, status code) tuples
+        """
+        accept_class = cls.get_accept_class(accept_type)
+        skipped = []
+        hops = cls.get_hops()
+        with cls._lock:
+            while len(skipped) < cls.MAX_HOPS:
+                hop = hops.get(url)
+                if not hop or hop["sets_cookie"]:
+                    break
+                if accept_class in hop["targets"]:
+                    target = hop["targets"][accept_class]
+                elif not hop["accept_dependent"] and len(hop["targets"]) >= 2:
+                    target = next(iter(hop["targets"].values()))
+                else:
+                    break
+                if target[0] == url or target in skipped:
+                    break
+                skipped.append(target)
+                url = target[0]
+        return url, skipped
@@ -0,0 +1,153 @@
+# SPDX-FileCopyrightText: 2020 PANGAEA (https://www.pangaea.de/)
+#
+# SPDX-License-Identifier: MIT
+
+import logging
+import threading
+import time
+from pathlib import Path
+
+from fuji_server.helper.preprocessor import Preprocessor
+from fuji_server.helper.repository_helper import RepositoryHelper
+
+logger = logging.getLogger(__name__)
+
+
+class ReferenceDataRefresher:
+    """
+    A background service which periodically refreshes the reference data of the Preprocessor.
+
+    Refresh tasks (e.g. the DataCite re3data repository list or the SPDX license list) run on a daemon thread,
+    one after another, so assessment requests never wait for downloads. Each task builds the new reference data
+    completely before it is swapped into the Preprocessor, requests always read the complete previous or new data.
+    A task is due once its interval has passed since the last refresh, which is initially the modification time of
+    its reference file.
+
+    Methods
+    -------
+    add_task(name, interval, refresh, reference_file)
+        Add a refresh task.
+    run_pending(now)
+        Run all tasks which are due.
+    start()
+        Start the background thread.
+    stop(timeout)
+        Stop the background thread.
+    from_config(config)
+        Create a refresher with the schedules given in the server config.
+    """
+
+    # maximum time the thread sleeps before the schedule is checked again
+    max_sleep = 3600
+
+    def __init__(self):
+        self.tasks = {}
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def add_task(self, name, interval, refresh, reference_file=None):
+        """Add a refresh task, tasks with an interval <= 0 are disabled.
+
+        Parameters
+        ----------
+        name : str
+            Name of the task
+        interval : int | float
+            Refresh interval in seconds
+        refresh : callable
+            Function which refreshes the reference data
+        reference_file : str | Path, optional
+            File which stores the reference data, its modification time is used as time of the last refresh
+        """
+        if interval and interval > 0:
+            next_run = time.time()
+            if reference_file and Path(reference_file).exists():
+                next_run = Path(reference_file).stat().st_mtime + interval
+            self.tasks[name] = {"interval": interval, "refresh": refresh, "next_run": next_run}
+
+    def get_next_run(self):
+        if not self.tasks:
+            return None
+        return min(task["next_run"] for task in self.tasks.values())
+
+    def run_pending(self, now=None):
+        """Run all tasks which are due, errors are logged and the task is retried after its interval.
+
+        Returns
+        -------
+        list
+            names of the tasks which have been run
+        """
+        if now is None:
+            now = time.time()
+        done = []
+        for name, task in self.tasks.items():
+            if task["next_run"] <= now and not self._stop_event.is_set():
+                logger.info(f"Refreshing reference data: {name}")
+                try:
+                    task["refresh"]()
+                except Exception as e:
+                    logger.error(f"Refreshing reference data {name} failed: {e}")
+                task["next_run"] = time.time() + task["interval"]
+                done.append(name)
+        return done
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            self.run_pending()
+            sleep_time = min(self.max_sleep, max(0, self.get_next_run() - time.time()))
+            self._stop_event.wait(sleep_time)
+
+    def start(self):
+        if self.tasks and (self._thread is None or not self._thread.is_alive()):
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, name="reference-data-refresher", daemon=True)
+            self._thread.start()
+        return self._thread
+
+    def stop(self, timeout=None):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    @classmethod
+    def from_config(cls, config):
+        """Create a refresher for the re3data repository list, the re3data repository profiles and the SPDX license
+        list.
+
+        Parameters
+        ----------
+        config : configparser.ConfigParser
+            The server config, the [SERVICE] options re3data_refresh_interval, re3data_profile_refresh_interval and
+            spdx_refresh_interval give the intervals in seconds (0 disables a refresh), reference_data_max_workers
+            limits concurrent requests
+
+        Returns
+        -------
+        ReferenceDataRefresher
+        """
+        service_config = config["SERVICE"]
+        Preprocessor.set_reference_data_max_workers(
+            service_config.get("reference_data_max_workers", Preprocessor.reference_data_max_workers)
+        )
+        refresher = cls()
+        refresher.add_task(
+            "re3data repositories",
+            float(service_config.get("re3data_refresh_interval", Preprocessor.re3data_update_interval)),
+            Preprocessor.update_datacite_re3repos,
+            Preprocessor.data_dir / "repodois.yaml",
+        )
+        refresher.add_task(
+            "re3data profiles",
+            float(service_config.get("re3data_profile_refresh_interval", 604800)),
+            RepositoryHelper.update_re3data_profiles,
+            RepositoryHelper.re3data_profiles_path,
+        )
+        refresher.add_task(
+            "SPDX licenses",
+            float(service_config.get("spdx_refresh_interval", 604800)),
+            Preprocessor.update_licenses,
+            Preprocessor.data_dir / "licenses.yaml",
+        )
+        return refresher
@@ -2,25 +2,41 @@
 #
 # SPDX-License-Identifier: MIT
 
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import idutils
+import requests
 from lxml import etree
+from requests.adapters import HTTPAdapter
 from tldextract import extract
 
+import yaml
 from fuji_server.helper.preprocessor import Preprocessor
 from fuji_server.helper.request_helper import AcceptTypes, RequestHelper
 
 
 class RepositoryHelper:
-    DATACITE_REPOSITORIES = Preprocessor.getRE3repositories()
     ns = {"r3d": "http://www.re3data.org/schema/2-2"}
     RE3DATA_APITYPES = ["OAI-PMH", "SOAP", "SPARQL", "SWORD", "OpenDAP"]
+    # parsed re3data records (name, url, apis, standards) by re3data DOI, shared by all assessments; the store is
+    # pre-warmed for all DataCite repositories by the reference data refresher and saved to re3data_profiles_path
+    re3data_profiles = {}
+    re3data_profiles_loaded = False
+    re3data_profiles_path = Preprocessor.data_dir / "re3data_profiles.yaml"
+    # re3data DOIs without a retrievable record are not queried again for this many seconds
+    re3data_miss_ttl = 3600
+    re3data_misses = {}
+    # seconds to wait for a re3data API response in the background refresh
+    re3data_timeout = 30
+    _profiles_lock = threading.Lock()
 
     def __init__(self, client_id, logger, landingpage):
         self.client_id = client_id
         self.logger = logger
         self.landing_page_url = landingpage
         # self.pid_scheme = pidscheme
-        self.re3metadata_raw = None
         self.repository_name = None
         self.repository_url = None
         self.repo_apis = {}
@@ -30,52 +46,226 @@ class RepositoryHelper:
 
     def lookup_re3data(self):
         if self.client_id:  # and self.pid_scheme:
-            re3doi = RepositoryHelper.DATACITE_REPOSITORIES.get(self.client_id)  # {client_id,re3doi}
-            if re3doi:
-                if idutils.is_doi(re3doi):
-                    short_re3doi = idutils.normalize_pid(re3doi, scheme="doi")  # https://doi.org/10.17616/R3XS37
-                else:
-                    re3doi = None
+            re3doi = Preprocessor.getRE3repositories().get(self.client_id)  # {client_id,re3doi}
+            if re3doi and not idutils.is_doi(re3doi):
+                re3doi = None
 
             # pid -> clientId -> repo doi-> re3id, and query repository metadata from re3api
             if re3doi:
                 self.logger.info("FsF-R1.3-01M : Found match re3data (DOI-based) record")
-                query_url = (
-                    Preprocessor.RE3DATA_API + "?query=" + short_re3doi
-                )  # https://re3data.org/api/beta/repositories?query=
-                q = RequestHelper(url=query_url)
-                q.setAcceptType(AcceptTypes.xml)
-                re_source, xml = q.content_negotiate(metric_id="RE3DATA")
                 try:
-                    if isinstance(xml, bytes):
-                        xml = xml.decode().encode()
-                    root = etree.fromstring(xml)
-
-                    # <link href="https://www.re3data.org/api/beta/repository/r3d100010134" rel="self" />
-                    re3link = root.xpath("//link")[0].attrib["href"]
-                    if re3link is not None:
-                        self.logger.info("FsF-R1.3-01M : Found match re3data metadata record -: " + str(re3link))
-                        # query reposiroty metadata
-                        q2 = RequestHelper(url=re3link)
-                        q2.setAcceptType(AcceptTypes.xml)
-                        re3_source, re3_response = q2.content_negotiate(metric_id="RE3DATA")
-                        self.re3metadata_raw = re3_response
-                        self.parseRe3data()
+                    # the stored profile is used if available, so assessments do not query re3data
+                    profile = RepositoryHelper.get_re3data_profile(re3doi)
+                    if profile is not None:
+                        self.logger.info("FsF-R1.3-01M : Using stored re3data metadata record -: " + str(re3doi))
+                    elif RepositoryHelper.is_re3data_miss(re3doi):
+                        self.logger.warning(
+                            "FsF-R1.3-01M : No re3data metadata record found recently, not queried again -: "
+                            + str(re3doi)
+                        )
+                    else:
+                        try:
+                            profile = RepositoryHelper.retrieve_re3data_profile(re3doi, self.logger)
+                        except Exception:
+                            RepositoryHelper.add_re3data_miss(re3doi)
+                            raise
+                        if profile is not None:
+                            with RepositoryHelper._profiles_lock:
+                                RepositoryHelper.re3data_profiles[re3doi] = profile
+                        else:
+                            RepositoryHelper.add_re3data_miss(re3doi)
+                            self.logger.warning("FsF-R1.3-01M : No re3data metadata record found -: " + str(re3doi))
+                    if profile is not None:
+                        self.applyRe3dataProfile(profile)
                 except Exception as e:
                     self.logger.warning("FsF-R1.3-01M : Malformed re3data (DOI-based) record received: " + str(e))
             else:
                 self.logger.warning("FsF-R1.3-01M : No DOI of client id is available from datacite api")
 
-    def parseRe3data(self):
+    @classmethod
+    def load_re3data_profiles(cls):
+        """Load the stored re3data profiles, profiles which were retrieved since are kept."""
+        profiles = {}
+        if cls.re3data_profiles_path.exists():
+            with open(cls.re3data_profiles_path) as f:
+                profiles = yaml.safe_load(f) or {}
+        with cls._profiles_lock:
+            cls.re3data_profiles = {**profiles, **cls.re3data_profiles}
+            cls.re3data_profiles_loaded = True
+
+    @classmethod
+    def get_re3data_profile(cls, re3doi):
+        """Return the stored re3data profile of a repository.
+
+        Parameters
+        ----------
+        re3doi : str
+            The re3data DOI of the repository
+
+        Returns
+        -------
+        dict
+            The repository name, url, apis and standards, None if no profile is stored
+        """
+        if not cls.re3data_profiles_loaded:
+            cls.load_re3data_profiles()
+        return cls.re3data_profiles.get(re3doi)
+
+    @classmethod
+    def is_re3data_miss(cls, re3doi):
+        """Check if the re3data record of a repository could not be retrieved within the miss time to live.
+
+        Parameters
+        ----------
+        re3doi : str
+            The re3data DOI of the repository
+
+        Returns
+        -------
+        bool
+            True if the last retrieval failed or found no record and has not expired
+        """
+        with cls._profiles_lock:
+            expires = cls.re3data_misses.get(re3doi)
+            if expires is not None and expires <= time.time():
+                del cls.re3data_misses[re3doi]
+                expires = None
+        return expires is not None
+
+    @classmethod
+    def add_re3data_miss(cls, re3doi):
+        """Remember that the re3data record of a repository could not be retrieved, it is not queried again until
+        re3data_miss_ttl seconds have passed."""
+        with cls._profiles_lock:
+            cls.re3data_misses[re3doi] = time.time() + cls.re3data_miss_ttl
+
+    @classmethod
+    def get_re3data_xml(cls, url, session=None):
+        """Request a re3data API response, with a requests session or with the RequestHelper of the assessment.
+
+        Parameters
+        ----------
+        url : str
+            The re3data API URL
+        session : requests.Session, optional
+            Session of the background refresh; without a session the RequestHelper is used
+
+        Returns
+        -------
+        bytes
+            The XML response
+        """
+        if session is not None:
+            response = session.get(url, headers={"Accept": AcceptTypes.xml.value}, timeout=cls.re3data_timeout)
+            response.raise_for_status()
+            return response.content
+        q = RequestHelper(url=url)
+        q.setAcceptType(AcceptTypes.xml)
+        re_source, xml = q.content_negotiate(metric_id="RE3DATA")
+        return xml
+
+    @classmethod
+    def retrieve_re3data_profile(cls, re3doi, logger=None, session=None):
+        """Query the re3data API for the record of a repository and parse it.
+
+        Parameters
+        ----------
+        re3doi : str
+            The re3data DOI of the repository
+        logger : logging.Logger, optional
+            Logger of the assessment
+        session : requests.Session, optional
+            Session of the background refresh, which does not use the request caches of the assessments
+
+        Returns
+        -------
+        dict
+            The repository name, url, apis and standards, None if no re3data record was found
+        """
+        short_re3doi = idutils.normalize_pid(re3doi, scheme="doi")  # https://doi.org/10.17616/R3XS37
+        query_url = (
+            Preprocessor.RE3DATA_API + "?query=" + short_re3doi
+        )  # https://re3data.org/api/beta/repositories?query=
+        xml = cls.get_re3data_xml(query_url, session)
+        if isinstance(xml, bytes):
+            xml = xml.decode().encode()
+        root = etree.fromstring(xml)
+        # <link href="https://www.re3data.org/api/beta/repository/r3d100010134" rel="self" />
+        links = root.xpath("//link")
+        if not links:
+            return None
+        re3link = links[0].attrib["href"]
+        if logger:
+            logger.info("FsF-R1.3-01M : Found match re3data metadata record -: " + str(re3link))
+        # query reposiroty metadata
+        return cls.parse_re3data_profile(cls.get_re3data_xml(re3link, session))
+
+    @classmethod
+    def parse_re3data_profile(cls, re3metadata):
+        """Parse the name, url, APIs and metadata standard URLs of a re3data repository record.
+
+        Parameters
+        ----------
+        re3metadata : bytes
+            The re3data record (XML)
+
+        Returns
+        -------
+        dict
+            The repository name, url, apis (url by API type) and standards
+        """
         # http://schema.re3data.org/3-0/re3data-example-V3-0.xml
-        root = etree.fromstring(self.re3metadata_raw)
-        # ns = {k: v for k, v in root.nsmap.items() if k}
-        name = root.xpath("//r3d:repositoryName", namespaces=RepositoryHelper.ns)
-        url = root.xpath("//r3d:repositoryURL", namespaces=RepositoryHelper.ns)
-        if name:
-            self.repository_name = name[0].text
-        if url:
-            self.repository_url = url[0].text
+        root = etree.fromstring(re3metadata)
+        name = root.xpath("//r3d:repositoryName", namespaces=cls.ns)
+        url = root.xpath("//r3d:repositoryURL", namespaces=cls.ns)
+        apis = {}
+        for a in root.xpath("//r3d:api", namespaces=cls.ns):
+            if a.attrib.get("apiType") in cls.RE3DATA_APITYPES:
+                apis[a.attrib["apiType"]] = a.text
+        # standards = root.xpath('//r3d:metadataStandard/r3d:metadataStandardName', namespaces=RepositoryHelper.ns)
+        standards = root.xpath("//r3d:metadataStandard/r3d:metadataStandardURL", namespaces=cls.ns)
+        return {
+            "name": name[0].text if name else None,
+            "url": url[0].text if url else None,
+            "apis": apis,
+            "standards": [s.text for s in standards],
+        }
+
+    @classmethod
+    def update_re3data_profiles(cls):
+        """Retrieve the re3data profiles of all DataCite repositories with a re3data DOI and swap them in once
+        complete, at most reference_data_max_workers requests run concurrently. Profiles which could not be
+        retrieved are kept."""
+        re3dois = sorted({doi for doi in Preprocessor.getRE3repositories().values() if doi and idutils.is_doi(doi)})
+
+        def retrieve(re3doi):
+            try:
+                return cls.retrieve_re3data_profile(re3doi, session=session)
+            except Exception as e:
+                Preprocessor.logger.warning(f"Could not retrieve re3data record {re3doi}: {e}")
+                return None
+
+        # a plain session, the responses are not kept in the request caches of the assessments
+        with requests.Session() as session:
+            adapter = HTTPAdapter(pool_maxsize=Preprocessor.reference_data_max_workers)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            with ThreadPoolExecutor(max_workers=Preprocessor.reference_data_max_workers) as executor:
+                retrieved = dict(zip(re3dois, executor.map(retrieve, re3dois)))
+        if not cls.re3data_profiles_loaded:
+            cls.load_re3data_profiles()
+        with cls._profiles_lock:
+            profiles = {
+                re3doi: retrieved.get(re3doi) or cls.re3data_profiles.get(re3doi)
+                for re3doi in set(re3dois) | set(cls.re3data_profiles)
+            }
+            cls.re3data_profiles = {re3doi: profile for re3doi, profile in profiles.items() if profile is not None}
+            profiles = dict(cls.re3data_profiles)
+        Preprocessor.dump_reference_yaml(profiles, cls.re3data_profiles_path)
+
+    def applyRe3dataProfile(self, profile):
+        self.repository_name = profile.get("name")
+        self.repository_url = profile.get("url")
         repo_domain_verified = False
         repo_url_parts = extract(self.repository_url)
         landing_url_parts = extract(self.landing_page_url)
@@ -95,14 +285,8 @@ class RepositoryHelper:
                 + str(landing_domain)
             )
         if repo_domain_verified:
-            apis = root.xpath("//r3d:api", namespaces=RepositoryHelper.ns)
-            for a in apis:
-                apiType = a.attrib["apiType"]
-                if apiType in RepositoryHelper.RE3DATA_APITYPES:
-                    self.repo_apis[a.attrib["apiType"]] = a.text
-            # standards = root.xpath('//r3d:metadataStandard/r3d:metadataStandardName', namespaces=RepositoryHelper.ns)
-            standards = root.xpath("//r3d:metadataStandard/r3d:metadataStandardURL", namespaces=RepositoryHelper.ns)
-            self.repo_standards = [s.text for s in standards]
+            self.repo_apis = dict(profile.get("apis") or {})
+            self.repo_standards = list(profile.get("standards") or [])
             # print('#### ', self.repo_standards)
 
     def getRe3MetadataStandards(self):
@@ -2,22 +2,24 @@
 #
 # SPDX-License-Identifier: MIT
 
-import gzip
+import contextvars
 import http.cookiejar
 import json
 import mimetypes
 import re
 import ssl
-import sys
 import urllib
+import zlib
 from enum import Enum
 
 import lxml
 import rdflib
-from tika import parser
 
 from fuji_server.helper.metadata_collector import MetadataFormats
+from fuji_server.helper.negotiation_planner import NegotiationPlanner
 from fuji_server.helper.preprocessor import Preprocessor
+from fuji_server.helper.redirect_memo import RedirectMemo
+from fuji_server.helper.response_reader import ResponseReader
 
 
 class FUJIHTTPRedirectHandler(urllib.request.HTTPRedirectHandler):
@@ -26,11 +28,21 @@ class FUJIHTTPRedirectHandler(urllib.request.HTTPRedirectHandler):
         self.redirect_list = []
         self.redirect_url = None
         self.redirect_status_list = []
+        # (newurl, code, Vary header, sets cookie) of the followed redirects for the RedirectMemo
+        self.redirect_hop_list = []
+
+    def set_known_redirects(self, redirect_url, known_redirects):
+        """Start from known redirects which are skipped, they are reported as if they had been followed."""
+        self.redirect_url = redirect_url if known_redirects else None
+        self.redirect_list = [redirect for redirect, _ in known_redirects]
+        self.redirect_status_list = list(known_redirects)
+        self.redirect_hop_list = []
 
     def redirect_request(self, req, fp, code, msg, hdrs, newurl):
         self.redirect_url = newurl
         self.redirect_list.append(newurl)
         self.redirect_status_list.append((newurl, code))
+        self.redirect_hop_list.append((newurl, code, hdrs.get("Vary"), hdrs.get("Set-Cookie") is not None))
         return super().redirect_request(req, fp, code, msg, hdrs, newurl)
 
 
@@ -61,7 +73,8 @@ class AcceptTypes(Enum):
 
 
 class RequestHelper:
-    checked_content = {}
+    # checked responses of the assessment running in the current thread (context), by hash of URL and content type
+    _checked_content = contextvars.ContextVar("checked_content", default=None)
 
     def __init__(self, url, logInst: object = None):
         self.user_agent = "F-UJI"
@@ -86,14 +99,27 @@ class RequestHelper:
         self.content_size = 0
         # maximum size which will be downloaded and analysed by F-UJU
         self.max_content_size = Preprocessor.max_content_size
+        self.checked_content = self.get_checked_content()
         self.checked_content_hash = None
         self.authtoken = None
         self.tokentype = None
         # print('REQUEST HELPER CACHE: ', len(self.checked_content))
 
+    @classmethod
+    def get_checked_content(cls):
+        checked_content = cls._checked_content.get()
+        if checked_content is None:
+            checked_content = {}
+            cls._checked_content.set(checked_content)
+        return checked_content
+
     @classmethod
     def reset_cache(cls):
-        cls.checked_content = {}
+        """Reset the request caches of the assessment running in the current thread, concurrent assessments in
+        other threads keep theirs."""
+        cls._checked_content.set({})
+        NegotiationPlanner.reset()
+        RedirectMemo.reset()
 
     def setAuthToken(self, authtoken, tokentype):
         if isinstance(authtoken, str):
@@ -154,9 +180,15 @@ class RequestHelper:
                 request_headers = {"Accept": self.accept_type, "User-Agent": self.user_agent}
                 if self.authtoken:
                     request_headers["Authorization"] = self.tokentype + " " + self.authtoken
-                tp_request = urllib.request.Request(self.request_url, headers=request_headers)
+                # skip redirects which are already known for this URL
+                request_url, known_redirects = RedirectMemo.get_shortcut(self.request_url, self.accept_type)
+                if known_redirects:
+                    self.logger.info(f"{metric_id} : Skipping known redirects -: {self.request_url} -> {request_url}")
+                redirect_handler.set_known_redirects(request_url, known_redirects)
+                tp_request = urllib.request.Request(request_url, headers=request_headers)
                 try:
                     tp_response = opener.open(tp_request, timeout=10)
+                    RedirectMemo.record(request_url, self.accept_type, redirect_handler.redirect_hop_list)
                     self.redirect_list = redirect_handler.redirect_list
                     self.redirect_status_list = redirect_handler.redirect_status_list
                     self.redirect_url = redirect_handler.redirect_url
@@ -180,8 +212,14 @@ class RequestHelper:
                         )
                         try:
                             request_headers["User-Agent"] = self.browser_like_user_agent
-                            tp_request = urllib.request.Request(self.request_url, headers=request_headers)
+                            # the redirects of the failed request are followed again
+                            redirect_handler.set_known_redirects(request_url, known_redirects)
+                            tp_request = urllib.request.Request(request_url, headers=request_headers)
                             tp_response = opener.open(tp_request, timeout=10)
+                            RedirectMemo.record(request_url, self.accept_type, redirect_handler.redirect_hop_list)
+                            self.redirect_list = redirect_handler.redirect_list
+                            self.redirect_status_list = redirect_handler.redirect_status_list
+                            self.redirect_url = redirect_handler.redirect_url
                         except:
                             print("405 fix error:" + str(e))
                     elif e.code >= 500:
@@ -287,9 +325,6 @@ class RequestHelper:
         status_code = None
         if tp_response:
             # self.http_response = tp_response
-            if tp_response.info().get("Content-Encoding") == "gzip":
-                self.logger.info("FsF-F2-01M : Retrieving gzipped content")
-                self.response_content = gzip.decompress(self.response_content)
             if tp_response.info().get("Content-Type") == "application/zip":
                 self.logger.warning(
                     "FsF-F2-01M : Received zipped content which contains several files, therefore skipping tests"
@@ -337,64 +372,61 @@ class RequestHelper:
                         pass
                     if self.content_size > self.max_content_size:
                         content_truncated = True
-                    if sys.getsizeof(self.response_content) >= self.max_content_size or content_truncated:
+                    # read incrementally, gzip content is decompressed up to the maximum size, binary content is skipped
+                    response_reader = ResponseReader(
+                        tp_response, self.max_content_size, tp_response.info().get("Content-Encoding")
+                    )
+                    if format is not None:
+                        if response_reader.decompressor is not None:
+                            self.logger.info("FsF-F2-01M : Retrieving gzipped content")
+                        try:
+                            self.response_content = response_reader.read()
+                        except zlib.error as e:
+                            self.logger.warning(f"{metric_id} : Decompressing content failed -: {e!s}")
+                            self.response_content = None
+                            format = None
+                    if response_reader.truncated:
+                        content_truncated = True
+                    if content_truncated:
                         self.logger.warning(
                             "{} : Downloaded content has been TRUNCATED by F-UJI since it is larger than: -: {}".format(
                                 metric_id, str(self.max_content_size)
                             )
                         )
-                    self.response_content = tp_response.read(self.max_content_size)
                     if self.content_size == 0:
-                        self.content_size = sys.getsizeof(self.response_content)
+                        self.content_size = response_reader.size
+                    if response_reader.is_binary:
+                        self.logger.warning(
+                            "{} : Received binary content -: {}, therefore skipping tests".format(
+                                metric_id, response_reader.sniffed_type
+                            )
+                        )
+                        format = None
                     # try to find out if content type is byte then fix
-                    if self.response_content:
-                        try:
-                            self.response_content.decode("utf-8")
-                        except (UnicodeDecodeError, AttributeError):
-                            self.logger.warning("%s : Content UTF-8 encoding problem, trying to fix.. " % metric_id)
-
-                            self.response_content = self.response_content.decode("utf-8", errors="replace")
-                            self.response_content = str(self.response_content).encode("utf-8")
+                    if self.response_content and not response_reader.is_utf8:
+                        self.logger.warning("%s : Content UTF-8 encoding problem, trying to fix.. " % metric_id)
+                        self.response_content = self.response_content.decode("utf-8", errors="replace").encode("utf-8")
 
                     # Now content should be utf-8 encoded
-                    if content_truncated is True:
+                    if content_truncated is True and self.response_content:
                         try:
                             self.response_content = self.response_content.rsplit(b"\n", 1)[0]
                         except Exception as e:
                             print("Error: " + str(e))
                     if self.content_type is None:
                         self.content_type = mimetypes.guess_type(self.request_url, strict=True)[0]
-                    if self.content_type is None:
-                        # just in case tika is not running use this as quick check for the most obvious
-                        try:
-                            if (
-                                re.search(b"<!doctype html>|<html", self.response_content.strip(), re.IGNORECASE)
-                                is not None
-                            ):
-                                self.content_type = "text/html"
-                        except Exception as e:
-                            print(e, "Request helper")
-                    if self.content_type is None:
-                        try:
-                            self.logger.info(
-                                "%s : No content type (mime) given by server, trying to identify mime with TIKA "
-                                % metric_id
-                            )
-                            parsedFile = parser.from_buffer(self.response_content)
-                            self.content_type = parsedFile.get("metadata").get("Content-Type")
-                        except Exception as e:
-                            self.logger.info("{} : TIKA content type guessing failed -: {} ".format(metric_id, str(e)))
-                            self.content_type = "application/octet-stream"
-                    if "application/xhtml+xml" in self.content_type:
-                        try:
-                            if (
-                                re.search(b"<!doctype html>|<html", self.response_content.strip(), re.IGNORECASE)
-                                is None
-                            ):
-                                self.content_type = "text/xml"
-                        except Exception as e:
-                            print(e, "Request helper")
-                    if self.content_type is not None:
+                    if self.content_type is None and self.response_content is not None:
+                        self.logger.info(
+                            "%s : No content type (mime) given by server, using the type guessed from the content"
+                            % metric_id
+                        )
+                        self.content_type = response_reader.sniffed_type
+                    if self.content_type and "application/xhtml+xml" in self.content_type:
+                        if response_reader.sniffed_type != "text/html":
+                            self.content_type = "text/xml"
+                    if format is None:
+                        self.response_content = None
+                    elif self.content_type is not None:
                         if "text/plain" in self.content_type:
                             format = MetadataFormats.TEXT
                             self.logger.info(
@@ -514,6 +546,16 @@ class RequestHelper:
                     self.logger.warning(
                         f"{metric_id} : NO successful response received, status code -: {status_code!s}"
                     )
+            # learn if the host does content negotiation at all
+            NegotiationPlanner.record_response(
+                self.request_url,
+                self.accept_type,
+                status_code,
+                self.response_header,
+                self.content_type,
+                self.response_content,
+                self.redirect_url,
+            )
             tp_response.close()
         else:
             self.logger.warning(f"{metric_id} : No response received from -: {self.request_url}, {self.accept_type}")
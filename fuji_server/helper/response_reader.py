@@ -0,0 +1,180 @@
+# SPDX-FileCopyrightText: 2020 PANGAEA (https://www.pangaea.de/)
+#
+# SPDX-License-Identifier: MIT
+
+import codecs
+import re
+import zlib
+
+
+class ResponseReader:
+    """
+    A class which reads the body of a HTTP response incrementally.
+
+    The body is read in chunks until the maximum size is reached, gzip or deflate encoded bodies are decompressed
+    chunk by chunk and the decompressed output is limited to the same maximum size (which protects against gzip
+    bombs). The content type is sniffed from the first bytes, reading stops as soon as binary content has been
+    detected. UTF-8 validity is checked while reading, without decoding the complete body at once.
+
+    Attributes
+    ----------
+    size : int
+        Number of (decompressed) bytes read
+    truncated : bool
+        True if the body is larger than the maximum size
+    sniffed_type : str
+        Content type guessed from the first bytes
+    is_binary : bool
+        True if binary content has been detected
+    is_utf8 : bool
+        False if the body is not valid UTF-8
+
+    Methods
+    -------
+    read()
+        Read the body.
+    sniff(head)
+        Guess the content type from the first bytes of the body.
+    """
+
+    CHUNK_SIZE = 65536
+    SNIFF_SIZE = 8192
+    HTML_PATTERN = re.compile(b"<!doctype html>|<html", re.IGNORECASE)
+    BINARY_SIGNATURES = {
+        b"PK\x03\x04": "application/zip",
+        b"%PDF": "application/pdf",
+        b"\x1f\x8b": "application/gzip",
+        b"\x89PNG": "image/png",
+        b"\xff\xd8\xff": "image/jpeg",
+        b"GIF8": "image/gif",
+        b"CDF\x01": "application/x-netcdf",
+        b"CDF\x02": "application/x-netcdf",
+        b"\x89HDF": "application/x-hdf5",
+    }
+    TEXT_BOMS = (b"\xef\xbb\xbf", b"\xff\xfe", b"\xfe\xff")
+
+    def __init__(self, response, max_size, content_encoding=None):
+        """
+        Parameters
+        ----------
+        response : http.client.HTTPResponse
+            The response to read
+        max_size : int
+            Maximum number of (decompressed) bytes to read
+        content_encoding : str, optional
+            The Content-Encoding header of the response
+        """
+        self.response = response
+        self.max_size = int(max_size)
+        self.decompressor = None
+        content_encoding = str(content_encoding or "").strip().lower()
+        if content_encoding in ("gzip", "x-gzip"):
+            self.decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        elif content_encoding == "deflate":
+            self.decompressor = zlib.decompressobj()
+        self.size = 0
+        self.truncated = False
+        self.sniffed_type = None
+        self.is_binary = False
+        self.is_utf8 = True
+
+    def raw_chunks(self):
+        while True:
+            chunk = self.response.read(self.CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+
+    def decompressed_chunks(self):
+        for raw_chunk in self.raw_chunks():
+            chunk = self.decompressor.decompress(raw_chunk, self.CHUNK_SIZE)
+            while chunk:
+                yield chunk
+                chunk = self.decompressor.decompress(self.decompressor.unconsumed_tail, self.CHUNK_SIZE)
+        yield self.decompressor.flush()
+
+    def chunks(self):
+        """Yield the (decompressed) chunks of the body, stops reading when the maximum size has been reached."""
+        source = self.raw_chunks() if self.decompressor is None else self.decompressed_chunks()
+        for chunk in source:
+            remaining = self.max_size - self.size
+            if len(chunk) > remaining:
+                chunk = chunk[:remaining]
+                self.truncated = True
+            if chunk:
+                self.size += len(chunk)
+                yield chunk
+            if self.truncated:
+                break
+
+    def sniff(self, head):
+        """Guess the content type from the first bytes of the body and detect binary content.
+
+        Parameters
+        ----------
+        head : bytes
+            The first bytes of the body
+
+        Returns
+        -------
+        str
+            The guessed content type
+        """
+        self.is_binary = False
+        for signature, content_type in self.BINARY_SIGNATURES.items():
+            if head.startswith(signature):
+                self.is_binary = True
+                self.sniffed_type = content_type
+                return self.sniffed_type
+        if b"\x00" in head and not head.startswith(self.TEXT_BOMS):
+            self.is_binary = True
+            self.sniffed_type = "application/octet-stream"
+            return self.sniffed_type
+        text = head.lstrip(b"\xef\xbb\xbf \t\r\n")
+        if self.HTML_PATTERN.search(head):
+            self.sniffed_type = "text/html"
+        elif text.startswith(b"<"):
+            self.sniffed_type = "application/xml"
+        elif text.startswith((b"{", b"[")):
+            self.sniffed_type = "application/json"
+        elif text.startswith((b"@prefix", b"@base", b"PREFIX", b"BASE")):
+            self.sniffed_type = "text/turtle"
+        else:
+            self.sniffed_type = "text/plain"
+        return self.sniffed_type
+
+    def read(self):
+        """Read the body.
+
+        Returns
+        -------
+        bytes
+            The body, None in case binary content has been detected
+        """
+        content = bytearray()
+        utf8_decoder = codecs.getincrementaldecoder("utf-8")()
+        sniffed = False
+        for chunk in self.chunks():
+            content += chunk
+            # pure ASCII chunks do not need to be decoded unless a multibyte character is pending
+            if self.is_utf8 and (utf8_decoder.getstate()[0] or not chunk.isascii()):
+                try:
+                    utf8_decoder.decode(chunk)
+                except UnicodeDecodeError:
+                    self.is_utf8 = False
+            if not sniffed and len(content) >= self.SNIFF_SIZE:
+                sniffed = True
+                self.sniff(bytes(content[: self.SNIFF_SIZE]))
+                if self.is_binary:
+                    return None
+        if not sniffed:
+            self.sniff(bytes(content))
+            if self.is_binary:
+                return None
+        # a multibyte character may have been cut at the end of truncated content
+        if self.is_utf8 and not self.truncated:
+            try:
+                utf8_decoder.decode(b"", final=True)
+            except UnicodeDecodeError:
+                self.is_utf8 = False
+        return bytes(content)
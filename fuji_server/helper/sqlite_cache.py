@@ -0,0 +1,86 @@
+# SPDX-FileCopyrightText: 2020 PANGAEA (https://www.pangaea.de/)
+#
+# SPDX-License-Identifier: MIT
+
+import os
+import sqlite3
+import threading
+
+
+class SQLiteCache:
+    """
+    Base class of the caches which are stored in a SQLite database, in memory unless a database path has been set.
+
+    The database connection is shared by all threads of the process and guarded by a lock, each subclass has its own
+    connection and lock. Subclasses list the statements which create their tables in SCHEMA and the tables to empty
+    in TABLES.
+
+    Methods
+    -------
+    set_db_path(db_path)
+        Set the path of the cache database.
+    get_connection()
+        Return the connection to the cache database, the tables are created when it is opened.
+    clear()
+        Remove all cached entries.
+    """
+
+    db_path = ":memory:"
+    SCHEMA = []
+    TABLES = []
+    _connection = None
+    _lock = threading.Lock()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._connection = None
+        cls._lock = threading.Lock()
+
+    @classmethod
+    def set_db_path(cls, db_path):
+        with cls._lock:
+            cls.db_path = db_path or ":memory:"
+            if cls._connection is not None:
+                cls._connection.close()
+                cls._connection = None
+
+    @classmethod
+    def get_connection(cls):
+        if cls._connection is None:
+            if cls.db_path != ":memory:":
+                os.makedirs(os.path.dirname(os.path.abspath(cls.db_path)), exist_ok=True)
+            cls._connection = sqlite3.connect(cls.db_path, check_same_thread=False)
+            for statement in cls.SCHEMA:
+                cls._connection.execute(statement)
+            cls._connection.commit()
+        return cls._connection
+
+    @classmethod
+    def clear(cls):
+        with cls._lock:
+            connection = cls.get_connection()
+            for table in cls.TABLES:
+                connection.execute(f"DELETE FROM {table}")
+            connection.commit()
+
+
+class ExpiringSQLiteCache(SQLiteCache):
+    """
+    Base class of the SQLite caches whose entries expire, negative entries (e.g. unavailable endpoints or unlisted
+    identifiers) are kept for a shorter time than positive ones.
+
+    Methods
+    -------
+    set_ttl(ttl, negative_ttl)
+        Set the seconds to keep positive and negative entries.
+    """
+
+    ttl = 86400
+    negative_ttl = 3600
+
+    @classmethod
+    def set_ttl(cls, ttl=None, negative_ttl=None):
+        if ttl is not None:
+            cls.ttl = float(ttl)
+        if negative_ttl is not None:
+            cls.negative_ttl = float(negative_ttl)
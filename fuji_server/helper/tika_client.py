@@ -0,0 +1,244 @@
+# SPDX-FileCopyrightText: 2020 PANGAEA (https://www.pangaea.de/)
+#
+# SPDX-License-Identifier: MIT
+
+import json
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from tika import tika as tika_server
+
+from fuji_server.helper.mime_type_detector import MimeTypeDetector
+
+
+def parse_rmeta_response(status, response_text):
+    """Convert the response of the Tika /rmeta/text service into the dict returned by tika.parser.from_buffer."""
+    parsed = {"status": status, "metadata": None, "content": None}
+    if not response_text:
+        return parsed
+    documents = json.loads(response_text)
+    parsed["metadata"] = {}
+    content = ""
+    for document in documents:
+        content += document.get("X-TIKA:content") or ""
+        for name, value in document.items():
+            if name == "X-TIKA:content":
+                continue
+            if name in parsed["metadata"]:
+                if not isinstance(parsed["metadata"][name], list):
+                    parsed["metadata"][name] = [parsed["metadata"][name]]
+                parsed["metadata"][name].append(value)
+            else:
+                parsed["metadata"][name] = value
+    parsed["content"] = content or None
+    return parsed
+
+
+class TikaServerBackend:
+    """
+    A Tika backend which sends content to the REST API of a Tika server using a pooled HTTP session.
+
+    Unless tika-python is configured as client only (TIKA_CLIENT_ONLY), a local Tika server is started the same way
+    tika-python does, the server is only checked at the first call and after connection errors.
+    """
+
+    def __init__(self, endpoint=None, pool_size=4, client_only=None):
+        self.endpoint = (endpoint or tika_server.ServerEndpoint).rstrip("/")
+        self.client_only = tika_server.TikaClientOnly if client_only is None else client_only
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.server_checked = False
+        self._lock = threading.Lock()
+
+    def ensure_server(self):
+        if self.client_only or self.server_checked:
+            return
+        with self._lock:
+            if not self.server_checked:
+                endpoint = urlparse(self.endpoint)
+                tika_server.checkTikaServer(endpoint.scheme, endpoint.hostname, endpoint.port)
+                self.server_checked = True
+
+    def parse(self, content, timeout):
+        self.ensure_server()
+        try:
+            response = self.session.put(
+                self.endpoint + "/rmeta/text", data=content, headers={"Accept": "application/json"}, timeout=timeout
+            )
+        except requests.ConnectionError:
+            self.server_checked = False
+            raise
+        response.encoding = "utf-8"
+        return parse_rmeta_response(response.status_code, response.text)
+
+
+class LocalTikaBackend:
+    """
+    A lightweight stand-in for a Tika server which detects the content type and extracts text locally, e.g. to
+    load test the data content assessment without a JVM. An optional latency simulates the Tika round trip.
+    """
+
+    def __init__(self, latency=0):
+        self.latency = float(latency)
+
+    def parse(self, content, timeout):
+        if self.latency:
+            if self.latency > timeout:
+                time.sleep(timeout)
+                raise TimeoutError("Local Tika backend timed out")
+            time.sleep(self.latency)
+        content_types = MimeTypeDetector.detect(content)
+        return {
+            "status": 200,
+            "metadata": {"Content-Type": content_types[0] if content_types else "application/octet-stream"},
+            "content": MimeTypeDetector.extract_text(content, content_types),
+        }
+
+
+class TikaClient:
+    """
+    A class which limits and guards the access to Tika.
+
+    The number of concurrent Tika requests is limited, each call has a deadline which includes the time spent
+    waiting for a free slot. A circuit breaker stops sending requests after repeated failures (e.g. when the Tika
+    server is down) and lets a single trial request pass after the recovery time. The backend is pluggable, by
+    default a TikaServerBackend is used.
+
+    Methods
+    -------
+    configure(backend, max_in_flight, deadline, failure_threshold, recovery_time)
+        Configure the client.
+    parse(content)
+        Parse content with Tika.
+    is_available()
+        Return True unless the circuit breaker is open.
+    """
+
+    backend = None
+    max_in_flight = 4
+    deadline = 30
+    failure_threshold = 3
+    recovery_time = 60
+    failures = 0
+    opened_at = None
+    trial_running = False
+    _slots = threading.BoundedSemaphore(max_in_flight)
+    _lock = threading.Lock()
+
+    @classmethod
+    def configure(cls, backend=None, max_in_flight=None, deadline=None, failure_threshold=None, recovery_time=None):
+        """Configure the client, the circuit breaker is closed again.
+
+        Parameters
+        ----------
+        backend : object, optional
+            The backend which parses the content, any object with a parse(content, timeout) method
+        max_in_flight : int, optional
+            Maximum number of concurrent Tika requests
+        deadline : float, optional
+            Maximum number of seconds per call
+        failure_threshold : int, optional
+            Number of consecutive failures which open the circuit breaker
+        recovery_time : float, optional
+            Seconds after which a trial request is sent when the circuit breaker is open
+        """
+        with cls._lock:
+            if max_in_flight is not None and int(max_in_flight) != cls.max_in_flight:
+                cls.max_in_flight = int(max_in_flight)
+                cls._slots = threading.BoundedSemaphore(cls.max_in_flight)
+                if backend is None and isinstance(cls.backend, TikaServerBackend):
+                    backend = TikaServerBackend(cls.backend.endpoint, cls.max_in_flight, cls.backend.client_only)
+            if backend is not None:
+                cls.backend = backend
+            if deadline is not None:
+                cls.deadline = float(deadline)
+            if failure_threshold is not None:
+                cls.failure_threshold = int(failure_threshold)
+            if recovery_time is not None:
+                cls.recovery_time = float(recovery_time)
+            cls.failures = 0
+            cls.opened_at = None
+            cls.trial_running = False
+
+    @classmethod
+    def get_backend(cls):
+        with cls._lock:
+            if cls.backend is None:
+                cls.backend = TikaServerBackend(pool_size=cls.max_in_flight)
+            return cls.backend
+
+    @classmethod
+    def is_available(cls):
+        with cls._lock:
+            return cls.opened_at is None or (
+                not cls.trial_running and time.monotonic() - cls.opened_at >= cls.recovery_time
+            )
+
+    @classmethod
+    def acquire_permission(cls):
+        with cls._lock:
+            if cls.opened_at is None:
+                return True
+            if not cls.trial_running and time.monotonic() - cls.opened_at >= cls.recovery_time:
+                cls.trial_running = True
+                return True
+            return False
+
+    @classmethod
+    def record_result(cls, success):
+        # success is None if the request has not been sent
+        with cls._lock:
+            cls.trial_running = False
+            if success is None:
+                return
+            if success:
+                cls.failures = 0
+                cls.opened_at = None
+            else:
+                cls.failures += 1
+                if cls.failures >= cls.failure_threshold:
+                    cls.opened_at = time.monotonic()
+
+    @classmethod
+    def parse(cls, content):
+        """Parse content with Tika.
+
+        Parameters
+        ----------
+        content : bytes
+            The content to parse
+
+        Returns
+        -------
+        dict
+            The parse result with status, metadata and content, like tika.parser.from_buffer
+
+        Raises
+        ------
+        ConnectionError
+            If the circuit breaker is open
+        TimeoutError
+            If no Tika slot becomes available before the deadline
+        """
+        backend = cls.get_backend()
+        if not cls.acquire_permission():
+            raise ConnectionError("Tika is unavailable after repeated failures, skipping request")
+        start = time.monotonic()
+        slots = cls._slots
+        if not slots.acquire(timeout=cls.deadline):
+            cls.record_result(None)
+            raise TimeoutError(f"No Tika slot available within {cls.deadline} seconds")
+        try:
+            result = backend.parse(content, max(cls.deadline - (time.monotonic() - start), 0.1))
+        except Exception:
+            cls.record_result(False)
+            raise
+        finally:
+            slots.release()
+        cls.record_result(int(result.get("status") or 0) < 500)
+        return result
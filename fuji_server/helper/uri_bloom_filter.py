@@ -0,0 +1,120 @@
+# SPDX-FileCopyrightText: 2020 PANGAEA (https://www.pangaea.de/)
+#
+# SPDX-License-Identifier: MIT
+
+import hashlib
+import math
+import mmap
+import os
+import struct
+
+
+class UriBloomFilter:
+    """
+    A Bloom filter of URIs, used in front of large lookup tables so that most lookups of URIs which are not in the
+    table are answered from memory. Lookups never miss a URI which has been added, a URI which has not been added is
+    reported as contained with the false positive rate the filter has been sized for.
+
+    The bit positions are derived from a single BLAKE2b hash (double hashing). A saved filter is mapped into memory
+    read-only when it is loaded, so it is shared by all processes and loaded without reading the whole file.
+
+    Methods
+    -------
+    for_capacity(capacity, error_rate)
+        Create an empty filter sized for a number of URIs.
+    add(uri)
+        Add a URI.
+    save(path)
+        Save the filter.
+    load(path)
+        Load a saved filter (memory mapped).
+    """
+
+    MAGIC = b"FUJIBLM1"
+    # magic, number of bits, number of hashes, number of added URIs, largest row id of the source table
+    HEADER = struct.Struct("<8sQQQq")
+
+    def __init__(self, num_bits, num_hashes, bits=None, count=0, max_rowid=-1):
+        self.num_bits = int(num_bits)
+        self.num_hashes = int(num_hashes)
+        self.bits = bits if bits is not None else bytearray((self.num_bits + 7) // 8)
+        self.count = count
+        self.max_rowid = max_rowid
+        self._mmap = None
+
+    @classmethod
+    def for_capacity(cls, capacity, error_rate=0.01):
+        """Create an empty filter sized for a number of URIs.
+
+        Parameters
+        ----------
+        capacity : int
+            The expected number of URIs
+        error_rate : float, optional
+            The false positive rate at the given capacity
+
+        Returns
+        -------
+        UriBloomFilter
+        """
+        capacity = max(1, int(capacity))
+        num_bits = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        num_hashes = max(1, round(num_bits / capacity * math.log(2)))
+        return cls(num_bits, num_hashes)
+
+    def get_positions(self, uri):
+        digest = hashlib.blake2b(uri.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        # generated lazily, lookups of URIs which are not contained mostly stop at the first position
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, uri):
+        for position in self.get_positions(uri):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, uri):
+        bits = self.bits
+        for position in self.get_positions(uri):
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+    def save(self, path):
+        """Save the filter, the file is replaced atomically.
+
+        Parameters
+        ----------
+        path : str
+            The file path
+        """
+        temporary_path = str(path) + ".tmp"
+        with open(temporary_path, "wb") as f:
+            f.write(self.HEADER.pack(self.MAGIC, self.num_bits, self.num_hashes, self.count, self.max_rowid))
+            f.write(self.bits)
+        os.replace(temporary_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """Load a saved filter, the bits are mapped into memory read-only.
+
+        Parameters
+        ----------
+        path : str
+            The file path
+
+        Returns
+        -------
+        UriBloomFilter
+        """
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, num_bits, num_hashes, count, max_rowid = cls.HEADER.unpack_from(mapped)
+        if magic != cls.MAGIC or len(mapped) < cls.HEADER.size + (num_bits + 7) // 8:
+            mapped.close()
+            raise ValueError(f"Not a valid URI Bloom filter file: {path}")
+        bloom_filter = cls(num_bits, num_hashes, memoryview(mapped)[cls.HEADER.size :], count, max_rowid)
+        bloom_filter._mmap = mapped
+        return bloom_filter
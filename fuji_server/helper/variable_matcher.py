@@ -0,0 +1,111 @@
+# SPDX-FileCopyrightText: 2020 PANGAEA (https://www.pangaea.de/)
+#
+# SPDX-License-Identifier: MIT
+
+import re
+
+
+class VariableMatcher:
+    """
+    A class which finds the measured variables of a record in the text of its data objects in a single pass.
+
+    The variable names are compiled once into a regular expression which is structured like a trie (names sharing a
+    prefix share the branches of the expression), so the text is scanned only once by the regular expression engine
+    regardless of the number of variables. At each position the longest variable is matched, variables which are
+    contained in a matched variable are found as well, so the result is the same as testing each variable with the
+    'in' operator.
+
+    Methods
+    -------
+    find(text, header)
+        Return the variables which occur in the text.
+    """
+
+    def __init__(self, variables):
+        """
+        Parameters
+        ----------
+        variables : list
+            The names of the measured variables
+        """
+        self.variables = list(dict.fromkeys(str(variable) for variable in variables or []))
+        names = [variable for variable in self.variables if variable]
+        self.pattern = None
+        if names:
+            trie = {}
+            for name in names:
+                node = trie
+                for char in name:
+                    node = node.setdefault(char, {})
+                node[""] = {}
+            # the lookahead matches at every position, overlapping variables are not skipped
+            self.pattern = re.compile("(?=(" + self.get_trie_pattern(trie) + "))")
+        self.contained_variables = {}
+
+    @classmethod
+    def get_trie_pattern(cls, node):
+        # iterative depth-first construction, variable names may be longer than the recursion limit allows
+        stack = [(node, None)]
+        results = []
+        while stack:
+            current, alternatives = stack.pop()
+            if alternatives is None:
+                branches = [char for char in sorted(current) if char]
+                stack.append((current, branches))
+                for char in reversed(branches):
+                    stack.append((current[char], None))
+                continue
+            branch_patterns = [re.escape(char) + results.pop() for char in reversed(alternatives)][::-1]
+            if not branch_patterns:
+                pattern = ""
+            elif len(branch_patterns) == 1:
+                pattern = branch_patterns[0]
+            else:
+                pattern = "(?:" + "|".join(branch_patterns) + ")"
+            if "" in current and branch_patterns:
+                # greedy, the longest variable is matched
+                pattern = "(?:" + pattern + ")?"
+            results.append(pattern)
+        return results.pop()
+
+    def get_contained_variables(self, variable):
+        if variable not in self.contained_variables:
+            self.contained_variables[variable] = [
+                other for other in self.variables if other and other != variable and other in variable
+            ]
+        return self.contained_variables[variable]
+
+    def scan(self, text):
+        found = set()
+        if self.pattern is not None:
+            for match in self.pattern.finditer(text):
+                variable = match.group(1)
+                if variable not in found:
+                    found.add(variable)
+                    found.update(self.get_contained_variables(variable))
+        if "" in self.variables:
+            found.add("")
+        return found
+
+    def find(self, text, header=None):
+        """Return the variables which occur in the text.
+
+        Parameters
+        ----------
+        text : str
+            The text of the data object
+        header : str, optional
+            The header of tabular data, the text is only scanned if not all variables occur in the header
+
+        Returns
+        -------
+        set
+            The variables which occur in the text
+        """
+        if not text:
+            return set()
+        if header:
+            found = self.scan(header)
+            if len(found) == len(self.variables):
+                return found
+        return self.scan(text)
@@ -0,0 +1,80 @@
+# SPDX-FileCopyrightText: 2020 PANGAEA (https://www.pangaea.de/)
+#
+# SPDX-License-Identifier: MIT
+
+"""
+Soak test of the per-assessment logging set up by FAIRCheck.
+
+Formerly every assessment called logging.getLogger(test_id), which keeps the logger and its handlers in the
+global logging manager for the lifetime of the process. Assessment loggers are now unregistered and their
+handlers are released after each assessment, so memory has to stay flat over many assessments.
+Run with pytest -s to see the numbers.
+"""
+
+import gc
+import logging
+import os
+import tracemalloc
+import weakref
+
+import pytest
+
+from fuji_server.controllers.fair_check import FAIRCheck
+from fuji_server.helper.log_message_collector import LogMessageCollector, get_assessment_logger
+from fuji_server.helper.preprocessor import Preprocessor
+
+ASSESSMENTS = 20000
+WARMUP = 1000
+# maximum growth of traced memory between warmup and the end of the soak test
+MAX_GROWTH = 256 * 1024
+
+
+def run_assessment_logging(i):
+    logger = get_assessment_logger(f"soak{i}", logging.INFO)
+    logger.propagate = False
+    collector = LogMessageCollector()
+    logger.addHandler(collector)
+    for metric in ("FsF-F1-01D", "FsF-F2-01M", "FsF-A1-01M"):
+        logger.info("%s : Assessment %s message -: %s", metric, i, list(range(20)))
+        logger.warning("%s : Assessment %s warning", metric, i)
+    messages = collector.get_messages_dict()
+    logger.removeHandler(collector)
+    collector.close()
+    return messages
+
+
+@pytest.mark.manual
+def test_assessment_logging_memory_is_flat():
+    tracemalloc.start()
+    for i in range(WARMUP):
+        run_assessment_logging(i)
+    registered_loggers = len(logging.Logger.manager.loggerDict)
+    gc.collect()
+    warm_memory, _ = tracemalloc.get_traced_memory()
+    for i in range(WARMUP, ASSESSMENTS):
+        assert len(run_assessment_logging(i)) == 3
+    gc.collect()
+    end_memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"\ntraced memory after {WARMUP} assessments: {warm_memory} bytes, after {ASSESSMENTS}: {end_memory} bytes")
+    assert len(logging.Logger.manager.loggerDict) == registered_loggers
+    assert end_memory - warm_memory < MAX_GROWTH
+
+
+@pytest.mark.manual
+def test_fair_check_logger_is_released():
+    Preprocessor.set_metric_yaml_path(os.path.join(os.path.dirname(__file__), "..", "..", "fuji_server", "yaml"))
+    FAIRCheck(uid="https://doi.org/10.1594/PANGAEA.0", test_debug=True).release_logger()
+    registered_loggers = len(logging.Logger.manager.loggerDict)
+    logger_refs = []
+    for i in range(50):
+        ft = FAIRCheck(uid=f"https://doi.org/10.1594/PANGAEA.{i}", test_debug=True)
+        ft.logger.info("FsF-F1-01D : Soak test message")
+        assert ft.get_log_messages_dict().get("FsF-F1-01D") == ["INFO: Soak test message"]
+        ft.release_logger()
+        assert ft.logger.handlers == []
+        logger_refs.append(weakref.ref(ft.logger))
+    del ft
+    gc.collect()
+    assert len(logging.Logger.manager.loggerDict) == registered_loggers
+    assert all(ref() is None for ref in logger_refs)
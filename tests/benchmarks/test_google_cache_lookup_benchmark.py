@@ -0,0 +1,60 @@
+# SPDX-FileCopyrightText: 2020 PANGAEA (https://www.pangaea.de/)
+#
+# SPDX-License-Identifier: MIT
+
+"""
+Benchmark of lookups in the Google Dataset Search cache DB.
+
+A cache DB with synthetic URIs is created, lookups of listed and of unlisted URIs are timed with the DB only and
+with the Bloom filter in front of it. Run with pytest -s to see the lookups per second.
+"""
+
+import logging
+import sqlite3
+import time
+
+import pytest
+
+from fuji_server.helper.catalogue_helper_google_datasearch import MetaDataCatalogueGoogleDataSearch
+
+NUM_URIS = 500000
+NUM_LOOKUPS = 20000
+
+
+def lookups_per_second(helper, uri_lists):
+    start = time.perf_counter()
+    for uris in uri_lists:
+        helper.lookup_cache(uris)
+    return len(uri_lists) / (time.perf_counter() - start)
+
+
+@pytest.mark.manual
+def test_google_cache_lookup_benchmark(tmp_path):
+    db_path = tmp_path / "google_cache.db"
+    con = sqlite3.connect(db_path)
+    with con:
+        con.execute("CREATE TABLE google_links (uri TEXT, source INTEGER)")
+        con.executemany(
+            "INSERT INTO google_links VALUES (?, 0)", ((f"https://doi.org/10.1234/{i}",) for i in range(NUM_URIS))
+        )
+        con.execute("CREATE INDEX google_uri_index ON google_links (uri)")
+    con.close()
+    MetaDataCatalogueGoogleDataSearch.reset_cache()
+    helper = MetaDataCatalogueGoogleDataSearch(logging.getLogger("test_google_cache_lookup_benchmark"))
+    helper.google_cache_db_path = str(db_path)
+    helper.google_cache_bloom_path = str(tmp_path / "google_cache.bloom")
+    # each assessment looks up the PID and the landing page URL
+    listed = [[f"https://doi.org/10.1234/{i}", f"https://example.org/{i}"] for i in range(NUM_LOOKUPS)]
+    unlisted = [[f"https://doi.org/10.9999/{i}", f"https://example.org/{i}"] for i in range(NUM_LOOKUPS)]
+
+    results = {"db listed": lookups_per_second(helper, listed), "db unlisted": lookups_per_second(helper, unlisted)}
+    helper.create_bloom_filter()
+    assert helper.get_bloom_filter() is not None
+    results["bloom listed"] = lookups_per_second(helper, listed)
+    results["bloom unlisted"] = lookups_per_second(helper, unlisted)
+    assert helper.lookup_cache(listed[0]) == [listed[0][0]]
+    assert helper.lookup_cache(unlisted[0]) == []
+    MetaDataCatalogueGoogleDataSearch.reset_cache()
+    print()
+    for name, rate in results.items():
+        print(f"{name}: {rate:.0f} lookups/s")
@@ -0,0 +1,91 @@
+# SPDX-FileCopyrightText: 2020 PANGAEA (https://www.pangaea.de/)
+#
+# SPDX-License-Identifier: MIT
+
+"""
+Benchmark of the embedded metadata extraction from a large landing page (a repository listing with 5k files).
+
+Formerly the JavaScript page check, the typed links, extruct, pyRdfa, Dublin Core and Highwire/Eprints each parsed
+the HTML again, the legacy variant repeats these parses. Run with pytest -s to see the timings.
+"""
+
+import io
+import re
+import time
+
+import extruct
+import lxml.html
+import pytest
+from bs4 import BeautifulSoup
+from pyRdfa import pyRdfa
+
+from fuji_server.helper.landing_page_document import LandingPageDocument
+
+FILES = 5000
+SYNTAXES = ["microdata", "opengraph", "json-ld"]
+DC_PATTERN = r"(DC|dc|DCTERMS|dcterms)\.([A-Za-z]+)"
+HW_PATTERN = r"(eprints\.|citation_)([A-Z_a-z]+)"
+
+
+def listing_page(files):
+    rows = "\n".join(
+        f'<tr><td><a href="https://example.org/files/{i}.nc">file_{i}.nc</a></td><td>{i * 1024}</td></tr>'
+        for i in range(files)
+    )
+    return f"""<!DOCTYPE html><html lang="en"><head><title>Listing</title>
+<meta name="DC.title" content="Listing"/><meta name="citation_title" content="Listing"/>
+<meta property="og:title" content="Listing"/>
+<link rel="describedby" type="application/ld+json" href="https://example.org/meta.json"/>
+<script type="application/ld+json">{{"@context": "http://schema.org", "@type": "Dataset", "name": "Listing"}}</script>
+</head><body vocab="http://schema.org/" typeof="Dataset"><h1 property="name">Listing</h1><!-- files -->
+<table>{rows}</table></body></html>"""
+
+
+def legacy_extraction(html):
+    soup = BeautifulSoup(html, features="html.parser")
+    script_length = len(str(soup.findAll("script")))
+    links = lxml.html.fromstring(html.encode("utf8")).xpath("/*/head/link")
+    extruct_target = re.sub("(<!--.*?-->)", "", html).encode("utf-8")
+    extracted = extruct.extract(extruct_target, syntaxes=SYNTAXES, encoding="utf-8")
+    dc_tags = BeautifulSoup(html, "lxml").findAll("meta", attrs={"name": re.compile(DC_PATTERN)})
+    rdfa_graph = pyRdfa(media_type="text/html").graph_from_source(io.StringIO(html))
+    hw_tags = BeautifulSoup(html, "lxml").findAll("meta", attrs={"name": re.compile(HW_PATTERN)})
+    return (
+        script_length > 0,
+        [link.get("href") for link in links],
+        extracted,
+        [tag["name"] for tag in dc_tags],
+        len(rdfa_graph),
+        [tag["name"] for tag in hw_tags],
+    )
+
+
+def document_extraction(html):
+    document = LandingPageDocument(html)
+    script_length = document.get_script_length()
+    links = document.get_head_links()
+    extracted = extruct.extract(document.tree, syntaxes=SYNTAXES, encoding="utf-8")
+    dc_tags = document.get_meta_tags(DC_PATTERN)
+    rdfa_graph = pyRdfa(media_type="text/html").graph_from_DOM(document.tree)
+    hw_tags = document.get_meta_tags(HW_PATTERN)
+    return (
+        script_length > 0,
+        [link.get("href") for link in links],
+        extracted,
+        [tag["name"] for tag in dc_tags],
+        len(rdfa_graph),
+        [tag["name"] for tag in hw_tags],
+    )
+
+
+@pytest.mark.manual
+def test_landing_page_parsing_benchmark():
+    html = listing_page(FILES)
+    start = time.perf_counter()
+    legacy_result = legacy_extraction(html)
+    legacy_time = time.perf_counter() - start
+    start = time.perf_counter()
+    document_result = document_extraction(html)
+    document_time = time.perf_counter() - start
+    print(f"\nlanding page with {FILES} files: legacy {legacy_time:.3f}s, shared document {document_time:.3f}s")
+    assert document_result == legacy_result
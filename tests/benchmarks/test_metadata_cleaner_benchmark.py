@@ -0,0 +1,90 @@
+# SPDX-FileCopyrightText: 2020 PANGAEA (https://www.pangaea.de/)
+#
+# SPDX-License-Identifier: MIT
+
+"""
+Benchmark of the metadata cleaning on synthetic, deeply nested documents (schema.org hasPart trees).
+
+The previous implementation of exclude_null cleaned every dict value twice, so the number of visited
+nodes doubled with each nesting level. Call counts are compared instead of wall clock time to keep the
+benchmark deterministic, timings are printed (pytest -s) for information.
+"""
+
+import time
+
+import pytest
+
+from fuji_server.helper.metadata_cleaner import MetadataCleaner
+
+
+class LegacyCleaner:
+    """The former exclude_null implementation, kept for comparison only"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def exclude_null(self, dt):
+        self.calls += 1
+        if isinstance(dt, dict):
+            return dict((k, self.exclude_null(v)) for k, v in dt.items() if v and self.exclude_null(v))
+        elif isinstance(dt, list):
+            try:
+                return list(set([self.exclude_null(v) for v in dt if v and self.exclude_null(v)]))
+            except Exception:
+                return [self.exclude_null(v) for v in dt if v and self.exclude_null(v)]
+        elif isinstance(dt, str):
+            return dt.strip()
+        else:
+            return dt
+
+
+class CountingCleaner(MetadataCleaner):
+    calls = 0
+
+    @classmethod
+    def exclude_null(cls, dt):
+        cls.calls += 1
+        return super().exclude_null.__func__(cls, dt)
+
+
+def deep_document(depth):
+    document = {"@type": "Dataset", "name": "leaf", "identifier": None}
+    for level in range(depth):
+        document = {"@type": "Dataset", "name": f"level {level}", "hasPart": document, "keywords": ["a", "b"]}
+    return document
+
+
+@pytest.mark.manual
+def test_exclude_null_scales_linearly():
+    legacy_calls, new_calls = [], []
+    for depth in (4, 8, 12):
+        document = deep_document(depth)
+        legacy = LegacyCleaner()
+        start = time.perf_counter()
+        legacy_result = legacy.exclude_null(document)
+        legacy_time = time.perf_counter() - start
+
+        CountingCleaner.calls = 0
+        start = time.perf_counter()
+        new_result = CountingCleaner.exclude_null(document)
+        new_time = time.perf_counter() - start
+        print(
+            f"depth {depth}: legacy {legacy.calls} calls {legacy_time:.4f}s, new {CountingCleaner.calls} calls {new_time:.4f}s"
+        )
+        assert sorted(str(legacy_result)) == sorted(str(new_result))
+        legacy_calls.append(legacy.calls)
+        new_calls.append(CountingCleaner.calls)
+    # legacy doubles per level, the new one grows by a constant number of nodes per level
+    assert legacy_calls[2] / legacy_calls[1] > 10
+    assert new_calls[2] - new_calls[1] == new_calls[1] - new_calls[0]
+
+
+@pytest.mark.manual
+def test_clean_merged_metadata_many_data_links():
+    links = [{"url": f"https://example.org/file{i % 5000}.csv", "type": "None"} for i in range(10000)]
+    metadata = {"title": "None", "object_content_identifier": links, "hasPart": deep_document(200)}
+    start = time.perf_counter()
+    cleaned = MetadataCleaner.clean_merged_metadata(metadata)
+    print(f"cleaned 10000 data links in {time.perf_counter() - start:.4f}s")
+    assert len(cleaned["object_content_identifier"]) == 5000
+    assert "title" not in cleaned
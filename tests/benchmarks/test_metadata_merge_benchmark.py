@@ -0,0 +1,70 @@
+# SPDX-FileCopyrightText: 2020 PANGAEA (https://www.pangaea.de/)
+#
+# SPDX-License-Identifier: MIT
+
+"""
+Benchmark of MetadataHarvester.merge_metadata for records with many data links (10k file links).
+
+The former implementation made list properties unique with a nested 'not in' loop (quadratic in the number
+of dict entries), the legacy variant is only run on a smaller record. Run with pytest -s to see the timings.
+"""
+
+import logging
+import time
+
+import pytest
+
+from fuji_server.harvester.metadata_harvester import MetadataHarvester
+from fuji_server.helper.metadata_collector import MetadataFormats, MetadataSources
+
+UID = "https://doi.org/10.1594/PANGAEA.902845"
+
+
+def file_links(start, stop):
+    return [
+        {"url": f"https://example.org/files/{i}.nc", "type": "application/x-netcdf", "size": str(i)}
+        for i in range(start, stop)
+    ]
+
+
+def legacy_unique(values):
+    unique_merged = []
+    for e in values:
+        if e not in unique_merged:
+            unique_merged.append(e)
+    return unique_merged
+
+
+def merge_record(harvester, number_of_links):
+    # two overlapping sources offering the same data links, e.g. schema.org and DataCite
+    sources = [
+        {"title": "Title", "object_content_identifier": file_links(0, number_of_links)},
+        {"title": "Title", "object_content_identifier": file_links(number_of_links // 2, number_of_links)},
+    ]
+    for metadata in sources:
+        harvester.merge_metadata(
+            metadata, UID, MetadataSources.SCHEMAORG_EMBEDDED, MetadataFormats.JSONLD, "application/ld+json"
+        )
+
+
+@pytest.mark.manual
+def test_merge_metadata_10k_file_links():
+    harvester = MetadataHarvester(UID, logger=logging.getLogger())
+    start = time.perf_counter()
+    merge_record(harvester, 10000)
+    print(f"merged 10000 file links in {time.perf_counter() - start:.4f}s")
+    assert harvester.metadata_merged["object_content_identifier"] == file_links(0, 10000)
+
+
+@pytest.mark.manual
+def test_merge_metadata_same_output_as_legacy():
+    number_of_links = 2000
+    values = file_links(0, number_of_links) + file_links(number_of_links // 2, number_of_links)
+    start = time.perf_counter()
+    expected = legacy_unique(values)
+    print(f"legacy unique of {number_of_links} file links in {time.perf_counter() - start:.4f}s")
+    harvester = MetadataHarvester(UID, logger=logging.getLogger())
+    start = time.perf_counter()
+    merge_record(harvester, number_of_links)
+    print(f"merged {number_of_links} file links in {time.perf_counter() - start:.4f}s")
+    assert harvester.metadata_merged["object_content_identifier"] == expected
@@ -0,0 +1,92 @@
+# SPDX-FileCopyrightText: 2020 PANGAEA (https://www.pangaea.de/)
+#
+# SPDX-License-Identifier: MIT
+
+"""
+Benchmark of the content type detection of downloaded data objects.
+
+The local signature based detection is compared with the Tika round trip of the former implementation. The Tika
+part is only run if a Tika server answers at TIKA_SERVER_ENDPOINT (default http://localhost:9998), e.g. started with
+docker run -p 9998:9998 apache/tika. Run with pytest -s to see the timings.
+"""
+
+import io
+import os
+import socket
+import time
+import zipfile
+from urllib.parse import urlparse
+
+import pytest
+
+from fuji_server.helper.mime_type_detector import MimeTypeDetector
+
+SAMPLE_SIZE = 1000000
+ROUNDS = 20
+
+
+def make_zip(members, stored_mimetype=None):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        if stored_mimetype:
+            archive.writestr(zipfile.ZipInfo("mimetype"), stored_mimetype)
+        for name, content in members.items():
+            archive.writestr(name, content)
+    return buffer.getvalue()
+
+
+def samples():
+    rows = "".join(f"ST{i % 50},2020-01-{i % 28 + 1:02d},{i % 4000 / 10},{i % 35 / 1.7:.3f}\n" for i in range(40000))
+    csv = ("station,date,depth,temperature\n" + rows).encode()[:SAMPLE_SIZE]
+    cells = "".join(f"<c><v>{i}</v></c>" for i in range(100000))
+    return {
+        # data objects are truncated to the maximum download size of the DataHarvester
+        "text/csv": (csv, "https://example.org/data/ctd.csv"),
+        "application/x-netcdf": (b"CDF\x01" + os.urandom(SAMPLE_SIZE - 4), "https://example.org/data/ctd.nc"),
+        "application/x-hdf5": (b"\x89HDF\r\n\x1a\n" + os.urandom(SAMPLE_SIZE - 8), "https://example.org/data/ctd.h5"),
+        "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet": (
+            make_zip({"[Content_Types].xml": "<Types/>", "xl/worksheets/sheet1.xml": cells})[:SAMPLE_SIZE],
+            "https://example.org/data/ctd.xlsx",
+        ),
+        "application/vnd.oasis.opendocument.spreadsheet": (
+            make_zip({"content.xml": cells}, "application/vnd.oasis.opendocument.spreadsheet")[:SAMPLE_SIZE],
+            "https://example.org/data/ctd.ods",
+        ),
+        "application/pdf": (b"%PDF-1.7\n" + os.urandom(SAMPLE_SIZE - 9), "https://example.org/data/report.pdf"),
+        "image/png": (b"\x89PNG\r\n\x1a\n" + os.urandom(SAMPLE_SIZE - 8), "https://example.org/data/map.png"),
+    }
+
+
+def tika_server_available():
+    endpoint = urlparse(os.environ.get("TIKA_SERVER_ENDPOINT", "http://localhost:9998"))
+    try:
+        with socket.create_connection((endpoint.hostname, endpoint.port or 80), timeout=1):
+            return True
+    except OSError:
+        return False
+
+
+@pytest.mark.manual
+def test_mime_type_detection_benchmark():
+    data_objects = samples()
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        detected = {
+            expected: MimeTypeDetector.detect(content, url) for expected, (content, url) in data_objects.items()
+        }
+    local_time = (time.perf_counter() - start) / ROUNDS
+    for expected, content_types in detected.items():
+        assert content_types[0] == expected
+    print(f"\nlocal detection of {len(data_objects)} data objects: {local_time * 1000:.2f} ms")
+    if not tika_server_available():
+        print("no Tika server available, skipping the Tika round trips")
+        return
+    os.environ.setdefault("TIKA_CLIENT_ONLY", "True")
+    from tika import parser
+
+    start = time.perf_counter()
+    for content, _ in data_objects.values():
+        parser.from_buffer(content)
+    tika_time = time.perf_counter() - start
+    print(f"Tika parsing of {len(data_objects)} data objects: {tika_time * 1000:.2f} ms")
+    print(f"speedup: {tika_time / local_time:.1f}x")
@@ -0,0 +1,109 @@
+# SPDX-FileCopyrightText: 2020 PANGAEA (https://www.pangaea.de/)
+#
+# SPDX-License-Identifier: MIT
+
+"""
+Benchmark of the RDFa extraction from a corpus of landing pages modelled after common repository platforms.
+
+pyRdfa is run on the full tree of every page (legacy) and compared with the pre-scan, which skips pages without RDFa
+attributes and only processes the RDFa relevant subtrees otherwise. Run with pytest -s to see the timings.
+"""
+
+import gc
+import time
+
+import pytest
+from pyRdfa import pyRdfa
+from rdflib.compare import isomorphic
+
+from fuji_server.helper.landing_page_document import LandingPageDocument
+
+FILES = 2000
+XHTML_VOCAB = "http://www.w3.org/1999/xhtml/vocab#"
+
+
+def file_rows(files):
+    return "\n".join(
+        f'<tr><td><a href="https://example.org/files/{i}.nc" title="download">file_{i}.nc</a></td>'
+        f'<td><span class="size">{i * 1024}</span></td></tr>'
+        for i in range(files)
+    )
+
+
+def page(head, body):
+    return f"""<!DOCTYPE html><html lang="en"><head><meta charset="utf-8"/><title>Dataset</title>
+<link rel="stylesheet" href="/static/main.css"/><link rel="icon" href="/favicon.ico"/>{head}</head>
+<body><header role="banner"><nav role="navigation"><ul><li><a href="/">Home</a></li></ul></nav></header>
+{body}<footer role="contentinfo"><a rel="license" href="https://creativecommons.org/licenses/by/4.0/">CC-BY</a>
+</footer></body></html>"""
+
+
+def corpus(files):
+    json_ld = '<script type="application/ld+json">{"@context": "https://schema.org/", "@type": "Dataset"}</script>'
+    return {
+        # JSON-LD and Highwire tags only, typical for generic repository software
+        "json-ld only": page(
+            json_ld + '<meta name="citation_title" content="Dataset"/>',
+            f'<main role="main"><h1>Dataset</h1><table>{file_rows(files)}</table></main>',
+        ),
+        # Dublin Core meta tags and a schema.DC link
+        "dublin core": page(
+            '<link rel="schema.DC" href="http://purl.org/dc/elements/1.1/"/><meta name="DC.title" content="Dataset"/>',
+            f'<div class="files"><table>{file_rows(files)}</table></div>',
+        ),
+        # OpenGraph tags in the head of a large page
+        "opengraph": page(
+            '<meta property="og:title" content="Dataset"/><meta property="og:type" content="website"/>',
+            f'<div class="files"><table>{file_rows(files)}</table></div>',
+        ),
+        # schema.org RDFa in a section of a large page
+        "rdfa section": page(
+            "",
+            '<div vocab="http://schema.org/" typeof="Dataset" resource="#dataset"><h1 property="name">Dataset</h1>'
+            '<span property="creator" typeof="Person"><span property="name">Jane Doe</span></span>'
+            '<a property="license" href="https://creativecommons.org/licenses/by/4.0/">CC-BY</a></div>'
+            f"<table>{file_rows(files)}</table>",
+        ),
+        # RDFa throughout the page
+        "rdfa everywhere": page(
+            "",
+            '<div vocab="http://schema.org/" typeof="Dataset"><table>'
+            + "".join(
+                f'<tr property="distribution" typeof="DataDownload"><td><a property="contentUrl" '
+                f'href="https://example.org/files/{i}.nc">file_{i}.nc</a></td></tr>'
+                for i in range(files // 4)
+            )
+            + "</table></div>",
+        ),
+    }
+
+
+def rdfa_graph(tree):
+    return pyRdfa(media_type="text/html").graph_from_DOM(tree)
+
+
+@pytest.mark.manual
+def test_rdfa_prescan_benchmark():
+    legacy_total, prescan_total = 0, 0
+    for name, html in corpus(FILES).items():
+        document = LandingPageDocument(html)
+        document.tree
+        # pyRdfa leaves a lot of garbage, collect it to not measure it in the next step
+        gc.collect()
+        start = time.perf_counter()
+        prescan_graph = rdfa_graph(document.get_rdfa_tree()) if document.has_rdfa() else None
+        prescan_time = time.perf_counter() - start
+        gc.collect()
+        start = time.perf_counter()
+        legacy_graph = rdfa_graph(document.tree)
+        legacy_time = time.perf_counter() - start
+        legacy_total += legacy_time
+        prescan_total += prescan_time
+        print(f"\n{name}: legacy {legacy_time:.3f}s, pre-scan {prescan_time:.3f}s", end="")
+        if prescan_graph is None:
+            # skipped pages only give XHTML vocabulary triples (role, license) which are not used as metadata
+            assert all(str(predicate).startswith(XHTML_VOCAB) for predicate in legacy_graph.predicates())
+        else:
+            assert len(prescan_graph) > 0
+            assert isomorphic(prescan_graph, legacy_graph)
+    print(f"\ncorpus: legacy {legacy_total:.3f}s, pre-scan {prescan_total:.3f}s")
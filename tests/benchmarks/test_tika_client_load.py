@@ -0,0 +1,96 @@
+# SPDX-FileCopyrightText: 2020 PANGAEA (https://www.pangaea.de/)
+#
+# SPDX-License-Identifier: MIT
+
+"""
+Load test of the data content path (download, type detection, Tika parsing) without a Tika server.
+
+Many assessments harvest their data objects concurrently from a local HTTP server, Tika is replaced by the local
+backend with a simulated latency. The number of concurrent Tika requests stays within the configured limit and no
+request fails. Run with pytest -s to see the timings.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from fuji_server.harvester.data_harvester import DataHarvester
+from fuji_server.helper.parsed_content_cache import ParsedContentCache
+from fuji_server.helper.tika_client import LocalTikaBackend, TikaClient
+
+ASSESSMENTS = 40
+FILES_PER_ASSESSMENT = 3
+TIKA_LATENCY = 0.05
+MAX_IN_FLIGHT = 4
+
+
+class DataHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = b"%PDF-1.7\n" + self.path.encode() + bytes(range(256)) * 64
+        self.send_response(200)
+        self.send_header("Content-Type", "application/pdf")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class DataServer(ThreadingHTTPServer):
+    # all assessments connect at once, the default listen backlog of 5 refuses connections
+    request_queue_size = 256
+
+
+class MeasuringBackend(LocalTikaBackend):
+    def __init__(self, latency):
+        super().__init__(latency)
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def parse(self, content, timeout):
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            return super().parse(content, timeout)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+
+@pytest.mark.manual
+def test_tika_client_load(monkeypatch, http_server):
+    base_url = http_server(DataHandler, DataServer)
+    for name in ("backend", "max_in_flight", "deadline", "_slots"):
+        monkeypatch.setattr(TikaClient, name, getattr(TikaClient, name))
+    backend = MeasuringBackend(TIKA_LATENCY)
+    TikaClient.configure(backend=backend, max_in_flight=MAX_IN_FLIGHT, deadline=60)
+    ParsedContentCache.set_db_path(None)
+
+    def assess(assessment):
+        data_links = [
+            {"url": f"{base_url}/{assessment}/file_{i}.pdf", "type": "application/pdf"}
+            for i in range(FILES_PER_ASSESSMENT)
+        ]
+        harvester = DataHarvester(data_links, logging.getLogger("test_tika_client_load"))
+        harvester.retrieve_all_data()
+        return harvester.data
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(ASSESSMENTS) as executor:
+        results = list(executor.map(assess, range(ASSESSMENTS)))
+    duration = time.perf_counter() - start
+    data_objects = [data_object for data in results for data_object in data.values()]
+    assert len(data_objects) == ASSESSMENTS * FILES_PER_ASSESSMENT
+    assert all(data_object.get("tika_status") == 200 for data_object in data_objects)
+    assert backend.max_in_flight == MAX_IN_FLIGHT
+    print(
+        f"\n{len(data_objects)} data objects of {ASSESSMENTS} concurrent assessments in {duration:.2f} s, "
+        f"max {backend.max_in_flight} concurrent Tika requests (lower bound {len(data_objects) * TIKA_LATENCY / MAX_IN_FLIGHT:.2f} s)"
+    )
@@ -0,0 +1,40 @@
+# SPDX-FileCopyrightText: 2020 PANGAEA (https://www.pangaea.de/)
+#
+# SPDX-License-Identifier: MIT
+
+"""
+Benchmark of the measured variable test against the text of a tabular data object.
+
+Every variable is searched in the text with the 'in' operator (legacy) and compared with the single pass of the
+VariableMatcher. Run with pytest -s to see the timings.
+"""
+
+import random
+import time
+
+import pytest
+
+from fuji_server.helper.variable_matcher import VariableMatcher
+
+VARIABLES = 500
+ROWS = 20000
+
+
+@pytest.mark.manual
+def test_variable_matching_benchmark():
+    randomizer = random.Random(0)
+    variables = [f"sea_water_parameter_{i} [unit {i % 7}]" for i in range(VARIABLES)]
+    columns = variables[:20]
+    rows = (" ".join(f"{randomizer.uniform(-2, 30):.4f}" for _ in columns) + f" STATION-{i % 97}" for i in range(ROWS))
+    text = " ".join(columns) + " " + " ".join(rows)
+    start = time.perf_counter()
+    legacy = {variable for variable in variables if variable in text}
+    legacy_time = time.perf_counter() - start
+    start = time.perf_counter()
+    found = VariableMatcher(variables).find(text)
+    matcher_time = time.perf_counter() - start
+    assert found == legacy == set(columns)
+    print(
+        f"\n{VARIABLES} variables in {len(text) / 1000000:.1f} MB: substring search {legacy_time * 1000:.1f} ms, "
+        f"matcher {matcher_time * 1000:.1f} ms"
+    )
@@ -6,7 +6,9 @@ from __future__ import annotations
 
 import configparser
 import shutil
+import threading
 import time
+from http.server import ThreadingHTTPServer
 from mimetypes import types_map
 from pathlib import Path
 from typing import TYPE_CHECKING
@@ -64,6 +66,30 @@ def temporary_data_directory(tmp_path):
     return tmp_path
 
 
+@pytest.fixture
+def http_server(monkeypatch):
+    """Factory fixture which serves a request handler class on a local ThreadingHTTPServer and returns its base URL.
+
+    Requests to the servers bypass proxies, the hits list of a handler class is reset and the servers are shut down
+    after the test.
+    """
+    monkeypatch.setenv("no_proxy", "127.0.0.1")
+    servers = []
+
+    def start(handler_class, server_class=ThreadingHTTPServer):
+        if hasattr(handler_class, "hits"):
+            monkeypatch.setattr(handler_class, "hits", [])
+        httpd = server_class(("127.0.0.1", 0), handler_class)
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+        servers.append(httpd)
+        return f"http://127.0.0.1:{httpd.server_address[1]}"
+
+    yield start
+    for httpd in servers:
+        httpd.shutdown()
+        httpd.server_close()
+
+
 @pytest.fixture(scope="session", autouse=True)
 def preprocessor(test_config) -> Preprocessor:
     YAML_DIR = test_config["SERVICE"]["yaml_directory"]
@@ -0,0 +1,82 @@
+# SPDX-FileCopyrightText: 2020 PANGAEA (https://www.pangaea.de/)
+#
+# SPDX-License-Identifier: MIT
+
+import io
+import logging
+from email.message import Message
+
+import pytest
+
+from fuji_server.harvester.data_harvester import DataHarvester
+from fuji_server.helper.parsed_content_cache import ParsedContentCache
+from fuji_server.helper.tika_client import TikaClient
+
+URL = "https://repository.example.org/files/stations.csv"
+CSV = b"station,depth,temperature\nA,10,1.5\nB,20,2.5\n"
+
+
+class FakeResponse(io.BytesIO):
+    def __init__(self, content, content_type):
+        super().__init__(content)
+        self.headers = Message()
+        self.headers["Content-Type"] = content_type
+        self.headers["Content-Length"] = str(len(content))
+
+    def getcode(self):
+        return 200
+
+    def geturl(self):
+        return URL
+
+
+class FakeTikaBackend:
+    def __init__(self):
+        self.calls = []
+
+    def parse(self, content, timeout):
+        self.calls.append(content)
+        return {"status": 200, "metadata": {"Content-Type": "application/pdf"}, "content": "\n depth \t temperature"}
+
+
+@pytest.fixture
+def tika_calls(monkeypatch):
+    backend = FakeTikaBackend()
+    for name in ("backend", "deadline", "failure_threshold", "recovery_time"):
+        monkeypatch.setattr(TikaClient, name, getattr(TikaClient, name))
+    TikaClient.configure(backend=backend)
+    ParsedContentCache.set_db_path(None)
+    yield backend.calls
+    ParsedContentCache.set_db_path(None)
+
+
+def test_text_content_is_not_sent_to_tika(tika_calls):
+    harvester = DataHarvester([], logging.getLogger("test_data_harvester"))
+    fileinfo = harvester.set_data_info({"url": URL, "type": "text/csv"}, FakeResponse(CSV, "text/csv"))
+    assert fileinfo["tika_content_type"] == ["text/csv"]
+    assert fileinfo["test_data_content_text"] == CSV.decode().replace("\n", " ")
+    assert not tika_calls
+
+
+def test_tika_only_used_for_text_extraction(tika_calls):
+    pdf = b"%PDF-1.7\n" + bytes(range(256))
+    harvester = DataHarvester([], logging.getLogger("test_data_harvester"), extract_text=False)
+    fileinfo = harvester.set_data_info({"url": URL}, FakeResponse(pdf, "application/octet-stream"))
+    assert fileinfo["tika_content_type"] == ["application/pdf"]
+    assert fileinfo["test_data_content_text"] == ""
+    assert not tika_calls
+    harvester = DataHarvester([], logging.getLogger("test_data_harvester"))
+    fileinfo = harvester.set_data_info({"url": URL}, FakeResponse(pdf, "application/octet-stream"))
+    assert tika_calls == [pdf]
+    assert fileinfo["tika_status"] == 200
+    assert fileinfo["test_data_content_text"] == " depth temperature"
+
+
+def test_parse_results_are_cached(tika_calls):
+    pdf = b"%PDF-1.7\n" + bytes(range(256))
+    for _ in range(3):
+        harvester = DataHarvester([], logging.getLogger("test_data_harvester"))
+        fileinfo = harvester.set_data_info({"url": URL}, FakeResponse(pdf, "application/pdf"))
+        assert fileinfo["test_data_content_text"] == " depth temperature"
+        assert fileinfo["tika_status"] == 200
+    assert len(tika_calls) == 1
@@ -2,9 +2,19 @@
 #
 # SPDX-License-Identifier: MIT
 
+import base64
+import json
 import logging
+import time
+from types import SimpleNamespace
 
+import pytest
+from github.GithubException import RateLimitExceededException
+
+from fuji_server.harvester import github_harvester
 from fuji_server.harvester.github_harvester import GithubHarvester
+from fuji_server.helper.github_harvest_cache import GithubHarvestCache
+from fuji_server.helper.github_token_pool import GithubTokenPool
 
 
 def test_github_harvester():
@@ -13,3 +23,205 @@ def test_github_harvester():
     logger = logging.getLogger()
     harvester = GithubHarvester(id_, logger)
     assert harvester.files_map
+
+
+class FakeRepo:
+    default_branch = "main"
+
+    def __init__(self, files, truncated=False):
+        self.files = files
+        self.truncated = truncated
+        self.blob_requests = []
+        self.contents_requests = []
+        self.tree_requests = []
+
+    def get_git_tree(self, sha, recursive=False):
+        assert recursive
+        self.tree_requests.append(sha)
+        elements = [SimpleNamespace(path=path, type="blob", sha=f"sha-{content}") for path, content in self.files]
+        elements.append(SimpleNamespace(path="docs", type="tree", sha="sha-docs"))
+        # the Git Trees API returns the elements in path order
+        return SimpleNamespace(tree=sorted(elements, key=lambda element: element.path), truncated=self.truncated)
+
+    def get_git_blob(self, sha):
+        self.blob_requests.append(sha)
+        return SimpleNamespace(content=base64.b64encode(sha.removeprefix("sha-").encode()).decode(), encoding="base64")
+
+    def get_contents(self, path):
+        self.contents_requests.append(path)
+        prefix = path + "/" if path else ""
+        entries = {}
+        for file_path, content in self.files:
+            if file_path.startswith(prefix):
+                name = file_path[len(prefix) :].split("/", 1)[0]
+                is_dir = "/" in file_path[len(prefix) :]
+                entries[name] = SimpleNamespace(
+                    path=prefix + name, type="dir" if is_dir else "file", sha=None if is_dir else f"sha-{content}"
+                )
+        return list(entries.values())
+
+
+FILES = [
+    ("README.md", "readme"),
+    ("docs/index.md", "index"),
+    ("docs/usage.md", "usage"),
+    ("src/README.md", "readme"),
+    ("src/main.py", "code"),
+    ("requirements.txt", "numpy"),
+]
+
+
+def test_retrieve_all():
+    harvester = GithubHarvester("some/id", logging.getLogger())
+    repo = FakeRepo(FILES)
+    harvester.retrieve_all(repo)
+    assert harvester.data["README"] == [
+        {"name": "README.md", "path": "README.md", "content": b"readme"},
+        {"name": "README.md", "path": "src/README.md", "content": b"readme"},
+    ]
+    assert harvester.data["dependencies"] == [{"name": "requirements.txt", "path": "requirements.txt"}]
+    assert [entry["path"] for entry in harvester.data["docs_directory"]] == ["docs/index.md", "docs/usage.md"]
+    # blobs are only downloaded for fully parsed files, identical blobs only once
+    assert repo.blob_requests == ["sha-readme"]
+    assert not repo.contents_requests
+    assert repo.tree_requests == ["main"]
+    assert {"tree", "matching", "blobs"} <= set(harvester.timings)
+
+
+def test_list_files_root_files_first():
+    harvester = GithubHarvester("some/id", logging.getLogger())
+    repo = FakeRepo([("Examples/README.md", "example"), *FILES])
+    harvester.retrieve_all(repo)
+    # in path order Examples/README.md comes before the README of the repository root
+    assert [entry["path"] for entry in harvester.data["README"]] == ["README.md", "Examples/README.md", "src/README.md"]
+    assert [path for path, sha in harvester.list_files(repo)][:2] == ["README.md", "requirements.txt"]
+
+
+def test_retrieve_all_truncated_tree():
+    harvester = GithubHarvester("some/id", logging.getLogger())
+    repo = FakeRepo(FILES, truncated=True)
+    harvester.retrieve_all(repo)
+    assert sorted(entry["path"] for entry in harvester.data["README"]) == ["README.md", "src/README.md"]
+    assert sorted(repo.contents_requests) == ["", "docs", "src"]
+
+
+class FakeRequester:
+    def __init__(self, repo_url):
+        self.repo_url = repo_url
+        self.head_sha = "a" * 40
+        self.requests = []
+
+    def requestJson(self, verb, url, headers=None):
+        headers = headers or {}
+        self.requests.append((url.removeprefix(self.repo_url), headers.get("If-None-Match")))
+        if url.endswith("/commits/main"):
+            return 200, {}, self.head_sha
+        if headers.get("If-None-Match") == '"etag-1"':
+            return 304, {}, ""
+        if url.endswith("/license"):
+            body = {"path": "LICENSE", "license": {"name": "MIT License"}}
+        else:
+            body = {"Python": 1000}
+        return 200, {"ETag": '"etag-1"'}, json.dumps(body)
+
+
+@pytest.fixture
+def harvest_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(GithubHarvestCache, "configured", GithubHarvestCache.configured)
+    monkeypatch.setattr(GithubHarvestCache, "max_size", GithubHarvestCache.max_size)
+    GithubHarvestCache.set_db_path(str(tmp_path / "github_harvest_cache.db"))
+    yield GithubHarvestCache
+    GithubHarvestCache.set_db_path(None)
+
+
+def test_responses_count_against_the_cache_size(harvest_cache):
+    license_text = base64.b64encode(b"MIT License" * 10).decode()
+    urls = [f"https://api.github.com/repos/some/repo{number}/license" for number in range(4)]
+    harvest_cache.put_response(urls[0], '"etag"', license_text)
+    response_size = harvest_cache.get_connection().execute("SELECT size FROM etag_response").fetchone()[0]
+    # room for three responses, a fourth response or a harvest result evict the least recently used entries
+    harvest_cache.set_max_size(3 * response_size + 10)
+    for url in urls[1:3]:
+        harvest_cache.put_response(url, '"etag"', license_text)
+    assert harvest_cache.get_response(urls[0]) == ('"etag"', license_text)
+    harvest_cache.put_response(urls[3], '"etag"', license_text)
+    assert harvest_cache.get_response(urls[1]) is None
+    harvest_cache.put("github.com", "some/repo", "a" * 40, {"README": []})
+    assert harvest_cache.get_response(urls[2]) is None
+    assert harvest_cache.get("github.com", "some/repo", "a" * 40) == {"README": []}
+    assert harvest_cache.get_response(urls[0]) is not None
+    assert harvest_cache.get_response(urls[3]) is not None
+
+
+def harvest(repo):
+    harvester = GithubHarvester("https://github.com/some/repo", logging.getLogger())
+    harvester.handle = SimpleNamespace(get_repo=lambda repo_id: repo)
+    harvester.harvest()
+    return harvester
+
+
+def test_harvest_is_cached_per_commit(harvest_cache):
+    repo = FakeRepo(FILES)
+    repo.url = "https://api.github.com/repos/some/repo"
+    repo.language = None
+    repo.requester = FakeRequester(repo.url)
+    first = harvest(repo)
+    assert first.data["license"] == "MIT License"
+    assert first.data["languages"] == {"Python": 1000}
+    assert first.data["README"][0]["content"] == b"readme"
+    second = harvest(repo)
+    assert second.data == first.data
+    assert repo.blob_requests == ["sha-readme"]
+    assert repo.requester.requests[3:] == [("/commits/main", None)]
+    # a new commit is harvested again, unchanged metadata is requested conditionally
+    repo.requester.head_sha = "b" * 40
+    third = harvest(repo)
+    assert third.data == first.data
+    assert repo.requester.requests[4:] == [
+        ("/commits/main", None),
+        ("/license", '"etag-1"'),
+        ("/languages", '"etag-1"'),
+    ]
+    assert repo.blob_requests == ["sha-readme"] * 2
+    assert repo.tree_requests == ["a" * 40, "b" * 40]
+
+
+class FakeGithub:
+    def __init__(self, auth=None, **kwargs):
+        self.token = auth.token
+        self.retry = kwargs.get("retry")
+
+    def get_repo(self, repo_id):
+        if self.token == "token-a":
+            raise RateLimitExceededException(
+                403, {"message": "API rate limit exceeded"}, {"X-RateLimit-Reset": str(int(time.time()) + 3600)}
+            )
+        repo = FakeRepo(FILES)
+        repo.url = "https://api.github.com/repos/some/repo"
+        repo.language = None
+        repo.requester = FakeRequester(repo.url)
+        repo.requester.rate_limiting = (4321, 5000)
+        repo.requester.rate_limiting_resettime = int(time.time()) + 3600
+        return repo
+
+
+def test_harvest_rotates_rate_limited_token(harvest_cache, tmp_path, monkeypatch):
+    monkeypatch.setattr(GithubTokenPool, "tokens", [])
+    monkeypatch.setattr(GithubTokenPool, "rate_limits", {})
+    monkeypatch.setattr(GithubTokenPool, "source", None)
+    token_file = tmp_path / "tokens.txt"
+    token_file.write_text("token-a\ntoken-b\n")
+    GithubTokenPool.load(str(token_file))
+    monkeypatch.setattr(GithubTokenPool, "load", lambda token_file, token: None)
+    monkeypatch.setattr(github_harvester, "Github", FakeGithub)
+    harvester = GithubHarvester("some/repo", logging.getLogger(), verbose=False)
+    assert harvester.token == "token-a"
+    # with several tokens the client does not wait for the rate limit reset
+    assert harvester.handle.retry is not None
+    harvester.harvest()
+    assert harvester.token == "token-b"
+    assert harvester.data["license"] == "MIT License"
+    assert GithubTokenPool.rate_limits["token-a"]["core"]["remaining"] == 0
+    # the quota is tracked from the response headers, the next harvest picks token-b without probing
+    assert GithubTokenPool.rate_limits["token-b"]["core"]["remaining"] == 4321
+    assert GithubHarvester("some/repo", logging.getLogger(), verbose=False).token == "token-b"
@@ -0,0 +1,101 @@
+# SPDX-FileCopyrightText: 2020 PANGAEA (https://www.pangaea.de/)
+#
+# SPDX-License-Identifier: MIT
+
+import logging
+import subprocess
+
+import pytest
+
+from fuji_server.harvester.local_repository_harvester import LocalRepositoryHarvester
+
+MIT_LICENSE = b"""MIT License
+
+Copyright (c) 2024 Someone
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+"""
+
+
+@pytest.fixture
+def repository(tmp_path, monkeypatch):
+    monkeypatch.setattr(LocalRepositoryHarvester, "repository_root", None)
+    monkeypatch.setattr(LocalRepositoryHarvester, "clone_repositories", False)
+    LocalRepositoryHarvester.set_repository_root(str(tmp_path))
+    path = tmp_path / "repository"
+    files = {
+        "LICENSE": MIT_LICENSE,
+        "README.md": b"# Example",
+        "requirements.txt": b"numpy",
+        "docs/index.md": b"docs",
+        ".github/workflows/ci.yml": b"on: push",
+        "src/main.py": b"# SPDX-License-Identifier: MIT\nprint('hello')\n",
+        "src/util.py": b"pass\n",
+        "scripts/run.sh": b"#!/bin/sh\n",
+    }
+    for name, content in files.items():
+        (path / name).parent.mkdir(parents=True, exist_ok=True)
+        (path / name).write_bytes(content)
+    return path
+
+
+def test_harvest_local_directory(repository):
+    harvester = LocalRepositoryHarvester(str(repository), logging.getLogger())
+    harvester.harvest()
+    data = harvester.data
+    assert data["license_file"] == [{"name": "LICENSE", "path": "LICENSE", "content": MIT_LICENSE}]
+    assert data["license_path"] == "LICENSE"
+    assert data["license"] == "mit license"
+    assert data["README"] == [{"name": "README.md", "path": "README.md", "content": b"# Example"}]
+    assert data["dependencies"] == [{"name": "requirements.txt", "path": "requirements.txt"}]
+    assert data["github_actions"][0]["path"] == ".github/workflows/ci.yml"
+    assert data["main_language"] == "Python"
+    assert set(data["languages"]) == {"Python", "Shell"}
+    assert [sample["path"] for sample in data["source_code_samples"]] == ["src/main.py", "src/util.py"]
+
+
+def test_harvest_git_clone(repository, monkeypatch):
+    git = ["git", "-c", "user.name=test", "-c", "user.email=test@example.org"]
+    subprocess.run(["git", "init", "-q", str(repository)], check=True)
+    # untracked files are ignored in git working trees
+    (repository / "build").mkdir()
+    (repository / "build" / "README.md").write_bytes(b"generated")
+    subprocess.run([*git, "-C", str(repository), "add", "LICENSE", "README.md", "src"], check=True)
+    subprocess.run([*git, "-C", str(repository), "commit", "-q", "-m", "initial"], check=True)
+    # the repository is outside of the repository root and served under a remote URL, so it has to be cloned
+    LocalRepositoryHarvester.set_repository_root(None)
+    monkeypatch.setenv("GIT_CONFIG_COUNT", "1")
+    monkeypatch.setenv("GIT_CONFIG_KEY_0", f"url.file://{repository.parent}/.insteadOf")
+    monkeypatch.setenv("GIT_CONFIG_VALUE_0", "https://git.example.org/")
+    url = "https://git.example.org/repository"
+    assert not LocalRepositoryHarvester.accepts(url)
+    LocalRepositoryHarvester.set_clone_repositories(True)
+    assert not LocalRepositoryHarvester.accepts("some/repo")
+    assert not LocalRepositoryHarvester.accepts(url, clone=False)
+    harvester = LocalRepositoryHarvester(url, logging.getLogger())
+    assert harvester.accepts(harvester.id)
+    harvester.harvest()
+    assert "clone" in harvester.timings
+    assert [entry["path"] for entry in harvester.data["README"]] == ["README.md"]
+    assert "dependencies" not in harvester.data
+    assert harvester.data["license"] == "mit license"
+
+
+def test_accepts_only_repository_root(repository, tmp_path):
+    assert LocalRepositoryHarvester.accepts(str(repository))
+    assert not LocalRepositoryHarvester.accepts(str(repository / "missing"))
+    assert not LocalRepositoryHarvester.accepts(str(tmp_path.parent))
+    assert not LocalRepositoryHarvester.accepts("https://github.com/some/repo")
+    LocalRepositoryHarvester.set_repository_root(None)
+    assert not LocalRepositoryHarvester.accepts(str(repository))
+
+
+def test_get_license_name():
+    harvester = LocalRepositoryHarvester("some/repo", logging.getLogger())
+    apache = b"                                 Apache License\n                           Version 2.0, January 2004\n"
+    assert harvester.get_license_name(apache) == "apache license 2.0"
+    assert harvester.get_license_name(b"SPDX-License-Identifier: GPL-3.0-or-later") == (
+        "gnu general public license v3.0 or later"
+    )
+    assert harvester.get_license_name(b"All rights reserved.") is None
@@ -0,0 +1,54 @@
+# SPDX-FileCopyrightText: 2020 PANGAEA (https://www.pangaea.de/)
+#
+# SPDX-License-Identifier: MIT
+
+import logging
+
+from fuji_server.harvester.metadata_harvester import MetadataHarvester
+from fuji_server.helper.metadata_collector import MetadataFormats, MetadataSources
+
+UID = "https://doi.org/10.1594/PANGAEA.902845"
+
+
+def test_merge_metadata():
+    harvester = MetadataHarvester(UID, logger=logging.getLogger())
+    first = {"title": "Title", "keywords": "a,b", "object_content_identifier": [{"url": "u1"}, {"url": "u2"}]}
+    second = {"keywords": ["b", "c"], "object_content_identifier": [{"url": "u2"}, {"url": "u3", "type": "x"}]}
+    namespaces = ["http://schema.org/"]
+    for metadata in (first, second, second):
+        harvester.merge_metadata(
+            metadata,
+            UID,
+            MetadataSources.SCHEMAORG_NEGOTIATED,
+            MetadataFormats.JSONLD,
+            "application/ld+json",
+            "",
+            namespaces,
+        )
+    assert harvester.metadata_merged["keywords"] == ["a", "b", "c"]
+    assert harvester.metadata_merged["object_content_identifier"] == [
+        {"url": "u1"},
+        {"url": "u2"},
+        {"url": "u3", "type": "x"},
+    ]
+    # identical metadata records are only listed once
+    assert len(harvester.metadata_unmerged) == 2
+    # the first record is not changed by later merges
+    assert harvester.metadata_unmerged[0]["metadata"]["keywords"] == ["a", "b"]
+    assert namespaces == ["http://schema.org/"]
+
+
+def test_retrieve_metadata_preharvested():
+    harvester = MetadataHarvester(UID, logger=logging.getLogger())
+    record = (
+        b'<oai_dc:dc xmlns:oai_dc="http://www.openarchives.org/OAI/2.0/oai_dc/" '
+        b'xmlns:dc="http://purl.org/dc/elements/1.1/"><dc:title>Preharvested dataset</dc:title>'
+        b"<dc:creator>Someone</dc:creator></oai_dc:dc>"
+    )
+    record_url = "https://example.org/oai?verb=GetRecord&metadataPrefix=oai_dc&identifier=oai:example.org:1"
+    harvester.preharvested_metadata.append((record_url, record))
+    harvester.retrieve_metadata_preharvested()
+    assert harvester.metadata_merged["title"] == ["Preharvested dataset"]
+    assert harvester.metadata_unmerged[0]["url"] == record_url
+    assert harvester.metadata_unmerged[0]["offering_method"] == "metadata_service"
+    assert harvester.metadata_sources[0][0] == "XML_OAI_PMH"
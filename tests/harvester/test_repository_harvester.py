@@ -0,0 +1,195 @@
+# SPDX-FileCopyrightText: 2020 PANGAEA (https://www.pangaea.de/)
+#
+# SPDX-License-Identifier: MIT
+
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+import requests
+
+from fuji_server.harvester.repository_harvester import RepositoryHarvester
+from fuji_server.helper.catalogue_helper_datacite import MetaDataCatalogueDataCite
+from fuji_server.helper.negotiation_planner import NegotiationPlanner
+from fuji_server.helper.redirect_memo import RedirectMemo
+from fuji_server.helper.request_helper import RequestHelper
+
+RECORD = """<record><header{status}><identifier>oai:example.org:{number}</identifier>
+<datestamp>2024-01-0{number}</datestamp><setSpec>data</setSpec></header>
+<metadata><oai_dc:dc xmlns:oai_dc="http://www.openarchives.org/OAI/2.0/oai_dc/"
+xmlns:dc="http://purl.org/dc/elements/1.1/"><dc:title>Dataset {number}</dc:title>
+<dc:identifier>https://example.org/dataset/{number}</dc:identifier></oai_dc:dc></metadata></record>"""
+
+PAGES = {
+    None: ([1, 2], "page-2"),
+    "page-2": ([3, 4], "page-3"),
+    "page-3": ([5], ""),
+}
+
+
+class OAIHandler(BaseHTTPRequestHandler):
+    hits = []
+    fail_token = None
+
+    def do_GET(self):
+        params = {k: v[0] for k, v in parse_qs(urlparse(self.path).query).items()}
+        OAIHandler.hits.append(params)
+        token = params.get("resumptionToken")
+        if params["verb"] == "Identify":
+            body = (
+                "<Identify><repositoryName>Example</repositoryName><baseURL>http://example.org/oai</baseURL>"
+                "<protocolVersion>2.0</protocolVersion><granularity>YYYY-MM-DD</granularity></Identify>"
+            )
+        elif token not in PAGES or (token is not None and token == OAIHandler.fail_token):
+            self.send_response(404)
+            self.end_headers()
+            return
+        else:
+            numbers, next_token = PAGES[token]
+            records = "".join(
+                RECORD.format(number=number, status=' status="deleted"' if number == 4 else "") for number in numbers
+            )
+            verb = params["verb"]
+            body = f"<{verb}>{records}<resumptionToken>{next_token}</resumptionToken></{verb}>"
+        body = f'<?xml version="1.0"?><OAI-PMH xmlns="http://www.openarchives.org/OAI/2.0/">{body}</OAI-PMH>'
+        self.send_response(200)
+        self.send_header("Content-Type", "text/xml")
+        self.end_headers()
+        self.wfile.write(body.encode())
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def endpoint(http_server):
+    return http_server(OAIHandler) + "/oai"
+
+
+def test_identify(endpoint):
+    harvester = RepositoryHarvester(endpoint_url=endpoint)
+    assert harvester.identify()["repositoryName"] == "Example"
+
+
+def test_list_records_follows_resumption_tokens(endpoint):
+    harvester = RepositoryHarvester(endpoint_url=endpoint + "?verb=Identify")
+    records = harvester.list_records()
+    first = next(records)
+    # records are yielded while the pages are requested
+    assert len(OAIHandler.hits) == 1
+    assert first["identifier"] == "oai:example.org:1"
+    assert first["sets"] == ["data"]
+    assert b"Dataset 1" in first["metadata"]
+    assert first["url"] == endpoint + "?verb=GetRecord&metadataPrefix=oai_dc&identifier=oai%3Aexample.org%3A1"
+    rest = list(records)
+    assert [record["identifier"][-1] for record in rest] == ["2", "3", "4", "5"]
+    assert rest[2]["deleted"]
+    assert [request.get("resumptionToken") for request in OAIHandler.hits] == [None, "page-2", "page-3"]
+    assert harvester.harvest(max_records=2)[1]["identifier"] == "oai:example.org:2"
+
+
+def test_list_identifiers(endpoint):
+    harvester = RepositoryHarvester(endpoint_url=endpoint, set_spec="data", from_date="2024-01-01")
+    headers = list(harvester.list_identifiers())
+    assert len(headers) == 5
+    assert "metadata" not in headers[0]
+    assert OAIHandler.hits[0] == {
+        "verb": "ListIdentifiers",
+        "metadataPrefix": "oai_dc",
+        "set": "data",
+        "from": "2024-01-01",
+    }
+
+
+def test_resume_from_checkpoint(endpoint, tmp_path, monkeypatch):
+    checkpoint_path = str(tmp_path / "crawl.json")
+    monkeypatch.setattr(OAIHandler, "fail_token", "page-3")
+    harvester = RepositoryHarvester(endpoint_url=endpoint, checkpoint_path=checkpoint_path)
+    with pytest.raises(requests.HTTPError):
+        list(harvester.list_records())
+    monkeypatch.setattr(OAIHandler, "fail_token", None)
+    OAIHandler.hits.clear()
+    resumed = RepositoryHarvester(endpoint_url=endpoint, checkpoint_path=checkpoint_path)
+    assert [record["identifier"] for record in resumed.list_records()] == ["oai:example.org:5"]
+    assert OAIHandler.hits[0]["resumptionToken"] == "page-3"
+    # the checkpoint of the completed crawl is removed
+    assert not (tmp_path / "crawl.json").exists()
+
+
+def test_assess(endpoint):
+    harvester = RepositoryHarvester(endpoint_url=endpoint, logger=logging.getLogger())
+
+    def assess_record(record):
+        if record["identifier"].endswith("3"):
+            raise ValueError("assessment failed")
+        return harvester.get_assessment_target(record)
+
+    results = list(harvester.assess(assess_record, max_workers=2, prefetch_listing=False))
+    assert [result for _, result in results] == [
+        "https://example.org/dataset/1",
+        "https://example.org/dataset/2",
+        None,
+        "https://example.org/dataset/5",
+    ]
+
+
+def test_assess_prefetches_datacite_listing(monkeypatch):
+    batches = []
+    monkeypatch.setattr(
+        MetaDataCatalogueDataCite, "prefetch", classmethod(lambda cls, pids, logger=None: batches.append(pids))
+    )
+    harvester = RepositoryHarvester(endpoint_url="http://example.org/oai", logger=logging.getLogger())
+    records = [
+        {
+            "identifier": "oai:example.org:1",
+            "metadata": "<dc><identifier>https://doi.org/10.1234/ABC</identifier></dc>",
+        },
+        {"identifier": "oai:example.org:2", "metadata": "<dc><identifier>https://example.org/2</identifier></dc>"},
+        {"identifier": "oai:example.org:3", "metadata": "<dc><identifier>10.1234/def</identifier></dc>"},
+        {
+            "identifier": "oai:example.org:4",
+            "metadata": "<dc><identifier>10.1234/ghi</identifier></dc>",
+            "deleted": True,
+        },
+        {"identifier": "oai:example.org:5", "metadata": "<dc><identifier>doi:10.1234/jkl</identifier></dc>"},
+    ]
+    results = list(harvester.assess(harvester.get_assessment_target, records=records, max_workers=1))
+    assert len(results) == 4
+    # the DOIs of each batch of records are looked up before the batch is assessed
+    assert batches == [["10.1234/ABC"], ["10.1234/def"], ["10.1234/jkl"]]
+
+
+def test_concurrent_assessments_keep_their_request_caches():
+    harvester = RepositoryHarvester(endpoint_url="http://example.org/oai", logger=logging.getLogger())
+    records = [{"identifier": f"oai:example.org:{number}", "url": "https://example.org/shared"} for number in (1, 2)]
+    first_recorded = threading.Event()
+    second_reset = threading.Event()
+
+    def assess_record(record):
+        # like FAIRCheck.__init__, each assessment starts with reset request caches
+        RequestHelper.reset_cache()
+        if record["identifier"].endswith("1"):
+            RequestHelper.get_checked_content()["shared"] = {"checked": True}
+            RedirectMemo.record(record["url"], "text/html", [("https://example.org/landing", 302, None, False)])
+            for accept_type in ("application/ld+json", "application/rdf+xml"):
+                NegotiationPlanner.record_response(record["url"], accept_type, 200, [], "text/html", b"<html/>")
+            first_recorded.set()
+            assert second_reset.wait(5)
+        else:
+            assert first_recorded.wait(5)
+            RequestHelper.reset_cache()
+            second_reset.set()
+        return (
+            RequestHelper(record["url"]).checked_content.get("shared"),
+            RedirectMemo.get_shortcut(record["url"], "text/html")[0],
+            NegotiationPlanner.should_negotiate(record["url"]),
+        )
+
+    results = [result for _, result in harvester.assess(assess_record, records=records, max_workers=2)]
+    # the reset of the second assessment does not remove the flags and hops of the first one and vice versa
+    assert results == [
+        ({"checked": True}, "https://example.org/landing", False),
+        (None, "https://example.org/shared", True),
+    ]
@@ -0,0 +1,84 @@
+# SPDX-FileCopyrightText: 2020 PANGAEA (https://www.pangaea.de/)
+#
+# SPDX-License-Identifier: MIT
+
+import json
+import logging
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+
+from fuji_server.helper.catalogue_helper_datacite import MetaDataCatalogueDataCite
+from fuji_server.helper.catalogue_helper_mendeley_data import MetaDataCatalogueMendeleyData
+from fuji_server.helper.catalogue_listing_cache import CatalogueListingCache
+
+
+class CatalogueHandler(BaseHTTPRequestHandler):
+    hits = []
+
+    def do_GET(self):
+        CatalogueHandler.hits.append(self.path)
+        if self.path.startswith("/dois/"):
+            status = {"/dois/10.1234/listed": 200, "/dois/10.1234/error": 500}.get(self.path, 404)
+            body = b"{}"
+        else:
+            status = 200
+            results = [{"doi": "10.1234/mendeley"}] if self.path.endswith("10.1234/mendeley") else []
+            body = json.dumps({"results": results}).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch, http_server):
+    CatalogueListingCache.set_db_path(str(tmp_path / "cache" / "listing.db"))
+    url = http_server(CatalogueHandler)
+    monkeypatch.setattr(MetaDataCatalogueDataCite, "apiURI", url + "/dois")
+    monkeypatch.setattr(MetaDataCatalogueMendeleyData, "apiURI", url + "/search?query=")
+    yield url
+    CatalogueListingCache.set_db_path(None)
+
+
+def test_datacite_listing_is_cached(server):
+    logger = logging.getLogger("test_catalogue_helper")
+    for _ in range(2):
+        datacite = MetaDataCatalogueDataCite(logger)
+        datacite.query("10.1234/listed")
+        assert datacite.islisted
+        datacite = MetaDataCatalogueDataCite(logger)
+        datacite.query("10.1234/missing")
+        assert not datacite.islisted
+    assert sorted(CatalogueHandler.hits) == ["/dois/10.1234/listed", "/dois/10.1234/missing"]
+
+
+def test_prefetch_batch_and_failed_lookups_are_not_cached(server):
+    pids = ["10.1234/listed", "10.1234/missing", "10.1234/error", "10.1234/listed"]
+    assert MetaDataCatalogueDataCite.prefetch(pids) == {
+        "10.1234/listed": True,
+        "10.1234/missing": False,
+        "10.1234/error": None,
+    }
+    assert CatalogueListingCache.get_many("DataCite Registry", pids) == {
+        "10.1234/listed": True,
+        "10.1234/missing": False,
+    }
+    MetaDataCatalogueDataCite.prefetch(pids)
+    assert CatalogueHandler.hits.count("/dois/10.1234/error") == 2
+    assert len(CatalogueHandler.hits) == 4
+
+
+def test_mendeley_data_pids_are_looked_up_once(server):
+    logger = logging.getLogger("test_catalogue_helper")
+    mendeley = MetaDataCatalogueMendeleyData(logger)
+    mendeley.query(["10.1234/mendeley", "https://example.org/landing", None])
+    assert mendeley.islisted
+    mendeley = MetaDataCatalogueMendeleyData(logger)
+    mendeley.query(["https://example.org/landing"])
+    assert not mendeley.islisted
+    assert len(CatalogueHandler.hits) == 2
@@ -0,0 +1,101 @@
+# SPDX-FileCopyrightText: 2020 PANGAEA (https://www.pangaea.de/)
+#
+# SPDX-License-Identifier: MIT
+
+import logging
+import sqlite3
+
+import pytest
+
+from fuji_server.helper.catalogue_helper_google_datasearch import MetaDataCatalogueGoogleDataSearch
+from fuji_server.helper.create_google_cache_db import main as create_google_cache_db_main
+from fuji_server.helper.uri_bloom_filter import UriBloomFilter
+
+URIS = ["https://doi.org/10.1234/listed", "https://example.org/dataset/o'brien", "10.5555/another"]
+
+
+def create_google_cache_db(path, uris):
+    con = sqlite3.connect(path)
+    with con:
+        con.execute("CREATE TABLE google_links (uri TEXT, source INTEGER)")
+        con.executemany("INSERT INTO google_links VALUES (?, 0)", [(uri,) for uri in uris])
+        con.execute("CREATE INDEX google_uri_index ON google_links (uri)")
+    con.close()
+
+
+@pytest.fixture
+def google_cache(tmp_path):
+    MetaDataCatalogueGoogleDataSearch.reset_cache()
+    create_google_cache_db(tmp_path / "google_cache.db", URIS)
+
+    def get_helper():
+        helper = MetaDataCatalogueGoogleDataSearch(logging.getLogger("test_catalogue_helper_google_datasearch"))
+        helper.google_cache_db_path = str(tmp_path / "google_cache.db")
+        helper.google_cache_bloom_path = str(tmp_path / "google_cache.bloom")
+        return helper
+
+    yield get_helper
+    MetaDataCatalogueGoogleDataSearch.reset_cache()
+
+
+def test_bloom_filter_has_no_false_negatives(tmp_path):
+    bloom_filter = UriBloomFilter.for_capacity(10000, 0.01)
+    for i in range(10000):
+        bloom_filter.add(f"https://example.org/dataset/{i}")
+    bloom_filter.max_rowid = 10000
+    bloom_filter.save(tmp_path / "uris.bloom")
+    loaded = UriBloomFilter.load(tmp_path / "uris.bloom")
+    assert (loaded.count, loaded.max_rowid) == (10000, 10000)
+    assert all(f"https://example.org/dataset/{i}" in loaded for i in range(10000))
+    false_positives = sum(f"https://example.org/other/{i}" in loaded for i in range(10000))
+    assert false_positives < 200
+
+
+def test_query_uses_parameters(google_cache):
+    helper = google_cache()
+    helper.query(["https://example.org/dataset/O'Brien", None])
+    assert helper.islisted
+    helper = google_cache()
+    helper.query(["https://example.org/x') OR 1=1 --"])
+    assert not helper.islisted
+
+
+def test_query_with_bloom_filter(google_cache):
+    bloom_filter = google_cache().create_bloom_filter()
+    assert bloom_filter.max_rowid == len(URIS)
+    helper = google_cache()
+    assert helper.lookup_cache(["https://doi.org/10.1234/listed", "https://doi.org/10.1234/missing"]) == [
+        "https://doi.org/10.1234/listed"
+    ]
+    assert helper.get_bloom_filter() is not None
+    # records added after the filter was built are found
+    helper.add_google_search_record("https://doi.org/10.1234/ADDED")
+    assert google_cache().lookup_cache(["https://doi.org/10.1234/added"]) == ["https://doi.org/10.1234/added"]
+    MetaDataCatalogueGoogleDataSearch.reset_cache()
+    assert google_cache().lookup_cache(["https://doi.org/10.1234/added"]) == ["https://doi.org/10.1234/added"]
+
+
+def test_create_cache_db_from_corpus(tmp_path):
+    corpus_file = tmp_path / "dataset_metadata.csv"
+    corpus_file.write_text(
+        "dataset_name,url,doi\n"
+        "a,https://Example.org/A,10.1234/A\n"
+        "b, https://example.org/a ,\n"
+        "c,https://example.org/c,10.1234/a\n"
+        "d,,10.1234/D\n"
+    )
+    MetaDataCatalogueGoogleDataSearch.reset_cache()
+    db_path = tmp_path / "cache" / "google.db"
+    assert create_google_cache_db_main([str(corpus_file), "--db", str(db_path), "--chunk-size", "2"]) == 0
+    con = sqlite3.connect(db_path)
+    uris = [uri for (uri,) in con.execute("SELECT uri FROM google_links ORDER BY uri")]
+    con.close()
+    assert uris == ["10.1234/a", "10.1234/d", "https://example.org/a", "https://example.org/c"]
+    assert sorted(path.name for path in db_path.parent.iterdir()) == ["google.bloom", "google.db"]
+    helper = MetaDataCatalogueGoogleDataSearch(logging.getLogger("test_catalogue_helper_google_datasearch"))
+    helper.google_cache_db_path = str(db_path)
+    helper.google_cache_bloom_path = str(tmp_path / "cache" / "google.bloom")
+    helper.query(["10.1234/D", "https://example.org/unlisted"])
+    assert helper.islisted
+    assert helper.get_bloom_filter().count == 4
+    MetaDataCatalogueGoogleDataSearch.reset_cache()
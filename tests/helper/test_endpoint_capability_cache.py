@@ -0,0 +1,124 @@
+# SPDX-FileCopyrightText: 2020 PANGAEA (https://www.pangaea.de/)
+#
+# SPDX-License-Identifier: MIT
+
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+
+from fuji_server.helper.endpoint_capability_cache import EndpointCapabilityCache
+from fuji_server.helper.metadata_provider_oai import OAIMetadataProvider
+from fuji_server.helper.request_helper import RequestHelper
+
+LIST_METADATA_FORMATS = b"""<?xml version="1.0" encoding="UTF-8"?>
+<OAI-PMH xmlns="http://www.openarchives.org/OAI/2.0/">
+  <ListMetadataFormats>
+    <metadataFormat>
+      <metadataPrefix>oai_dc</metadataPrefix>
+      <schema>http://www.openarchives.org/OAI/2.0/oai_dc.xsd</schema>
+    </metadataFormat>
+    <metadataFormat>
+      <metadataPrefix>datacite</metadataPrefix>
+      <schema>http://schema.datacite.org/meta/kernel-4/metadata.xsd</schema>
+    </metadataFormat>
+  </ListMetadataFormats>
+</OAI-PMH>"""
+
+
+class OAIHandler(BaseHTTPRequestHandler):
+    hits = []
+
+    def do_GET(self):
+        OAIHandler.hits.append(self.path)
+        if self.path.startswith("/oai"):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/xml")
+            self.send_header("Content-Length", str(len(LIST_METADATA_FORMATS)))
+            self.end_headers()
+            self.wfile.write(LIST_METADATA_FORMATS)
+        else:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(EndpointCapabilityCache, "ttl", EndpointCapabilityCache.ttl)
+    monkeypatch.setattr(EndpointCapabilityCache, "negative_ttl", EndpointCapabilityCache.negative_ttl)
+    EndpointCapabilityCache.set_db_path(str(tmp_path / "cache" / "capabilities.db"))
+    yield EndpointCapabilityCache
+    EndpointCapabilityCache.set_db_path(None)
+
+
+@pytest.fixture
+def server(http_server):
+    RequestHelper.reset_cache()
+    yield http_server(OAIHandler)
+    RequestHelper.reset_cache()
+
+
+def get_provider(endpoint):
+    return OAIMetadataProvider(
+        endpoint=endpoint, logger=logging.getLogger("test_endpoint_capability_cache"), metric_id="FsF-R1.3-01M"
+    )
+
+
+def test_cache_is_persistent_and_expires(cache, tmp_path):
+    capability = {"available": True, "standards": {"oai_dc": "oai_dc.xsd"}, "namespaces": ["oai_dc.xsd"]}
+    cache.put("oai-pmh", "https://example.org/oai", capability)
+    cache.set_db_path(str(tmp_path / "cache" / "capabilities.db"))
+    assert cache.get("oai-pmh", "https://example.org/oai") == capability
+    assert cache.get("csw", "https://example.org/oai") is None
+    # unavailable endpoints expire after the negative time to live
+    cache.set_ttl(negative_ttl=0.2)
+    cache.put("sparql", "https://example.org/sparql", {"available": False})
+    assert cache.get("sparql", "https://example.org/sparql") == {"available": False, "standards": {}, "namespaces": []}
+    time.sleep(0.3)
+    assert cache.get("sparql", "https://example.org/sparql") is None
+
+
+def test_endpoint_is_retrieved_once_by_concurrent_assessments(cache):
+    calls = []
+
+    def retrieve():
+        calls.append(1)
+        time.sleep(0.1)
+        return {"available": True, "standards": {}, "namespaces": ["https://example.org/ns#"]}
+
+    threads = [
+        threading.Thread(target=cache.get_or_retrieve, args=("csw", "https://example.org/csw", retrieve))
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    # the lock of the endpoint is removed once no retrieval is waiting for it
+    assert cache._endpoint_locks == {}
+
+
+def test_oai_metadata_formats_are_listed_once(cache, server):
+    standards = get_provider(server + "/oai?verb=Identify").getMetadataStandards()
+    provider = get_provider(server + "/oai")
+    assert provider.getMetadataStandards() == standards
+    assert standards == {
+        "oai_dc": "http://www.openarchives.org/OAI/2.0/oai_dc.xsd",
+        "datacite": "http://schema.datacite.org/meta/kernel-4/metadata.xsd",
+    }
+    assert provider.getNamespaces() == list(standards.values())
+    assert OAIHandler.hits == ["/oai?verb=ListMetadataFormats"]
+
+
+def test_unavailable_endpoint_is_cached(cache, server):
+    assert get_provider(server + "/missing").getMetadataStandards() == {}
+    assert get_provider(server + "/missing").getMetadataStandards() == {}
+    assert OAIHandler.hits == ["/missing?verb=ListMetadataFormats"]
+    assert cache.get("oai-pmh", server + "/missing")["available"] is False
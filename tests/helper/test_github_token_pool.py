@@ -0,0 +1,62 @@
+# SPDX-FileCopyrightText: 2020 PANGAEA (https://www.pangaea.de/)
+#
+# SPDX-License-Identifier: MIT
+
+import time
+
+import pytest
+
+from fuji_server.helper.github_token_pool import GithubTokenPool
+
+
+@pytest.fixture
+def token_pool(tmp_path, monkeypatch):
+    monkeypatch.setattr(GithubTokenPool, "tokens", [])
+    monkeypatch.setattr(GithubTokenPool, "rate_limits", {})
+    monkeypatch.setattr(GithubTokenPool, "source", None)
+    token_file = tmp_path / "tokens.txt"
+    token_file.write_text("token-a\ntoken-b\n\ntoken-c\ntoken-a\n")
+    GithubTokenPool.load(str(token_file))
+    return GithubTokenPool
+
+
+def test_load_token_file(token_pool):
+    assert token_pool.tokens == ["token-a", "token-b", "token-c"]
+    assert token_pool.acquire() == "token-a"
+
+
+def test_load_single_token(token_pool):
+    token_pool.load("", "token-x")
+    assert token_pool.tokens == ["token-x"]
+    token_pool.load("", "")
+    assert token_pool.tokens == []
+    assert token_pool.acquire() is None
+
+
+def test_acquire_uses_tracked_rate_limits(token_pool):
+    reset = time.time() + 3600
+    token_pool.update("token-a", "core", 900, reset)
+    token_pool.update("token-b", "core", 4000, reset)
+    token_pool.update("token-c", "core", 4500, reset)
+    token_pool.update("token-c", "search", 1, reset)
+    # token-c has not enough search requests left
+    assert token_pool.acquire() == "token-b"
+    token_pool.mark_exhausted("token-b", "core", reset)
+    token_pool.update("token-c", "core", 0, reset)
+    # no token has enough requests left, the one with the most remaining requests is used
+    assert token_pool.acquire() == "token-a"
+    token_pool.mark_exhausted("token-a")
+    assert token_pool.acquire() is None
+
+
+def test_expired_rate_limits_are_ignored(token_pool):
+    token_pool.mark_exhausted("token-a", "core", time.time() - 1)
+    assert token_pool.rate_limits["token-a"]["core"]["reset"] > time.time()
+    token_pool.update("token-a", "core", 0, time.time() - 1)
+    assert token_pool.acquire() == "token-a"
+
+
+def test_discard(token_pool):
+    token_pool.discard("token-a")
+    assert token_pool.acquire() == "token-b"
+    assert "token-a" not in token_pool.rate_limits
@@ -0,0 +1,107 @@
+# SPDX-FileCopyrightText: 2020 PANGAEA (https://www.pangaea.de/)
+#
+# SPDX-License-Identifier: MIT
+
+import json
+from collections import OrderedDict
+
+import pytest
+import rdflib
+import requests
+
+from fuji_server.helper.jsonld_context_loader import JsonLdContextLoader
+
+SCHEMA_ORG_DATASET = {
+    "@context": "https://schema.org/",
+    "@type": "Dataset",
+    "@id": "https://example.org/dataset/1",
+    "name": "Sample dataset",
+    "creator": {"@type": "Person", "name": "Jane Doe"},
+}
+
+
+class FakeResponse:
+    def __init__(self, document, status_code=200):
+        self.document = document
+        self.status_code = status_code
+
+    def json(self):
+        return self.document
+
+
+@pytest.fixture(autouse=True)
+def context_loader(monkeypatch):
+    monkeypatch.setattr(JsonLdContextLoader, "allow_remote_contexts", True)
+    monkeypatch.setattr(JsonLdContextLoader, "max_cached_contexts", 128)
+    monkeypatch.setattr(JsonLdContextLoader, "remote_contexts", OrderedDict())
+    return JsonLdContextLoader
+
+
+@pytest.fixture
+def fake_remote(monkeypatch):
+    requested = []
+
+    def fake_get(url, headers=None, timeout=None):
+        requested.append(url)
+        if url.endswith("missing.jsonld"):
+            return FakeResponse(None, 404)
+        return FakeResponse({"@context": {"title": {"@id": f"{url}#title"}}})
+
+    monkeypatch.setattr(requests, "get", fake_get)
+    return requested
+
+
+def test_schema_org_context_offline(monkeypatch):
+    def no_network(*args, **kwargs):
+        raise AssertionError("network access")
+
+    monkeypatch.setattr(requests, "get", no_network)
+    JsonLdContextLoader.set_allow_remote_contexts(False)
+    jsonld = JsonLdContextLoader.resolve_contexts(json.loads(json.dumps(SCHEMA_ORG_DATASET)))
+    assert isinstance(jsonld["@context"], dict)
+    assert jsonld["@context"]["@vocab"] == "http://schema.org/"
+    graph = rdflib.ConjunctiveGraph().parse(data=jsonld, format="json-ld")
+    dataset = rdflib.URIRef("https://example.org/dataset/1")
+    assert (dataset, rdflib.RDF.type, rdflib.URIRef("http://schema.org/Dataset")) in graph
+    assert (dataset, rdflib.URIRef("http://schema.org/name"), rdflib.Literal("Sample dataset")) in graph
+
+
+def test_remote_context_forbidden(fake_remote):
+    JsonLdContextLoader.set_allow_remote_contexts(False)
+    with pytest.raises(ValueError):
+        JsonLdContextLoader.resolve_contexts({"@context": "https://example.org/context.jsonld", "title": "x"})
+    assert fake_remote == []
+
+
+def test_remote_contexts_cached(fake_remote):
+    JsonLdContextLoader.set_max_cached_contexts(2)
+    for url in ["https://example.org/a.jsonld", "https://example.org/b.jsonld", "https://example.org/a.jsonld"]:
+        JsonLdContextLoader.load_context(url)
+    assert fake_remote == ["https://example.org/a.jsonld", "https://example.org/b.jsonld"]
+    JsonLdContextLoader.load_context("https://example.org/c.jsonld")
+    assert list(JsonLdContextLoader.remote_contexts) == ["https://example.org/a.jsonld", "https://example.org/c.jsonld"]
+    with pytest.raises(ValueError):
+        JsonLdContextLoader.load_context("https://example.org/missing.jsonld")
+    with pytest.raises(ValueError):
+        JsonLdContextLoader.load_context("https://example.org/missing.jsonld")
+    assert fake_remote.count("https://example.org/missing.jsonld") == 1
+
+
+def test_nested_and_list_contexts(fake_remote):
+    jsonld = {
+        "@context": ["http://schema.org", "context.jsonld", {"local": "https://example.org/local"}],
+        "@graph": [
+            {
+                "@context": {"nested": {"@id": "https://example.org/nested", "@context": "nested.jsonld"}},
+                "nested": {"title": "Nested"},
+            }
+        ],
+    }
+    JsonLdContextLoader.resolve_contexts(jsonld, "https://example.org/dataset/")
+    context = jsonld["@context"]
+    assert len(context) == 3
+    assert context[0]["@vocab"] == "http://schema.org/"
+    assert context[1] == {"title": {"@id": "https://example.org/dataset/context.jsonld#title"}}
+    nested_context = jsonld["@graph"][0]["@context"]["nested"]["@context"]
+    assert nested_context == {"title": {"@id": "https://example.org/dataset/nested.jsonld#title"}}
+    assert fake_remote == ["https://example.org/dataset/context.jsonld", "https://example.org/dataset/nested.jsonld"]
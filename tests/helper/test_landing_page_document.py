@@ -0,0 +1,104 @@
+# SPDX-FileCopyrightText: 2020 PANGAEA (https://www.pangaea.de/)
+#
+# SPDX-License-Identifier: MIT
+
+import logging
+
+import extruct
+from pyRdfa import pyRdfa
+from rdflib import Literal, URIRef
+from rdflib.compare import isomorphic
+
+from fuji_server.helper.landing_page_document import LandingPageDocument
+
+LANDING_PAGE = """<!DOCTYPE html>
+<html lang="en_EN" prefix="og: http://ogp.me/ns#">
+<head>
+<title>Sample dataset</title>
+<meta name="DC.creator" content="Doe, Jane"/>
+<meta name="citation_title" content="Sample dataset"/>
+<meta property="og:title" content="Sample dataset"/>
+<link rel="describedby" type="application/ld+json" href="https://example.org/meta.json"/>
+<script type="application/ld+json">{"@context": "http://schema.org", "@type": "Dataset", "name": "Sample"}</script>
+</head>
+<body vocab="http://schema.org/" typeof="Dataset">
+<!-- a comment -->
+<h1 property="name">Sample dataset</h1>
+<div itemscope itemtype="http://schema.org/Person"><span itemprop="name">Jane Doe</span></div>
+</body>
+</html>"""
+
+
+def test_document_is_parsed_once():
+    document = LandingPageDocument(LANDING_PAGE.encode("utf-8"))
+    assert document.html == LANDING_PAGE
+    tree = document.tree
+    assert tree is not None
+    assert document.tree is tree
+    assert [link.get("rel") for link in document.get_head_links()] == ["describedby"]
+
+
+def test_meta_tags():
+    document = LandingPageDocument(LANDING_PAGE)
+    assert [meta["name"] for meta in document.get_meta_tags()] == ["DC.creator", "citation_title"]
+    assert document.get_meta_tags(r"(DC|dc|DCTERMS|dcterms)\.([A-Za-z]+)") == [
+        {"name": "DC.creator", "content": "Doe, Jane"}
+    ]
+
+
+def test_text_content():
+    document = LandingPageDocument(LANDING_PAGE)
+    assert document.get_text_content() == "Sample datasetJane Doe"
+    assert document.get_script_length() > 0
+    assert LandingPageDocument("").tree is None
+
+
+def test_parsing_error_is_logged(caplog):
+    document = LandingPageDocument("<!-- only a comment -->", logging.getLogger("test_landing_page_document"))
+    assert document.tree is None
+    assert "Could not parse the landing page HTML" in caplog.text
+
+
+def test_extractors_share_tree():
+    document = LandingPageDocument(LANDING_PAGE)
+    extracted = extruct.extract(document.tree, syntaxes=["microdata", "opengraph", "json-ld"])
+    assert extracted["json-ld"][0]["name"] == "Sample"
+    assert extracted["microdata"][0]["properties"]["name"] == "Jane Doe"
+    assert extracted["opengraph"][0]["properties"] == [("og:title", "Sample dataset")]
+    assert document.clean_language_tag() == "en_EN"
+    rdfa_graph = pyRdfa(media_type="text/html").graph_from_DOM(document.tree)
+    assert (URIRef(""), URIRef("http://schema.org/name"), Literal("Sample dataset", lang="en")) in rdfa_graph
+
+
+def test_rdfa_prescan():
+    assert LandingPageDocument(LANDING_PAGE).has_rdfa()
+    no_rdfa = LandingPageDocument(
+        '<html><head><link rel="stylesheet" href="a.css"/></head><body><nav role="navigation">'
+        '<a rel="license" href="https://creativecommons.org/licenses/by/4.0/">CC-BY</a></nav></body></html>'
+    )
+    assert not no_rdfa.has_rdfa()
+    assert no_rdfa.get_rdfa_tree() is None
+    assert LandingPageDocument('<html><body><a rel="dc:creator" href="#jane">Jane</a></body></html>').has_rdfa()
+    assert LandingPageDocument('<html><head><link rel="DescribedBy" href="m.json"/></head></html>').has_rdfa()
+
+
+def test_rdfa_tree_keeps_relevant_subtrees():
+    rows = "".join(f'<tr><td><a href="https://example.org/{i}.nc">{i}.nc</a></td></tr>' for i in range(50))
+    html = (
+        '<html lang="de"><head><base href="https://example.org/dataset/"/><title>t</title></head><body>'
+        f'<table>{rows}</table><div typeof="schema:Dataset" about="#dataset">'
+        '<span property="schema:name">Sample <b>dataset</b></span></div><p>text</p></body></html>'
+    )
+    document = LandingPageDocument(html)
+    rdfa_tree = document.get_rdfa_tree()
+    assert rdfa_tree is not document.tree
+    assert rdfa_tree.xpath("//table") == [] and rdfa_tree.xpath("//p") == []
+    assert len(document.tree.xpath("//tr")) == 50
+    full_graph = pyRdfa(media_type="text/html").graph_from_DOM(document.tree)
+    rdfa_graph = pyRdfa(media_type="text/html").graph_from_DOM(rdfa_tree)
+    assert isomorphic(full_graph, rdfa_graph)
+    assert (
+        URIRef("https://example.org/dataset/#dataset"),
+        URIRef("http://schema.org/name"),
+        Literal("Sample dataset", lang="de"),
+    ) in rdfa_graph
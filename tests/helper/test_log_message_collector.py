@@ -0,0 +1,75 @@
+# SPDX-FileCopyrightText: 2020 PANGAEA (https://www.pangaea.de/)
+#
+# SPDX-License-Identifier: MIT
+
+import logging
+
+from fuji_server.helper.log_message_collector import ASSESSMENT_LOGGER_NAME, LogMessageCollector, get_assessment_logger
+
+
+def get_collecting_logger(name):
+    logger = logging.getLogger(name)
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    collector = LogMessageCollector()
+    logger.addHandler(collector)
+    return logger, collector
+
+
+def test_messages_grouped_by_metric():
+    logger, collector = get_collecting_logger("test_messages_grouped_by_metric")
+    logger.info("FsF-F1-01D : Trying to resolve identifier -: %s", "https://doi.org/10.1594/PANGAEA.908011")
+    logger.warning("FsF-F2-01M : No metadata found")
+    logger.info("Assessment target: https://doi.org/10.1594/PANGAEA.908011")
+    logger.log(25, "FRSM-01-F1 : Found software identifier")
+    logger.debug("FsF-F1-01D : Not collected below INFO")
+    assert collector.get_messages_dict() == {
+        "FsF-F1-01D": ["INFO: Trying to resolve identifier -: https://doi.org/10.1594/PANGAEA.908011"],
+        "FsF-F2-01M": ["WARNING: No metadata found"],
+        "FRSM-01-F1": [f"{logging.getLevelName(25)}: Found software identifier"],
+    }
+    logger.removeHandler(collector)
+
+
+def test_duplicate_messages():
+    logger, collector = get_collecting_logger("test_duplicate_messages")
+    for _ in range(3):
+        logger.info("FsF-A1-01M : Access condition found")
+        logger.warning("FsF-A1-01M : Access condition found")
+    logger.info("FsF-A1-01M : Another message")
+    assert collector.get_messages_dict() == {
+        "FsF-A1-01M": [
+            "INFO: Access condition found",
+            "WARNING: Access condition found",
+            "INFO: Another message",
+        ]
+    }
+    collector.close()
+    assert collector.get_messages_dict() == {}
+    logger.removeHandler(collector)
+
+
+def test_disabled_levels_are_not_formatted():
+    class Dump:
+        formatted = 0
+
+        def __str__(self):
+            Dump.formatted += 1
+            return "dump"
+
+    logger, collector = get_collecting_logger("test_disabled_levels_are_not_formatted")
+    logger.setLevel(logging.WARNING)
+    logger.info("FsF-F3-01M : Found data links -: %s", Dump())
+    assert Dump.formatted == 0
+    logger.warning("FsF-F3-01M : Found data links -: %s", Dump())
+    assert Dump.formatted == 1
+    assert collector.get_messages_dict() == {"FsF-F3-01M": ["WARNING: Found data links -: dump"]}
+    logger.removeHandler(collector)
+
+
+def test_assessment_logger_is_not_registered():
+    logger = get_assessment_logger("d4c5f7a1", logging.INFO)
+    assert logger.name not in logging.Logger.manager.loggerDict
+    assert logger.parent is logging.getLogger(ASSESSMENT_LOGGER_NAME)
+    assert logger.isEnabledFor(logging.INFO)
+    assert get_assessment_logger("d4c5f7a1") is not logger
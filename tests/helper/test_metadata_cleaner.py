@@ -0,0 +1,58 @@
+# SPDX-FileCopyrightText: 2020 PANGAEA (https://www.pangaea.de/)
+#
+# SPDX-License-Identifier: MIT
+
+from fuji_server.helper.metadata_cleaner import MetadataCleaner
+
+
+def test_exclude_null():
+    metadata = {
+        "title": "  A title ",
+        "creator": ["B", None, "A", "B", " "],
+        "empty": {"a": None, "b": ""},
+        "object_content_identifier": [{"url": "https://example.org/1", "size": None}, {"url": None}],
+    }
+    expected = {
+        "title": "A title",
+        "creator": ["B", "A"],
+        "object_content_identifier": [{"url": "https://example.org/1"}],
+    }
+    assert MetadataCleaner.exclude_null(metadata) == expected
+
+
+def test_clean_merged_metadata():
+    metadata = {
+        "title": "None",
+        "object_size": 0,
+        "publisher": "",
+        "keywords": ["a", "None", None],
+        "object_content_identifier": [
+            {"url": "https://example.org/data.csv", "type": "None"},
+            {"url": "https://example.org/data.csv", "type": "http://www.iana.org/assignments/media-types/text/csv"},
+            {"url": "https://example.org/data.csv", "size": "12 kB"},
+            {"url": "https://example.org/readme.txt", "type": ["text/plain", "text/markdown"]},
+        ],
+    }
+    cleaned = MetadataCleaner.clean_merged_metadata(metadata)
+    assert cleaned == {
+        "object_size": 0,
+        "keywords": ["a"],
+        "object_content_identifier": [
+            {"url": "https://example.org/data.csv", "type": "text/csv", "size": "12 kB"},
+            {"url": "https://example.org/readme.txt", "type": "text/plain"},
+        ],
+    }
+    # the input is not modified
+    assert metadata["title"] == "None"
+
+
+def test_clean_merged_metadata_single_data_link():
+    metadata = {"object_size": "2 MB", "object_content_identifier": {"url": "https://example.org/data.nc"}}
+    cleaned = MetadataCleaner.clean_merged_metadata(metadata)
+    assert cleaned["object_content_identifier"] == [{"url": "https://example.org/data.nc", "size": "2 MB"}]
+    assert MetadataCleaner.clean_merged_metadata({"object_content_identifier": [{"url": "None"}]}) == {}
+
+
+def test_unique_values():
+    values = [{"url": "a", "type": "text/csv"}, "b", {"type": "text/csv", "url": "a"}, ["b"], "b", ("b",), ["b"]]
+    assert MetadataCleaner.unique_values(values) == [{"url": "a", "type": "text/csv"}, "b", ["b"], ("b",)]
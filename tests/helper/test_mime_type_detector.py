@@ -0,0 +1,73 @@
+# SPDX-FileCopyrightText: 2020 PANGAEA (https://www.pangaea.de/)
+#
+# SPDX-License-Identifier: MIT
+
+import io
+import zipfile
+
+from fuji_server.helper.mime_type_detector import MimeTypeDetector
+
+
+def make_zip(members, stored_mimetype=None):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        if stored_mimetype:
+            archive.writestr(zipfile.ZipInfo("mimetype"), stored_mimetype)
+        for name, content in members.items():
+            archive.writestr(name, content)
+    return buffer.getvalue()
+
+
+def test_magic_bytes():
+    assert MimeTypeDetector.detect(b"%PDF-1.7\n") == ["application/pdf"]
+    assert MimeTypeDetector.detect(b"CDF\x01\x00\x00\x00\x00") == ["application/x-netcdf"]
+    assert MimeTypeDetector.detect(b"\x89HDF\r\n\x1a\n" + bytes(64)) == ["application/x-hdf5"]
+    # netCDF-4 files are HDF5 files with netCDF specific attributes, also after a user block
+    netcdf4 = bytes(512) + b"\x89HDF\r\n\x1a\n" + bytes(64) + b"_NCProperties"
+    assert MimeTypeDetector.detect(netcdf4) == ["application/x-netcdf", "application/x-hdf5"]
+    assert MimeTypeDetector.detect(b"RIFF\x00\x00\x00\x00WAVEfmt ") == ["audio/x-wav"]
+    assert MimeTypeDetector.detect(bytes(128) + b"DICM") == ["application/dicom"]
+    assert MimeTypeDetector.detect(b"") == []
+
+
+def test_zip_containers():
+    xlsx = make_zip({"[Content_Types].xml": "<Types/>", "xl/workbook.xml": "<workbook/>"})
+    assert MimeTypeDetector.detect(xlsx) == ["application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"]
+    ods = make_zip({"content.xml": "<cell/>" * 100000}, "application/vnd.oasis.opendocument.spreadsheet")
+    # the local file headers are sufficient, truncated archives are detected as well
+    assert MimeTypeDetector.detect(ods[:1000]) == ["application/vnd.oasis.opendocument.spreadsheet"]
+    shapefile = make_zip({"rivers.shp": b"\x00\x00\x27\x0a", "rivers.dbf": b"\x03"})
+    assert MimeTypeDetector.detect(shapefile) == ["application/zipped-shapefile"]
+    assert MimeTypeDetector.detect(make_zip({"data.txt": "1 2 3"})) == ["application/zip"]
+
+
+def test_text_formats():
+    assert MimeTypeDetector.detect(b"station,date,temperature\nA,2020-01-01,1.5\nB,2020-01-01,2.") == ["text/csv"]
+    assert MimeTypeDetector.detect(b"a\tb\tc\n1\t2\t3\n4\t5\t6\n") == ["text/tab-separated-values"]
+    assert MimeTypeDetector.detect(b'\xef\xbb\xbf{"type": "FeatureCollection"}') == ["application/geo+json"]
+    assert MimeTypeDetector.detect(b'<?xml version="1.0"?>\n<!-- map -->\n<svg xmlns="x"/>') == ["image/svg+xml"]
+    assert MimeTypeDetector.detect(b'<?xml version="1.0"?><gmd:MD_Metadata/>') == ["application/xml"]
+    assert MimeTypeDetector.detect(b"<!DOCTYPE html><html><body>Login</body></html>") == ["text/html"]
+
+
+def test_extension_fallback():
+    assert MimeTypeDetector.detect(b">seq1\nACGT\n", "https://example.org/data/seq.fasta?download=1") == [
+        "text/plain",
+        "chemical/seq-aa-fasta",
+        "chemical/seq-na-fasta",
+        "text/x-fasta",
+    ]
+    # specific content types are not overridden by the file extension
+    assert MimeTypeDetector.detect(b"%PDF-1.7\n", "https://example.org/data.nc") == ["application/pdf"]
+
+
+def test_extract_text():
+    assert MimeTypeDetector.extract_text(b"depth,\ttemperature\r\n", ["text/csv"]) == "depth, temperature "
+    assert MimeTypeDetector.extract_text(b"caf\xe9 au lait", ["text/plain"]) == "café au lait"
+    assert MimeTypeDetector.extract_text(b"%PDF-1.7\n", ["application/pdf"]) is None
+
+
+def test_extract_header():
+    content = b"# CTD cast 1\n\nstation,depth water,temperature\nA,10,1.5\nB,20,2.5\n"
+    assert MimeTypeDetector.extract_header(content, ["text/csv"]) == "# CTD cast 1 station,depth water,temperature"
+    assert MimeTypeDetector.extract_header(content, ["text/plain"]) is None
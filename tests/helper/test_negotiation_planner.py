@@ -0,0 +1,127 @@
+# SPDX-FileCopyrightText: 2020 PANGAEA (https://www.pangaea.de/)
+#
+# SPDX-License-Identifier: MIT
+
+import io
+import logging
+from email.message import Message
+
+import pytest
+
+from fuji_server.helper.negotiation_planner import NegotiationPlanner
+from fuji_server.helper.request_helper import AcceptTypes, RequestHelper
+
+LANDING_URL = "https://repository.example.org/dataset/1"
+HTML = b"<!doctype html><html><head><title>Dataset</title></head><body>Dataset</body></html>"
+
+
+@pytest.fixture(autouse=True)
+def planner(monkeypatch):
+    monkeypatch.setattr(NegotiationPlanner, "host_memory_ttl", 0)
+    monkeypatch.setattr(NegotiationPlanner, "known_hosts", {})
+    NegotiationPlanner.reset()
+    yield NegotiationPlanner
+    NegotiationPlanner.reset()
+
+
+def record(url, accept_type, content_type="text/html", content=HTML, headers=None, final_url=None):
+    NegotiationPlanner.record_response(
+        url, accept_type.value, 200, headers or [], content_type, content, final_url or url
+    )
+
+
+def test_host_ignoring_accept_header():
+    record(LANDING_URL, AcceptTypes.default)
+    record(LANDING_URL, AcceptTypes.xml)
+    assert NegotiationPlanner.should_negotiate(LANDING_URL)
+    # dynamic pages differ in content but are still HTML
+    record(LANDING_URL, AcceptTypes.jsonld, content=HTML.replace(b"Dataset</body>", b"Dataset 2</body>"))
+    assert not NegotiationPlanner.should_negotiate(LANDING_URL)
+    assert not NegotiationPlanner.should_negotiate("https://repository.example.org/dataset/2")
+    assert NegotiationPlanner.should_negotiate("https://other.example.org/dataset/1")
+
+
+def test_host_doing_content_negotiation():
+    record(LANDING_URL, AcceptTypes.default)
+    record(LANDING_URL, AcceptTypes.xml)
+    record(LANDING_URL, AcceptTypes.jsonld, "application/ld+json", b'{"@type": "Dataset"}')
+    record(LANDING_URL, AcceptTypes.rdf)
+    assert NegotiationPlanner.should_negotiate(LANDING_URL)
+
+
+def test_identical_json_ld_for_accept_types_asking_for_it():
+    url = "https://repo.example.org/dataset/1"
+    json_ld = b'{"@context": "https://schema.org/", "@type": "Dataset"}'
+    record(url, AcceptTypes.schemaorg, "application/ld+json", json_ld)
+    record(url, AcceptTypes.rdf, "application/ld+json", json_ld)
+    record(url, AcceptTypes.jsonld, "application/ld+json", json_ld)
+    assert NegotiationPlanner.should_negotiate(url)
+    assert NegotiationPlanner.should_negotiate("https://repo.example.org/other")
+    # the same JSON-LD for Accept types which do not ask for it
+    record(url, AcceptTypes.xml, "application/ld+json", json_ld)
+    record(url, AcceptTypes.turtle, "application/ld+json", json_ld)
+    assert not NegotiationPlanner.should_negotiate("https://repo.example.org/other")
+
+
+def test_vary_header():
+    headers = [("Vary", "Accept-Encoding, Accept")]
+    for accept_type in (AcceptTypes.default, AcceptTypes.xml, AcceptTypes.jsonld, AcceptTypes.rdf):
+        record(LANDING_URL, accept_type, headers=headers)
+    assert NegotiationPlanner.should_negotiate(LANDING_URL)
+
+
+def test_redirected_urls_judged_by_url():
+    pid_url = "https://doi.org/10.1234/abc"
+    for accept_type in (AcceptTypes.default, AcceptTypes.xml, AcceptTypes.jsonld):
+        record(pid_url, accept_type, final_url=LANDING_URL)
+    assert not NegotiationPlanner.should_negotiate(pid_url)
+    assert NegotiationPlanner.should_negotiate("https://doi.org/10.1234/def")
+
+
+def test_hosts_remembered_across_assessments():
+    for accept_type in (AcceptTypes.default, AcceptTypes.xml, AcceptTypes.jsonld):
+        record(LANDING_URL, accept_type)
+    NegotiationPlanner.reset()
+    assert NegotiationPlanner.should_negotiate(LANDING_URL)
+    NegotiationPlanner.set_host_memory_ttl(3600)
+    for accept_type in (AcceptTypes.default, AcceptTypes.xml, AcceptTypes.jsonld):
+        record(LANDING_URL, accept_type)
+    NegotiationPlanner.reset()
+    assert not NegotiationPlanner.should_negotiate(LANDING_URL)
+
+
+class FakeResponse:
+    def __init__(self, url, content_type, content):
+        self.url = url
+        self.content = io.BytesIO(content)
+        self.status = 200
+        self.headers = [("Content-Type", content_type), ("Content-Length", str(len(content)))]
+
+    def info(self):
+        message = Message()
+        for name, value in self.headers:
+            message[name] = value
+        return message
+
+    def getheaders(self):
+        return self.headers
+
+    def geturl(self):
+        return self.url
+
+    def read(self, size=-1):
+        return self.content.read(size)
+
+    def close(self):
+        pass
+
+
+def test_request_helper_records_responses():
+    RequestHelper.reset_cache()
+    for accept_type in (AcceptTypes.default, AcceptTypes.xml, AcceptTypes.jsonld):
+        request_helper = RequestHelper(LANDING_URL, logging.getLogger("test_negotiation_planner"))
+        request_helper.setAcceptType(accept_type)
+        request_helper.handle_content(FakeResponse(LANDING_URL, "text/html", HTML), "FsF-F2-01M", True)
+    assert not NegotiationPlanner.should_negotiate(LANDING_URL)
+    RequestHelper.reset_cache()
+    assert NegotiationPlanner.should_negotiate(LANDING_URL)
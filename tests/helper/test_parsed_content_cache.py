@@ -0,0 +1,47 @@
+# SPDX-FileCopyrightText: 2020 PANGAEA (https://www.pangaea.de/)
+#
+# SPDX-License-Identifier: MIT
+
+import pytest
+
+from fuji_server.helper.parsed_content_cache import ParsedContentCache
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(ParsedContentCache, "max_size", ParsedContentCache.max_size)
+    ParsedContentCache.set_db_path(str(tmp_path / "cache" / "parsed.db"))
+    yield ParsedContentCache
+    ParsedContentCache.set_db_path(None)
+
+
+def parse_result(text):
+    return {"tika_content_type": ["application/pdf"], "tika_status": 200, "test_data_content_text": text}
+
+
+def test_key_includes_byte_range():
+    assert ParsedContentCache.get_key(b"%PDF-1.7").endswith(":0-8")
+    assert ParsedContentCache.get_key(b"%PDF-1.7") != ParsedContentCache.get_key(b"%PDF-1.7 ")
+
+
+def test_cache_is_persistent(cache, tmp_path):
+    key = cache.get_key(b"%PDF-1.7 README")
+    assert cache.get(key) is None
+    cache.put(key, parse_result("README"))
+    cache.set_db_path(str(tmp_path / "cache" / "parsed.db"))
+    assert cache.get(key) == parse_result("README")
+
+
+def test_least_recently_used_entries_are_evicted(cache):
+    entry_size = len(cache.get_key(b"a")) + len('["application/pdf"]') + 1000
+    cache.set_max_size(entry_size * 2)
+    keys = [cache.get_key(content) for content in (b"a", b"b", b"c")]
+    cache.put(keys[0], parse_result("a" * 1000))
+    cache.put(keys[1], parse_result("b" * 1000))
+    assert cache.get(keys[0])
+    cache.put(keys[2], parse_result("c" * 1000))
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) and cache.get(keys[2])
+    # results larger than the cache are not stored
+    cache.put(keys[1], parse_result("b" * entry_size * 2))
+    assert cache.get(keys[1]) is None and cache.get(keys[0])
@@ -0,0 +1,108 @@
+# SPDX-FileCopyrightText: 2020 PANGAEA (https://www.pangaea.de/)
+#
+# SPDX-License-Identifier: MIT
+
+import logging
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+
+from fuji_server.helper.redirect_memo import RedirectMemo
+from fuji_server.helper.request_helper import AcceptTypes, RequestHelper
+
+DOI_URL = "https://doi.org/10.1234/abc"
+LANDING_URL = "https://repository.example.org/dataset/1"
+CROSSCITE_URL = "https://data.crosscite.org/application/vnd.datacite.datacite+json/10.1234/abc"
+
+
+class RedirectingHandler(BaseHTTPRequestHandler):
+    hits = []
+
+    def do_GET(self):
+        RedirectingHandler.hits.append(self.path)
+        if self.path in ("/pid", "/vary", "/guarded"):
+            self.send_response(302)
+            self.send_header("Location", "/protected" if self.path == "/guarded" else "/landing")
+            if self.path == "/vary":
+                self.send_header("Vary", "Accept")
+            self.end_headers()
+        elif self.path == "/protected" and "Mozilla" not in self.headers.get("User-Agent", ""):
+            self.send_response(403)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+        else:
+            body = b"<html><body>Dataset</body></html>"
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server(http_server):
+    RequestHelper.reset_cache()
+    yield http_server(RedirectingHandler)
+    RequestHelper.reset_cache()
+
+
+def request(url, accept_type):
+    request_helper = RequestHelper(url, logging.getLogger("test_redirect_memo"))
+    request_helper.setAcceptType(accept_type)
+    request_helper.content_negotiate("FsF-F2-01M")
+    return request_helper
+
+
+def test_known_redirects_are_skipped(server):
+    first = request(server + "/pid", AcceptTypes.default)
+    second = request(server + "/pid", AcceptTypes.html)
+    assert RedirectingHandler.hits == ["/pid", "/landing", "/landing"]
+    assert second.redirect_list == first.redirect_list == [server + "/landing"]
+    assert second.redirect_status_list == [(server + "/landing", 302)]
+    assert second.redirect_url == server + "/landing"
+    # a redirect seen for a single Accept class is not used for other Accept classes
+    request(server + "/pid", AcceptTypes.xml)
+    request(server + "/pid", AcceptTypes.jsonld)
+    assert RedirectingHandler.hits[3:] == ["/pid", "/landing", "/landing"]
+
+
+def test_retry_with_browser_user_agent_records_redirects(server):
+    first = request(server + "/guarded", AcceptTypes.html)
+    assert RedirectingHandler.hits == ["/guarded", "/protected", "/guarded", "/protected"]
+    assert first.response_status == 200
+    assert first.redirect_list == [server + "/protected"]
+    assert first.redirect_status_list == [(server + "/protected", 302)]
+    assert first.redirect_url == server + "/protected"
+    # the redirect of the retry is known, the retry of the shortcut keeps the skipped hop
+    second = request(server + "/guarded", AcceptTypes.html)
+    assert RedirectingHandler.hits[4:] == ["/protected", "/protected"]
+    assert second.redirect_list == [server + "/protected"]
+    assert second.redirect_url == server + "/protected"
+
+
+def test_accept_dependent_redirects_are_followed(server):
+    for accept_type in (AcceptTypes.default, AcceptTypes.xml, AcceptTypes.jsonld):
+        request(server + "/vary", accept_type)
+    assert RedirectingHandler.hits == ["/vary", "/landing"] * 3
+    request(server + "/vary", AcceptTypes.xml)
+    assert RedirectingHandler.hits[6:] == ["/landing"]
+
+
+def test_doi_redirects_depend_on_accept():
+    RedirectMemo.reset()
+    RedirectMemo.record(DOI_URL, AcceptTypes.html.value, [(LANDING_URL, 302, None, False)])
+    RedirectMemo.record(DOI_URL, AcceptTypes.xml.value, [(LANDING_URL, 302, None, False)])
+    RedirectMemo.record(DOI_URL, AcceptTypes.datacite_json.value, [(CROSSCITE_URL, 302, None, False)])
+    assert RedirectMemo.get_shortcut(DOI_URL, AcceptTypes.default.value) == (LANDING_URL, [(LANDING_URL, 302)])
+    assert RedirectMemo.get_shortcut(DOI_URL, AcceptTypes.datacite_json.value) == (
+        CROSSCITE_URL,
+        [(CROSSCITE_URL, 302)],
+    )
+    # unknown Accept classes are resolved by doi.org again
+    assert RedirectMemo.get_shortcut(DOI_URL, AcceptTypes.rdf.value) == (DOI_URL, [])
+    RedirectMemo.record(LANDING_URL, AcceptTypes.html.value, [(LANDING_URL + "/", 301, None, True)])
+    assert RedirectMemo.get_shortcut(DOI_URL, AcceptTypes.html.value) == (LANDING_URL, [(LANDING_URL, 302)])
+    RedirectMemo.reset()
@@ -0,0 +1,95 @@
+# SPDX-FileCopyrightText: 2020 PANGAEA (https://www.pangaea.de/)
+#
+# SPDX-License-Identifier: MIT
+
+import configparser
+import os
+import threading
+import time
+
+import yaml
+from fuji_server.helper.preprocessor import Preprocessor
+from fuji_server.helper.reference_data_refresher import ReferenceDataRefresher
+
+
+def test_tasks_are_due_by_reference_file_age(tmp_path):
+    fresh_file = tmp_path / "fresh.yaml"
+    outdated_file = tmp_path / "outdated.yaml"
+    fresh_file.touch()
+    outdated_file.touch()
+    os.utime(outdated_file, (time.time() - 7200, time.time() - 7200))
+    runs = []
+    refresher = ReferenceDataRefresher()
+    refresher.add_task("fresh", 3600, lambda: runs.append("fresh"), fresh_file)
+    refresher.add_task("outdated", 3600, lambda: runs.append("outdated"), outdated_file)
+    refresher.add_task("disabled", 0, lambda: runs.append("disabled"))
+    assert refresher.run_pending() == ["outdated"]
+    assert refresher.run_pending() == []
+    assert refresher.run_pending(now=time.time() + 3601) == ["fresh", "outdated"]
+    assert runs == ["outdated", "fresh", "outdated"]
+
+
+def test_failing_task_is_rescheduled():
+    def fail():
+        raise ValueError("service unavailable")
+
+    refresher = ReferenceDataRefresher()
+    refresher.add_task("failing", 60, fail)
+    assert refresher.run_pending() == ["failing"]
+    assert refresher.get_next_run() > time.time() + 50
+
+
+def test_background_thread():
+    refreshed = threading.Event()
+    refresher = ReferenceDataRefresher()
+    refresher.add_task("task", 3600, refreshed.set)
+    thread = refresher.start()
+    assert thread.daemon
+    assert refreshed.wait(5)
+    refresher.stop(timeout=5)
+    assert not thread.is_alive()
+
+
+def test_from_config():
+    config = configparser.ConfigParser()
+    config.read_dict({"SERVICE": {"re3data_refresh_interval": "0", "reference_data_max_workers": "2"}})
+    max_workers = Preprocessor.reference_data_max_workers
+    refresher = ReferenceDataRefresher.from_config(config)
+    assert list(refresher.tasks) == ["re3data profiles", "SPDX licenses"]
+    assert Preprocessor.reference_data_max_workers == 2
+    Preprocessor.reference_data_max_workers = max_workers
+
+
+def test_harvest_datacite_re3repos(monkeypatch):
+    requested_pages = []
+
+    class Response:
+        def __init__(self, page_number):
+            self.page_number = page_number
+
+        def raise_for_status(self):
+            pass
+
+        def json(self):
+            return {
+                "data": [{"id": f"client.{self.page_number}", "attributes": {"re3data": f"doi{self.page_number}"}}],
+                "meta": {"totalPages": 3},
+            }
+
+    def get(url, params=None, **kwargs):
+        requested_pages.append(params["page[number]"])
+        return Response(params["page[number]"])
+
+    monkeypatch.setattr("fuji_server.helper.preprocessor.requests.get", get)
+    re3repositories = Preprocessor.harvest_datacite_re3repos()
+    assert sorted(requested_pages) == [1, 2, 3]
+    assert re3repositories["client.1"] == "doi1"
+    assert re3repositories["client.3"] == "doi3"
+
+
+def test_dump_reference_yaml(tmp_path):
+    path = tmp_path / "repodois.yaml"
+    path.write_text("old: data\n")
+    Preprocessor.dump_reference_yaml({"new": "data"}, path)
+    assert yaml.safe_load(path.read_text()) == {"new": "data"}
+    assert [p.name for p in tmp_path.iterdir()] == ["repodois.yaml"]
@@ -0,0 +1,149 @@
+# SPDX-FileCopyrightText: 2020 PANGAEA (https://www.pangaea.de/)
+#
+# SPDX-License-Identifier: MIT
+
+import logging
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+
+from fuji_server.helper.preprocessor import Preprocessor
+from fuji_server.helper.repository_helper import RepositoryHelper
+from fuji_server.helper.request_helper import RequestHelper
+
+RE3DOI = "https://doi.org/10.17616/R3XS37"
+RE3DATA_RECORD = b"""<?xml version="1.0" encoding="UTF-8"?>
+<r3d:re3data xmlns:r3d="http://www.re3data.org/schema/2-2">
+  <r3d:repository>
+    <r3d:repositoryName>PANGAEA</r3d:repositoryName>
+    <r3d:repositoryURL>https://www.pangaea.de/</r3d:repositoryURL>
+    <r3d:api apiType="OAI-PMH">https://ws.pangaea.de/oai/provider</r3d:api>
+    <r3d:api apiType="REST">https://ws.pangaea.de/es/pangaea</r3d:api>
+    <r3d:metadataStandard>
+      <r3d:metadataStandardName>DataCite Metadata Schema</r3d:metadataStandardName>
+      <r3d:metadataStandardURL>http://www.dcc.ac.uk/resources/metadata-standards/datacite-metadata-schema</r3d:metadataStandardURL>
+    </r3d:metadataStandard>
+  </r3d:repository>
+</r3d:re3data>"""
+PROFILE = {
+    "name": "PANGAEA",
+    "url": "https://www.pangaea.de/",
+    "apis": {"OAI-PMH": "https://ws.pangaea.de/oai/provider"},
+    "standards": ["http://www.dcc.ac.uk/resources/metadata-standards/datacite-metadata-schema"],
+}
+
+
+class Re3dataHandler(BaseHTTPRequestHandler):
+    hits = []
+
+    def do_GET(self):
+        Re3dataHandler.hits.append(self.path)
+        if self.path.startswith("/repositories"):
+            port = self.server.server_address[1]
+            body = f'<list><repository><link href="http://127.0.0.1:{port}/repository/r3d1" rel="self"/></repository></list>'
+            body = body.encode()
+        else:
+            body = RE3DATA_RECORD
+        self.send_response(200)
+        self.send_header("Content-Type", "application/xml")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def profiles(tmp_path, monkeypatch):
+    monkeypatch.setattr(RepositoryHelper, "re3data_profiles", {})
+    monkeypatch.setattr(RepositoryHelper, "re3data_profiles_loaded", False)
+    monkeypatch.setattr(RepositoryHelper, "re3data_misses", {})
+    monkeypatch.setattr(RepositoryHelper, "re3data_profiles_path", tmp_path / "re3data_profiles.yaml")
+    monkeypatch.setattr(Preprocessor, "re3repositories", {"pangaea.repository": RE3DOI, "other.repository": None})
+    return RepositoryHelper
+
+
+def test_parse_re3data_profile():
+    assert RepositoryHelper.parse_re3data_profile(RE3DATA_RECORD) == PROFILE
+
+
+def test_stored_profile_is_used_without_requests(profiles, monkeypatch):
+    def content_negotiate(self, metric_id="", ignore_html=True):
+        raise AssertionError("re3data must not be queried")
+
+    monkeypatch.setattr(RequestHelper, "content_negotiate", content_negotiate)
+    profiles.re3data_profiles[RE3DOI] = PROFILE
+    helper = RepositoryHelper(
+        "pangaea.repository", logging.getLogger("test_repository_helper"), "https://doi.pangaea.de/10.1594/PANGAEA.1"
+    )
+    helper.lookup_re3data()
+    assert helper.getRepoNameURL() == ("PANGAEA", "https://www.pangaea.de/")
+    assert helper.getRe3MetadataAPIs() == PROFILE["apis"]
+    assert helper.getRe3MetadataStandards() == PROFILE["standards"]
+    # the landing page domain is still verified per assessment
+    other = RepositoryHelper("pangaea.repository", logging.getLogger("test_repository_helper"), "https://example.org/1")
+    other.lookup_re3data()
+    assert other.getRe3MetadataAPIs() == {} and other.getRe3MetadataStandards() == []
+
+
+def test_missing_record_is_not_queried_again(profiles, monkeypatch):
+    calls = []
+
+    def retrieve_re3data_profile(cls, re3doi, logger=None):
+        calls.append(re3doi)
+        if len(calls) == 1:
+            return None
+        raise ValueError("re3data is not available")
+
+    monkeypatch.setattr(RepositoryHelper, "retrieve_re3data_profile", classmethod(retrieve_re3data_profile))
+    for _ in range(2):
+        helper = RepositoryHelper(
+            "pangaea.repository",
+            logging.getLogger("test_repository_helper"),
+            "https://doi.pangaea.de/10.1594/PANGAEA.1",
+        )
+        helper.lookup_re3data()
+        assert helper.getRe3MetadataAPIs() == {}
+    assert calls == [RE3DOI]
+    # failed lookups are cached as well, until the miss time to live has passed
+    profiles.re3data_misses[RE3DOI] = 0
+    for _ in range(2):
+        RepositoryHelper("pangaea.repository", logging.getLogger("test_repository_helper"), "").lookup_re3data()
+    assert calls == [RE3DOI] * 2
+
+
+def test_update_re3data_profiles_keeps_failed_profiles(profiles, monkeypatch):
+    profiles.re3data_profiles["https://doi.org/10.17616/R3OLD"] = {
+        "name": "Old",
+        "url": None,
+        "apis": {},
+        "standards": [],
+    }
+    profiles.re3data_profiles_loaded = True
+    Preprocessor.re3repositories["old.repository"] = "https://doi.org/10.17616/R3OLD"
+    monkeypatch.setattr(
+        RepositoryHelper,
+        "retrieve_re3data_profile",
+        classmethod(lambda cls, re3doi, logger=None, session=None: PROFILE if re3doi == RE3DOI else None),
+    )
+    profiles.update_re3data_profiles()
+    assert profiles.re3data_profiles[RE3DOI] == PROFILE
+    assert profiles.re3data_profiles["https://doi.org/10.17616/R3OLD"]["name"] == "Old"
+    # the profiles are stored and loaded at the next start
+    profiles.re3data_profiles = {}
+    profiles.load_re3data_profiles()
+    assert profiles.get_re3data_profile(RE3DOI) == PROFILE
+    assert len(profiles.re3data_profiles) == 2
+
+
+def test_update_re3data_profiles_bypasses_request_helper(profiles, monkeypatch, http_server):
+    def content_negotiate(self, metric_id="", ignore_html=True):
+        raise AssertionError("the background refresh must not use the RequestHelper")
+
+    monkeypatch.setattr(RequestHelper, "content_negotiate", content_negotiate)
+    monkeypatch.setattr(Preprocessor, "re3repositories", {"pangaea.repository": RE3DOI})
+    monkeypatch.setattr(Preprocessor, "RE3DATA_API", http_server(Re3dataHandler) + "/repositories")
+    profiles.update_re3data_profiles()
+    assert profiles.re3data_profiles == {RE3DOI: PROFILE}
+    assert Re3dataHandler.hits == ["/repositories?query=10.17616/R3XS37", "/repository/r3d1"]
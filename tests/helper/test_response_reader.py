@@ -0,0 +1,103 @@
+# SPDX-FileCopyrightText: 2020 PANGAEA (https://www.pangaea.de/)
+#
+# SPDX-License-Identifier: MIT
+
+import gzip
+import io
+import logging
+from email.message import Message
+
+from fuji_server.helper.metadata_collector import MetadataFormats
+from fuji_server.helper.request_helper import RequestHelper
+from fuji_server.helper.response_reader import ResponseReader
+
+URL = "https://repository.example.org/dataset/1"
+
+
+class CountingStream(io.BytesIO):
+    def __init__(self, content):
+        super().__init__(content)
+        self.bytes_read = 0
+
+    def read(self, size=-1):
+        data = super().read(size)
+        self.bytes_read += len(data)
+        return data
+
+
+class FakeResponse(CountingStream):
+    def __init__(self, content, headers):
+        super().__init__(content)
+        self.headers = headers
+        self.status = 200
+
+    def info(self):
+        message = Message()
+        for name, value in self.headers:
+            message[name] = value
+        return message
+
+    def getheaders(self):
+        return self.headers
+
+    def geturl(self):
+        return URL
+
+
+def test_sniff():
+    reader = ResponseReader(None, 100)
+    assert reader.sniff(b"\n<!DOCTYPE html>\n<html lang='en'>") == "text/html"
+    assert reader.sniff(b'<?xml version="1.0"?><rdf:RDF/>') == "application/xml"
+    assert reader.sniff(b'\xef\xbb\xbf{"@context": "https://schema.org/"}') == "application/json"
+    assert reader.sniff(b"@prefix dcat: <http://www.w3.org/ns/dcat#> .") == "text/turtle"
+    assert reader.sniff(b"Title: Dataset") == "text/plain"
+    assert not reader.is_binary
+    assert reader.sniff(b"\x89HDF\r\n\x1a\n") == "application/x-hdf5"
+    assert reader.is_binary
+    assert reader.sniff(b"abc\x00\x01") == "application/octet-stream"
+
+
+def test_binary_content_aborts_early():
+    stream = CountingStream(b"PK\x03\x04" + bytes(range(256)) * 4096)
+    reader = ResponseReader(stream, 5000000)
+    assert reader.read() is None
+    assert reader.is_binary and reader.sniffed_type == "application/zip"
+    assert stream.bytes_read == ResponseReader.CHUNK_SIZE
+
+
+def test_gzip_output_is_capped():
+    values = b"".join(b"<value>%d</value>" % i for i in range(1000000))
+    stream = CountingStream(gzip.compress(b"<dataset>" + values + b"</dataset>", compresslevel=1))
+    reader = ResponseReader(stream, 100000, "gzip")
+    content = reader.read()
+    assert len(content) == reader.size == 100000
+    assert reader.truncated
+    assert stream.bytes_read == ResponseReader.CHUNK_SIZE < len(stream.getvalue())
+    reader = ResponseReader(CountingStream(gzip.compress(b"<dataset/>")), 100000, "gzip")
+    assert reader.read() == b"<dataset/>"
+    assert not reader.truncated
+
+
+def test_utf8_check():
+    content = "<title>" + "ä" * ResponseReader.CHUNK_SIZE + "</title>"
+    reader = ResponseReader(CountingStream(content.encode("utf-8")), 5000000)
+    assert reader.read() == content.encode("utf-8")
+    assert reader.is_utf8
+    reader = ResponseReader(CountingStream(b"<title>caf\xe9</title>"), 5000000)
+    reader.read()
+    assert not reader.is_utf8
+
+
+def test_request_helper_reads_incrementally():
+    RequestHelper.reset_cache()
+    request_helper = RequestHelper(URL, logging.getLogger("test_response_reader"))
+    html = b"<!doctype html><html><body>caf\xe9</body></html>"
+    response = FakeResponse(gzip.compress(html), [("Content-Encoding", "gzip")])
+    assert request_helper.handle_content(response, "FsF-F2-01M", False) == MetadataFormats.HTML
+    assert request_helper.content_type == "text/html"
+    assert request_helper.response_content == html.replace(b"\xe9", "�".encode())
+    request_helper = RequestHelper(URL + ".pdf", logging.getLogger("test_response_reader"))
+    response = FakeResponse(b"%PDF-1.7\n" + bytes(range(256)) * 1024, [("Content-Type", "application/ld+json")])
+    assert request_helper.handle_content(response, "FsF-F2-01M", True) is None
+    assert request_helper.response_content is None
+    RequestHelper.reset_cache()
@@ -0,0 +1,118 @@
+# SPDX-FileCopyrightText: 2020 PANGAEA (https://www.pangaea.de/)
+#
+# SPDX-License-Identifier: MIT
+
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+
+from fuji_server.helper.tika_client import LocalTikaBackend, TikaClient, TikaServerBackend
+
+
+class CountingBackend:
+    def __init__(self, latency=0.0, fail=False):
+        self.latency = latency
+        self.fail = fail
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def parse(self, content, timeout):
+        with self._lock:
+            self.calls += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(self.latency)
+        with self._lock:
+            self.in_flight -= 1
+        if self.fail:
+            raise ConnectionError("Tika server is down")
+        return {"status": 200, "metadata": {"Content-Type": "text/plain"}, "content": content.decode()}
+
+
+@pytest.fixture
+def client(monkeypatch):
+    for name in ("backend", "max_in_flight", "deadline", "failure_threshold", "recovery_time", "_slots"):
+        monkeypatch.setattr(TikaClient, name, getattr(TikaClient, name))
+    yield TikaClient
+    TikaClient.configure()
+
+
+def test_max_in_flight(client):
+    backend = CountingBackend(latency=0.05)
+    client.configure(backend=backend, max_in_flight=2)
+    with ThreadPoolExecutor(8) as executor:
+        results = list(executor.map(client.parse, [f"sample {i}".encode() for i in range(8)]))
+    assert [result["content"] for result in results] == [f"sample {i}" for i in range(8)]
+    assert backend.max_in_flight == 2
+
+
+def test_deadline_includes_waiting_for_a_slot(client):
+    client.configure(backend=CountingBackend(latency=0.5), max_in_flight=1, deadline=0.1)
+    with ThreadPoolExecutor(2) as executor:
+        first = executor.submit(client.parse, b"first")
+        time.sleep(0.02)
+        second = executor.submit(client.parse, b"second")
+        with pytest.raises(TimeoutError):
+            second.result()
+        assert first.result()["content"] == "first"
+
+
+def test_circuit_breaker(client):
+    backend = CountingBackend(fail=True)
+    client.configure(backend=backend, failure_threshold=2, recovery_time=0.1)
+    for _ in range(2):
+        with pytest.raises(ConnectionError, match="down"):
+            client.parse(b"sample")
+    assert not client.is_available()
+    with pytest.raises(ConnectionError, match="unavailable"):
+        client.parse(b"sample")
+    assert backend.calls == 2
+    time.sleep(0.1)
+    # a single trial request is sent after the recovery time
+    backend.fail = False
+    assert client.is_available()
+    assert client.parse(b"sample")["status"] == 200
+    assert client.is_available()
+
+
+def test_local_backend(client):
+    client.configure(backend=LocalTikaBackend())
+    result = client.parse(b"station,depth\nA,10\nB,20\n")
+    assert result["metadata"]["Content-Type"] == "text/csv"
+    assert result["content"] == "station,depth A,10 B,20 "
+    assert client.parse(b"%PDF-1.7\n")["metadata"]["Content-Type"] == "application/pdf"
+
+
+class RmetaHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_PUT(self):
+        content = self.rfile.read(int(self.headers["Content-Length"]))
+        documents = [
+            {"Content-Type": "application/zip", "X-TIKA:content": ""},
+            {"Content-Type": "text/csv; charset=UTF-8", "X-TIKA:content": content.decode()},
+        ]
+        body = json.dumps(documents).encode()
+        self.send_response(200 if self.path == "/rmeta/text" else 404)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def test_server_backend(client, http_server):
+    backend = TikaServerBackend(http_server(RmetaHandler) + "/", client_only=True)
+    client.configure(backend=backend)
+    result = client.parse(b"depth,temperature")
+    assert result["status"] == 200
+    assert result["metadata"]["Content-Type"] == ["application/zip", "text/csv; charset=UTF-8"]
+    assert result["content"] == "depth,temperature"
@@ -0,0 +1,31 @@
+# SPDX-FileCopyrightText: 2020 PANGAEA (https://www.pangaea.de/)
+#
+# SPDX-License-Identifier: MIT
+
+import random
+
+from fuji_server.helper.variable_matcher import VariableMatcher
+
+
+def test_overlapping_variables():
+    variables = ["Temp", "Temperature", "perat", "Depth water", "Salinity", "Sal"]
+    matcher = VariableMatcher(variables)
+    assert matcher.find("Event Depth water [m] Temperature [°C]") == {"Temp", "Temperature", "perat", "Depth water"}
+    assert matcher.find("Salinity") == {"Salinity", "Sal"}
+    assert matcher.find("") == set()
+    assert VariableMatcher([]).find("Temperature") == set()
+
+
+def test_same_result_as_substring_search():
+    randomizer = random.Random(42)
+    for _ in range(500):
+        variables = ["".join(randomizer.choices("ab c.", k=randomizer.randint(0, 5))) for _ in range(10)]
+        text = "".join(randomizer.choices("ab c.", k=randomizer.randint(1, 60)))
+        assert VariableMatcher(variables).find(text) == {variable for variable in variables if variable in text}
+
+
+def test_header_is_scanned_first():
+    matcher = VariableMatcher(["Depth", "Salinity"])
+    assert matcher.find("Depth Salinity 1 2", header="Depth Salinity") == {"Depth", "Salinity"}
+    # variables which are missing in the header are searched in the full text (e.g. long format tables)
+    assert matcher.find("variable,value Depth,1 Salinity,2", header="variable,value") == {"Depth", "Salinity"}